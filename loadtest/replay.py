@@ -0,0 +1,451 @@
+"""
+End-to-end load generator: OpenWebUI pipe -> agent -> gateway -> MCP servers
+
+Replays recorded chat sessions through the real ``Pipe.pipe`` from
+openwebui/strands_agent_pipe.py. Sessions start at an open-loop arrival rate,
+so a slow chain builds a backlog the way real users do instead of slowing
+the generator down. Behind the pipe runs a local chain:
+
+    Pipe.pipe -> ReplayAgent -> GatewayStandIn (JWT via KeycloakStandIn) -> browser/code/memory MCP servers
+
+The MCP servers are the real server modules with AgentCore and Bedrock
+replaced by the fakes in mcp-server/fakes.py (see
+mcp-server/benchmarks/bench_servers.py). The agent stand-in takes a sampled
+Bedrock latency per model turn and replays the turn's recorded tool calls
+through the gateway. Each turn gets its own x-request-id and traceparent.
+The pipe forwards both, and every hop records its time under the request id,
+which gives a per-hop latency breakdown:
+
+    pipe         pipe overhead and agent connection (total - agent)
+    agent        agent time outside model turns and tool batches
+    bedrock      model turns
+    tools        wall time of tool batches, spent in:
+      mcp_connect  MCP session setup through the gateway
+      gateway      JWT checks and proxying
+      mcp.<target> time in each MCP server
+
+Usage:
+    python replay.py --rate 2 --duration 120 --json run.json
+    python replay.py --sessions openwebui-export.json --arrival constant --rate 0.5 \\
+        --bedrock-latency lognormal:2.0:0.6 --latency browser=lognormal:3.0:0.5
+    python replay.py --agent-url https://agent.staging.example --token "$JWT"   # deployed chain, end-to-end only
+
+Sessions are JSON lines (see sessions.jsonl) or an OpenWebUI chat export.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(LOADTEST_DIR, "..", "openwebui"))
+sys.path.insert(0, os.path.join(LOADTEST_DIR, "..", "mcp-server", "benchmarks"))
+
+import uvicorn  # noqa: E402
+
+import bench_servers  # noqa: E402
+from fakes import LatencyModel  # noqa: E402
+from standins import (  # noqa: E402
+    JWKS_PATH, REALM_PATH, GatewayStandIn, KeycloakStandIn, ReplayAgent, SpanLog, traceparent,
+)
+from strands_agent_pipe import Pipe  # noqa: E402
+
+# Gateway target -> MCP server module
+TARGETS = {"browser": "browser_server", "code": "code_server", "memory": "memory_server"}
+
+# How the pipe reports failures to the chat
+ERROR_PREFIXES = ("❌", "⏱️", "🔐", "🚫", "Error:", "No response received")
+
+HOPS = ["total", "first_token", "pipe", "agent", "bedrock", "tools", "mcp_connect", "gateway"] + [
+    f"mcp.{target}" for target in TARGETS
+]
+
+
+@dataclass
+class Turn:
+    prompt: str
+    model: str = "strands-weather-agent"
+    think_seconds: float = 0.0
+    # Batches of {"name": ..., "arguments": ...}; calls in a batch run concurrently. None: default workflow
+    tool_calls: Optional[List[List[Dict[str, Any]]]] = None
+
+
+@dataclass
+class Session:
+    name: str
+    user: str
+    turns: List[Turn]
+
+
+@dataclass
+class TurnResult:
+    session: str
+    turn: int
+    request_id: str
+    traceparent: str
+    ok: bool
+    total: float
+    first_token: Optional[float]
+    hops: Dict[str, float]
+    spans: List[Tuple[str, float, Dict[str, Any]]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def tool_batches(tool_calls: Optional[List[Any]]) -> Optional[List[List[Dict[str, Any]]]]:
+    if tool_calls is None:
+        return None
+    return [call if isinstance(call, list) else [call] for call in tool_calls]
+
+
+def load_sessions(path: str) -> List[Session]:
+    """Sessions from JSON lines, or from an OpenWebUI chat export (a JSON list of chats)"""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+
+    if text.lstrip().startswith("["):
+        sessions = []
+        for n, item in enumerate(json.loads(text)):
+            chat = item.get("chat", item)
+            messages = chat.get("messages") or []
+            turns, last_at = [], None
+            for message in messages:
+                if message.get("role") != "user":
+                    continue
+                at = message.get("timestamp")
+                think = max(at - last_at, 0) if at is not None and last_at is not None else 0.0
+                turns.append(Turn(prompt=message.get("content", ""), think_seconds=think))
+                last_at = at
+            if turns:
+                sessions.append(Session(chat.get("title") or f"chat-{n}", item.get("user_id") or f"user-{n}", turns))
+        return sessions
+
+    sessions = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        turns = [
+            Turn(
+                prompt=t["prompt"],
+                model=t.get("model", "strands-weather-agent"),
+                think_seconds=t.get("think_seconds", 0.0),
+                tool_calls=tool_batches(t.get("tool_calls")),
+            )
+            for t in record["turns"]
+        ]
+        sessions.append(Session(record.get("session", f"session-{len(sessions)}"), record.get("user", "loadtest"), turns))
+    return sessions
+
+
+class ReplayRequest:
+    """Just enough of a Starlette request for the pipe"""
+
+    def __init__(self, headers: Dict[str, str]):
+        self.headers = headers
+        self.cookies: Dict[str, str] = {}
+
+
+def hop_breakdown(total: float, first_token: Optional[float], spans) -> Dict[str, float]:
+    sums: Dict[str, float] = defaultdict(float)
+    for hop, seconds, _ in spans:
+        sums[hop] += seconds
+
+    hops = {"total": total}
+    if first_token is not None:
+        hops["first_token"] = first_token
+    if "agent" in sums:
+        hops["pipe"] = max(total - sums["agent"], 0.0)
+        hops["agent"] = max(sums["agent"] - sums["bedrock"] - sums["tools"], 0.0)
+    for hop in ("bedrock", "tools", "mcp_connect", "gateway") + tuple(f"mcp.{target}" for target in TARGETS):
+        if hop in sums:
+            hops[hop] = sums[hop]
+    return hops
+
+
+class LoadGenerator:
+    def __init__(self, pipe: Pipe, spans: SpanLog, agent: Optional[ReplayAgent], tokens, think_scale: float):
+        self.pipe = pipe
+        self.spans = spans
+        self.agent = agent
+        self.tokens = tokens
+        self.think_scale = think_scale
+        self.results: List[TurnResult] = []
+        self.sessions_started = 0
+        self.sessions_finished = 0
+
+    async def run_turn(self, session: Session, index: int, turn: Turn, history: List[Dict[str, str]]) -> TurnResult:
+        request_id = uuid.uuid4().hex
+        trace = traceparent()
+        if self.agent is not None and turn.tool_calls is not None:
+            self.agent.turns[request_id] = turn.tool_calls
+
+        history.append({"role": "user", "content": turn.prompt})
+        body = {"model": turn.model, "messages": list(history)}
+        user = {"oauth_id_token": self.tokens(session.user), "name": session.user, "id": session.user}
+
+        deltas: List[str] = []
+        first_token = None
+        started = time.perf_counter()
+        async for delta in self.pipe.pipe(
+            body, __request__=ReplayRequest({"x-request-id": request_id, "traceparent": trace}), __user__=user
+        ):
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            deltas.append(delta)
+        total = time.perf_counter() - started
+
+        text = "".join(deltas)
+        history.append({"role": "assistant", "content": text})
+        failed = text.lstrip().startswith(ERROR_PREFIXES) or "❌ Error:" in text
+        spans = self.spans.pop(request_id)
+        return TurnResult(
+            session=session.name,
+            turn=index,
+            request_id=request_id,
+            traceparent=trace,
+            ok=not failed,
+            total=total,
+            first_token=first_token,
+            hops=hop_breakdown(total, first_token, spans),
+            spans=spans,
+            error=" ".join(text.split())[:160] if failed else None,
+        )
+
+    async def run_session(self, session: Session) -> None:
+        self.sessions_started += 1
+        history: List[Dict[str, str]] = []
+        for index, turn in enumerate(session.turns):
+            if index and turn.think_seconds and self.think_scale:
+                await asyncio.sleep(turn.think_seconds * self.think_scale)
+            self.results.append(await self.run_turn(session, index, turn, history))
+        self.sessions_finished += 1
+
+    async def open_loop(self, sessions: List[Session], rate: float, duration: float, arrival: str, drain: float,
+                        seed: int) -> Dict[str, Any]:
+        """Start sessions at ``rate`` per second for ``duration`` seconds, regardless of completions"""
+        rng = random.Random(seed)
+        loop = asyncio.get_running_loop()
+        tasks, lags = [], []
+        started = loop.time()
+        offset = 0.0
+        while True:
+            offset += rng.expovariate(rate) if arrival == "poisson" else 1 / rate
+            if offset >= duration:
+                break
+            await asyncio.sleep(max(started + offset - loop.time(), 0))
+            lags.append(loop.time() - started - offset)
+            tasks.append(asyncio.create_task(self.run_session(sessions[len(tasks) % len(sessions)])))
+
+        pending = set()
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=drain)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        return {
+            "elapsed_seconds": round(loop.time() - started, 2),
+            "arrivals": len(tasks),
+            "unfinished_sessions": len(pending),
+            # The generator itself falling behind shows up here, not in the chain's latencies
+            "max_arrival_lag_ms": round(1000 * max(lags), 1) if lags else None,
+        }
+
+
+def percentile(values: List[float], q: float) -> float:
+    return values[max(math.ceil(q / 100 * len(values)) - 1, 0)]
+
+
+def summarize(results: List[TurnResult], run: Dict[str, Any]) -> Dict[str, Any]:
+    ok = [r for r in results if r.ok]
+    hops = {}
+    mean_total = sum(r.total for r in ok) / len(ok) if ok else 0.0
+    for hop in HOPS:
+        values = sorted(r.hops[hop] for r in ok if hop in r.hops)
+        if not values:
+            continue
+        mean = sum(values) / len(values)
+        hops[hop] = {
+            "turns": len(values),
+            "mean_ms": round(1000 * mean, 1),
+            "p50_ms": round(1000 * percentile(values, 50), 1),
+            "p95_ms": round(1000 * percentile(values, 95), 1),
+            "p99_ms": round(1000 * percentile(values, 99), 1),
+            "share_of_total": round(mean * len(values) / len(ok) / mean_total, 3) if mean_total else None,
+        }
+    return {
+        **run,
+        "turns": len(results),
+        "failed_turns": len(results) - len(ok),
+        "turn_throughput_per_s": round(len(results) / run["elapsed_seconds"], 3) if run["elapsed_seconds"] else None,
+        "hops": hops,
+        "errors": Counter(r.error for r in results if not r.ok).most_common(5),
+    }
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    print(
+        f"\narrivals={summary['arrivals']} turns={summary['turns']} failed={summary['failed_turns']} "
+        f"unfinished_sessions={summary['unfinished_sessions']} throughput={summary['turn_throughput_per_s']}/s "
+        f"max_arrival_lag={summary['max_arrival_lag_ms']}ms\n"
+    )
+    print(f"{'hop':<14} {'turns':>6} {'mean':>10} {'p50':>10} {'p95':>10} {'p99':>10} {'share':>7}")
+    for hop, stats in summary["hops"].items():
+        share = f"{100 * stats['share_of_total']:6.1f}%" if stats["share_of_total"] is not None else "      -"
+        if hop == "first_token":
+            share = "      -"
+        print(
+            f"{hop:<14} {stats['turns']:>6} {stats['mean_ms']:>8.1f}ms {stats['p50_ms']:>8.1f}ms "
+            f"{stats['p95_ms']:>8.1f}ms {stats['p99_ms']:>8.1f}ms {share}"
+        )
+    for error, count in summary["errors"]:
+        print(f"  {count} x {error}")
+
+
+async def serve(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+            raise RuntimeError(f"Stand-in on port {port} did not start")
+        await asyncio.sleep(0.05)
+    server.task = task
+    return server
+
+
+async def main_async(args) -> int:
+    sessions = load_sessions(args.sessions)
+    if not sessions:
+        print(f"No sessions in {args.sessions}")
+        return 1
+
+    spans = SpanLog()
+    processes, servers = [], []
+    agent = gateway = None
+    try:
+        if args.agent_url:
+            agent_url = args.agent_url.rstrip("/")
+            tokens = lambda user: args.token  # noqa: E731
+        else:
+            targets = {}
+            for target, module in TARGETS.items():
+                port = bench_servers.free_port()
+                processes.append(bench_servers.start_server(module, port, args))
+                await bench_servers.wait_until_listening(port, processes[-1])
+                targets[target] = f"http://127.0.0.1:{port}"
+
+            keycloak_port = bench_servers.free_port()
+            keycloak = KeycloakStandIn(f"http://127.0.0.1:{keycloak_port}{REALM_PATH}")
+            servers.append(await serve(keycloak.app, keycloak_port))
+
+            gateway_port = bench_servers.free_port()
+            gateway = GatewayStandIn(targets, f"http://127.0.0.1:{keycloak_port}{JWKS_PATH}", keycloak.issuer, spans)
+            servers.append(await serve(gateway.app, gateway_port))
+
+            agent_port = bench_servers.free_port()
+            bedrock = LatencyModel.parse(args.bedrock_latency, args.bedrock_failures, args.seed)
+            agent = ReplayAgent(f"http://127.0.0.1:{gateway_port}", spans, bedrock)
+            servers.append(await serve(agent.app, agent_port))
+            agent_url = f"http://127.0.0.1:{agent_port}"
+
+            user_tokens: Dict[str, str] = {}
+            tokens = lambda user: user_tokens.setdefault(user, keycloak.token(user))  # noqa: E731
+
+        pipe = Pipe()
+        pipe.valves.STRANDS_AGENT_URL = agent_url
+        pipe.valves.timeout_seconds = args.timeout
+        pipe.valves.request_deadline_seconds = args.deadline
+        pipe.valves.max_connections = 1000
+        pipe.valves.max_keepalive_connections = 200
+
+        print(
+            f"Replaying {len(sessions)} recorded sessions: {args.arrival} arrivals at {args.rate}/s "
+            f"for {args.duration:.0f}s against {agent_url}"
+        )
+        generator = LoadGenerator(pipe, spans, agent, tokens, args.think_scale)
+        run = await generator.open_loop(sessions, args.rate, args.duration, args.arrival, args.drain, args.seed)
+        await pipe.on_shutdown()
+    finally:
+        for server in servers:
+            server.should_exit = True
+        await asyncio.gather(*(server.task for server in servers), return_exceptions=True)
+        if gateway is not None:
+            await gateway.close()
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+    summary = summarize(generator.results, run)
+    print_summary(summary)
+
+    if args.json_path:
+        slowest = sorted(generator.results, key=lambda r: r.total, reverse=True)[:args.slowest]
+        report = {
+            "commit": bench_servers.git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "settings": {
+                key: getattr(args, key)
+                for key in ("sessions", "rate", "duration", "arrival", "think_scale", "seed", "bedrock_latency",
+                            "bedrock_failures", "latency", "failures", "agent_url")
+            },
+            "summary": summary,
+            "slowest_turns": [
+                {
+                    "session": r.session,
+                    "turn": r.turn,
+                    "x_request_id": r.request_id,
+                    "traceparent": r.traceparent,
+                    "ok": r.ok,
+                    "hops_ms": {hop: round(1000 * s, 1) for hop, s in r.hops.items()},
+                    "spans": [{"hop": hop, "ms": round(1000 * s, 1), **detail} for hop, s, detail in r.spans],
+                }
+                for r in slowest
+            ],
+        }
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json_path}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default=os.path.join(LOADTEST_DIR, "sessions.jsonl"), help="Recorded sessions")
+    parser.add_argument("--rate", type=float, default=1.0, help="New sessions per second")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to keep starting sessions")
+    parser.add_argument("--arrival", choices=["poisson", "constant"], default="poisson", help="Arrival process")
+    parser.add_argument("--think-scale", type=float, default=1.0, help="Multiplier for recorded think times (0: none)")
+    parser.add_argument("--drain", type=float, default=180.0, help="Seconds to wait for running sessions at the end")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Pipe timeout_seconds (read timeout)")
+    parser.add_argument("--deadline", type=float, default=300.0, help="Pipe request_deadline_seconds (0: none)")
+    parser.add_argument("--bedrock-latency", default="lognormal:0.8:0.5", help="Model turn latency, DISTRIBUTION:MEAN[:SPREAD]")
+    parser.add_argument("--bedrock-failures", type=float, default=0.0, help="Model turn failure rate")
+    parser.add_argument("--latency", type=bench_servers.backend_option, action="append", default=[], metavar="BACKEND=SPEC",
+                        help="MCP server backend latency, as in bench_servers.py (repeatable)")
+    parser.add_argument("--failures", type=bench_servers.backend_option, action="append", default=[],
+                        metavar="BACKEND=RATE", help="MCP server backend failure rate (repeatable)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for arrivals and sampled latencies")
+    parser.add_argument("--agent-url", help="Replay against a deployed agent instead of the local chain")
+    parser.add_argument("--token", help="Bearer token for --agent-url")
+    parser.add_argument("--json", dest="json_path", help="Write the report to this file")
+    parser.add_argument("--slowest", type=int, default=10, help="Slowest turns to include in the JSON report")
+    parser.add_argument("--server-logs", action="store_true", help="Show MCP server output")
+    args = parser.parse_args()
+
+    if args.agent_url and not args.token:
+        parser.error("--agent-url needs --token")
+    logging.getLogger("strands_agent_pipe").setLevel(logging.WARNING)
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
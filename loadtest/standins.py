@@ -0,0 +1,519 @@
+"""
+Local stand-ins for the services around the agent chain
+
+- ``KeycloakStandIn`` mints RS256 JWTs for load-test users and serves their
+  JWKS at the Keycloak realm path.
+- ``GatewayStandIn`` plays agentgateway: it checks each request's JWT against
+  the JWKS (issuer, audience, expiry, ``admin-group`` membership, as in
+  agent-gateway/jwt-mcp-policy.yaml) and proxies the MCP SSE transport to one
+  backend per target under ``/<target>/sse``. Targets and tool names follow
+  agent-gateway.yaml, e.g. ``browser_get_weather_data``.
+- ``ReplayAgent`` serves the agent's OpenAI-compatible API. It replays the
+  tool calls recorded for a chat turn through the gateway, forwarding the
+  caller's token and trace headers, and spends a sampled Bedrock latency on
+  every model turn.
+
+Every hop records its time in a ``SpanLog`` under the request's x-request-id,
+so a turn's end-to-end latency can be split per hop.
+"""
+import asyncio
+import base64
+import json
+import logging
+import os
+import re
+import secrets
+import sys
+import time
+import uuid
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from fastmcp import Client
+from fastmcp.client.transports import SSETransport
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "shared"))
+sys.path.insert(0, os.path.join(ROOT, "mcp-server"))
+
+from fakes import LatencyModel  # noqa: E402
+
+logger = logging.getLogger("loadtest")
+
+REALM_PATH = "/realms/master"
+JWKS_PATH = f"{REALM_PATH}/protocol/openid-connect/certs"
+AUDIENCE = "mcp-client"
+REQUIRED_GROUP = "admin-group"
+# Forwarded on every hop; x-request-deadline is the caller's absolute deadline, which MCP tools enforce
+FORWARDED_HEADERS = ("traceparent", "tracestate", "x-request-id", "x-request-deadline")
+
+CITY_PATTERN = re.compile(r"\b(?:in|for|at|around|near)\s+([A-Z][\w.'-]*(?:\s+[A-Z][\w.'-]*)*(?:,?\s+[A-Z]{2})?)")
+ANSWER = ["Saturday looks ", "sunny and mild, ", "so plan the hike ", "for the morning."]
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def b64url_decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def traceparent(trace_id: Optional[str] = None) -> str:
+    """W3C traceparent for a new span of ``trace_id`` (a new trace when omitted)"""
+    return f"00-{trace_id or secrets.token_hex(16)}-{secrets.token_hex(8)}-01"
+
+
+def child_traceparent(parent: Optional[str]) -> Optional[str]:
+    parts = (parent or "").split("-")
+    return traceparent(parts[1]) if len(parts) == 4 else None
+
+
+class SpanLog:
+    """Hop timings per x-request-id"""
+
+    def __init__(self):
+        self._spans: Dict[str, List[Tuple[str, float, Dict[str, Any]]]] = defaultdict(list)
+
+    def record(self, request_id: Optional[str], hop: str, seconds: float, **detail) -> None:
+        if request_id:
+            self._spans[request_id].append((hop, seconds, detail))
+
+    def pop(self, request_id: str) -> List[Tuple[str, float, Dict[str, Any]]]:
+        return self._spans.pop(request_id, [])
+
+
+class KeycloakStandIn:
+    """Issues RS256 tokens and serves the realm's JWKS"""
+
+    def __init__(self, issuer: str, audience: str = AUDIENCE, token_lifetime_seconds: int = 3600):
+        self.issuer = issuer
+        self.audience = audience
+        self.token_lifetime_seconds = token_lifetime_seconds
+        self.kid = "loadtest"
+        self._key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.app = Starlette(routes=[Route(JWKS_PATH, self.jwks_endpoint, methods=["GET"])])
+
+    def token(self, user: str, groups: Tuple[str, ...] = (REQUIRED_GROUP,)) -> str:
+        now = int(time.time())
+        header = {"alg": "RS256", "typ": "JWT", "kid": self.kid}
+        claims = {
+            "iss": self.issuer,
+            "aud": self.audience,
+            "sub": user,
+            "preferred_username": user,
+            "groups": list(groups),
+            "iat": now,
+            "exp": now + self.token_lifetime_seconds,
+        }
+        signing_input = f"{b64url(json.dumps(header).encode())}.{b64url(json.dumps(claims).encode())}"
+        signature = self._key.sign(signing_input.encode(), padding.PKCS1v15(), hashes.SHA256())
+        return f"{signing_input}.{b64url(signature)}"
+
+    def jwks(self) -> Dict[str, Any]:
+        numbers = self._key.public_key().public_numbers()
+        return {"keys": [{
+            "kty": "RSA",
+            "kid": self.kid,
+            "use": "sig",
+            "alg": "RS256",
+            "n": b64url(numbers.n.to_bytes((numbers.n.bit_length() + 7) // 8, "big")),
+            "e": b64url(numbers.e.to_bytes((numbers.e.bit_length() + 7) // 8, "big")),
+        }]}
+
+    async def jwks_endpoint(self, request: Request):
+        return JSONResponse(self.jwks())
+
+
+class AuthError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class JwtVerifier:
+    """RS256 verification against a remote JWKS, cached like agentgateway's ``cacheDuration``"""
+
+    def __init__(self, client: httpx.AsyncClient, jwks_url: str, issuer: str, audiences: Tuple[str, ...] = (AUDIENCE,),
+                 cache_seconds: float = 300):
+        self.client = client
+        self.jwks_url = jwks_url
+        self.issuer = issuer
+        self.audiences = set(audiences)
+        self.cache_seconds = cache_seconds
+        self._keys: Dict[str, rsa.RSAPublicKey] = {}
+        self._fetched_at = 0.0
+
+    async def _key(self, kid: str) -> rsa.RSAPublicKey:
+        if kid not in self._keys or time.monotonic() - self._fetched_at > self.cache_seconds:
+            response = await self.client.get(self.jwks_url)
+            response.raise_for_status()
+            self._keys = {
+                jwk["kid"]: rsa.RSAPublicNumbers(
+                    int.from_bytes(b64url_decode(jwk["e"]), "big"), int.from_bytes(b64url_decode(jwk["n"]), "big")
+                ).public_key()
+                for jwk in response.json()["keys"]
+            }
+            self._fetched_at = time.monotonic()
+        if kid not in self._keys:
+            raise AuthError(401, f"Unknown signing key {kid!r}")
+        return self._keys[kid]
+
+    async def verify(self, authorization: Optional[str]) -> Dict[str, Any]:
+        if not authorization or not authorization.startswith("Bearer "):
+            raise AuthError(401, "Missing bearer token")
+        try:
+            header_part, claims_part, signature_part = authorization[7:].split(".")
+            header = json.loads(b64url_decode(header_part))
+            claims = json.loads(b64url_decode(claims_part))
+        except ValueError:
+            raise AuthError(401, "Malformed token")
+
+        key = await self._key(header.get("kid", ""))
+        try:
+            key.verify(b64url_decode(signature_part), f"{header_part}.{claims_part}".encode(), padding.PKCS1v15(), hashes.SHA256())
+        except Exception:
+            raise AuthError(401, "Invalid signature")
+
+        audiences = claims.get("aud") if isinstance(claims.get("aud"), list) else [claims.get("aud")]
+        if claims.get("iss") != self.issuer or not self.audiences.intersection(audiences):
+            raise AuthError(401, "Wrong issuer or audience")
+        if claims.get("exp", 0) <= time.time():
+            raise AuthError(401, "Token expired")
+        if REQUIRED_GROUP not in claims.get("groups", []):
+            raise AuthError(403, f"Not a member of {REQUIRED_GROUP}")
+        return claims
+
+
+@dataclass
+class PendingCall:
+    request_id: str
+    tool: str
+    overhead: float
+    started: float = field(default_factory=time.perf_counter)
+
+
+class GatewayStandIn:
+    """JWT-checking SSE proxy in front of the MCP servers, one target per path prefix"""
+
+    def __init__(self, targets: Dict[str, str], jwks_url: str, issuer: str, spans: SpanLog):
+        self.targets = targets
+        self.spans = spans
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, read=None),
+            limits=httpx.Limits(max_connections=1000, max_keepalive_connections=200),
+        )
+        self.verifier = JwtVerifier(self.client, jwks_url, issuer)
+        self._pending: Dict[Tuple[str, str, Any], PendingCall] = {}
+        self.app = Starlette(routes=[
+            Route("/{target}/sse", self.sse, methods=["GET"]),
+            Route("/{target}/messages/", self.messages, methods=["POST"]),
+        ])
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    def _forward_headers(self, request: Request) -> Dict[str, str]:
+        return {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+
+    async def _authorize(self, request: Request) -> Optional[Response]:
+        try:
+            await self.verifier.verify(request.headers.get("authorization"))
+        except AuthError as e:
+            return JSONResponse({"error": str(e)}, status_code=e.status)
+        return None
+
+    def _complete(self, target: str, session_id: str, data: str) -> None:
+        """Close the pending tool call a JSON-RPC response on the SSE stream answers"""
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+        if not isinstance(message, dict):
+            return
+        call = self._pending.pop((target, session_id, message.get("id")), None)
+        if call is None:
+            return
+        failed = "error" in message or bool((message.get("result") or {}).get("isError"))
+        self.spans.record(call.request_id, f"mcp.{target}", time.perf_counter() - call.started, tool=call.tool, error=failed)
+        self.spans.record(call.request_id, "gateway", call.overhead, tool=call.tool)
+
+    async def sse(self, request: Request):
+        arrived = time.perf_counter()
+        target = request.path_params["target"]
+        if target not in self.targets:
+            return JSONResponse({"error": f"Unknown target {target}"}, status_code=404)
+        denied = await self._authorize(request)
+        if denied:
+            return denied
+        self.spans.record(request.headers.get("x-request-id"), "gateway", time.perf_counter() - arrived, step="connect")
+
+        upstream = await self.client.send(
+            self.client.build_request("GET", f"{self.targets[target]}/sse", headers=self._forward_headers(request)),
+            stream=True,
+        )
+
+        async def relay():
+            session_id = None
+            event = None
+            try:
+                async for line in upstream.aiter_lines():
+                    if line.startswith("event:"):
+                        event = line[len("event:"):].strip()
+                    elif line.startswith("data:"):
+                        data = line[len("data:"):].strip()
+                        if event == "endpoint":
+                            # Message posts must come back through the gateway
+                            session_id = parse_qs(urlparse(data).query).get("session_id", [None])[0]
+                            line = f"data: /{target}{data}"
+                        elif session_id:
+                            self._complete(target, session_id, data)
+                    elif not line:
+                        event = None
+                    yield f"{line}\n"
+            finally:
+                await upstream.aclose()
+
+        return StreamingResponse(relay(), status_code=upstream.status_code, media_type="text/event-stream")
+
+    async def messages(self, request: Request):
+        arrived = time.perf_counter()
+        target = request.path_params["target"]
+        if target not in self.targets:
+            return JSONResponse({"error": f"Unknown target {target}"}, status_code=404)
+        denied = await self._authorize(request)
+        if denied:
+            return denied
+
+        body = await request.body()
+        session_id = request.query_params.get("session_id")
+        request_id = request.headers.get("x-request-id")
+        try:
+            message = json.loads(body)
+        except ValueError:
+            message = None
+        if request_id and isinstance(message, dict) and message.get("method") == "tools/call":
+            tool = (message.get("params") or {}).get("name", "")
+            self._pending[(target, session_id, message.get("id"))] = PendingCall(
+                request_id, f"{target}_{tool}", time.perf_counter() - arrived
+            )
+
+        upstream = await self.client.post(
+            f"{self.targets[target]}/messages/",
+            params=dict(request.query_params),
+            content=body,
+            headers={**self._forward_headers(request), "content-type": request.headers.get("content-type", "application/json")},
+        )
+        return Response(upstream.content, status_code=upstream.status_code, media_type=upstream.headers.get("content-type"))
+
+
+def extract_prompt(messages: List[Dict[str, Any]]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            content = message.get("content")
+            if isinstance(content, list):
+                content = "".join(part.get("text", "") for part in content if part.get("type") == "text")
+            return content or ""
+    return ""
+
+
+def default_tool_calls(prompt: str) -> List[List[Dict[str, Any]]]:
+    """The weather workflow the agent runs when a turn has no recorded tool calls"""
+    match = CITY_PATTERN.search(prompt)
+    city = match.group(1) if match else "Seattle"
+    return [
+        [
+            {"name": "memory_get_activity_preferences", "arguments": {}},
+            {"name": "browser_get_weather_data", "arguments": {"city": city}},
+        ],
+        [{"name": "code_classify_weather", "arguments": {"weather_data": "$browser_get_weather_data"}}],
+        [{"name": "memory_store_activity_plan", "arguments": {"city": city, "plan": "".join(ANSWER)}}],
+    ]
+
+
+def completion_chunk(completion_id: str, model: str, delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+class McpSessions:
+    """One MCP session per gateway target, opened on first use with the caller's headers"""
+
+    def __init__(self, gateway_url: str, headers: Dict[str, str], spans: SpanLog, request_id: str):
+        self.gateway_url = gateway_url
+        self.headers = headers
+        self.spans = spans
+        self.request_id = request_id
+        self._stack = AsyncExitStack()
+        self._clients: Dict[str, Any] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def client(self, target: str) -> Client:
+        async with self._locks[target]:
+            if target not in self._clients:
+                started = time.perf_counter()
+                transport = SSETransport(f"{self.gateway_url}/{target}/sse", headers=self.headers)
+                self._clients[target] = await self._stack.enter_async_context(Client(transport))
+                self.spans.record(self.request_id, "mcp_connect", time.perf_counter() - started, target=target)
+        return self._clients[target]
+
+    async def call(self, name: str, arguments: Dict[str, Any]) -> Tuple[str, bool]:
+        """(result text, ok) of a gateway tool such as ``browser_get_weather_data``"""
+        target, _, tool = name.partition("_")
+        client = await self.client(target)
+        started = time.perf_counter()
+        try:
+            result = await client.call_tool_mcp(tool, arguments)
+        finally:
+            self.spans.record(self.request_id, "tool_call", time.perf_counter() - started, tool=name)
+        text = "".join(getattr(item, "text", "") for item in result.content)
+        try:
+            # The servers' {"status", "content"} dicts; the first content item is the result proper
+            payload = json.loads(text)
+            return payload["content"][0]["text"], not result.isError and payload.get("status") == "success"
+        except (ValueError, KeyError, IndexError, TypeError):
+            return text, not result.isError
+
+    async def close(self) -> None:
+        await self._stack.aclose()
+
+
+class ReplayAgent:
+    """OpenAI-compatible agent API that replays recorded tool calls through the gateway.
+
+    The load generator registers each turn's tool calls under its x-request-id
+    before sending it; unregistered requests run the default weather workflow.
+    A turn is a list of batches; calls within a batch run concurrently, with
+    one model turn before every batch and one for the final answer, as the
+    Strands event loop does.
+    """
+
+    def __init__(self, gateway_url: str, spans: SpanLog, bedrock: LatencyModel):
+        self.gateway_url = gateway_url
+        self.spans = spans
+        self.bedrock = bedrock
+        self.turns: Dict[str, List[List[Dict[str, Any]]]] = {}
+        self.app = Starlette(routes=[Route("/v1/chat/completions", self.chat_completions, methods=["POST"])])
+
+    async def _model_turn(self, request_id: str) -> None:
+        started = time.perf_counter()
+        try:
+            await self.bedrock.wait_async("Bedrock")
+        finally:
+            self.spans.record(request_id, "bedrock", time.perf_counter() - started)
+
+    async def _run(self, request: Request, request_id: str, batches: List[List[Dict[str, Any]]], emit) -> None:
+        headers = {"Authorization": request.headers.get("authorization", "")}
+        for name in ("tracestate", "x-request-id", "x-request-deadline"):
+            if name in request.headers:
+                headers[name] = request.headers[name]
+        child = child_traceparent(request.headers.get("traceparent"))
+        if child:
+            headers["traceparent"] = child
+
+        sessions = McpSessions(self.gateway_url, headers, self.spans, request_id)
+        results: Dict[str, str] = {}
+        index = 0
+        try:
+            for batch in batches:
+                await self._model_turn(request_id)
+                for call in batch:
+                    await emit({"tool_calls": [{
+                        "index": index, "id": f"tooluse_{index}", "type": "function",
+                        "function": {"name": call["name"], "arguments": ""},
+                    }]})
+                    index += 1
+                batch_started = time.perf_counter()
+                outcomes = await asyncio.gather(*(
+                    sessions.call(call["name"], {
+                        key: results.get(value[1:], "") if isinstance(value, str) and value.startswith("$") else value
+                        for key, value in call.get("arguments", {}).items()
+                    })
+                    for call in batch
+                ), return_exceptions=True)
+                self.spans.record(request_id, "tools", time.perf_counter() - batch_started)
+                for outcome in outcomes:
+                    if isinstance(outcome, BaseException):
+                        raise outcome
+                for call, (text, ok) in zip(batch, outcomes):
+                    if not ok:
+                        raise RuntimeError(f"{call['name']} failed: {text[:200]}")
+                    results[call["name"]] = text
+            await self._model_turn(request_id)
+        finally:
+            await sessions.close()
+        for delta in ANSWER:
+            await emit({"content": delta})
+
+    async def chat_completions(self, request: Request):
+        started = time.perf_counter()
+        body = await request.json()
+        request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+        batches = self.turns.pop(request_id, None) or default_tool_calls(extract_prompt(body.get("messages", [])))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        model = body.get("model", "strands-weather-agent")
+
+        if not body.get("stream"):
+            deltas: List[Dict[str, Any]] = []
+
+            async def collect(delta):
+                deltas.append(delta)
+
+            try:
+                await self._run(request, request_id, batches, collect)
+                text = "".join(d.get("content", "") for d in deltas)
+            except Exception as e:
+                text = f"❌ Error: {e}"
+            finally:
+                self.spans.record(request_id, "agent", time.perf_counter() - started)
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            })
+
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def run():
+            try:
+                await self._run(request, request_id, batches, queue.put)
+                await queue.put(None)
+            except Exception as e:
+                await queue.put({"content": f"\n\n❌ Error: {e}"})
+                await queue.put(None)
+
+        async def stream():
+            task = asyncio.create_task(run())
+            recorded = False
+            try:
+                yield completion_chunk(completion_id, model, {"role": "assistant"})
+                while (delta := await queue.get()) is not None:
+                    yield completion_chunk(completion_id, model, delta)
+                # Recorded before [DONE] so the span is in place when the caller finishes reading
+                self.spans.record(request_id, "agent", time.perf_counter() - started)
+                recorded = True
+                yield completion_chunk(completion_id, model, {}, "stop")
+                yield "data: [DONE]\n\n"
+            finally:
+                task.cancel()
+                if not recorded:
+                    self.spans.record(request_id, "agent", time.perf_counter() - started)
+
+        return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
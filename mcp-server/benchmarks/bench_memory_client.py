@@ -0,0 +1,124 @@
+"""
+Benchmark per-call vs shared MemoryClient latency against a local stub endpoint
+
+Starts a local HTTP server that answers every AgentCore Memory data-plane call
+with a canned CreateEvent response, points boto3 at it through the
+service-specific endpoint variables, and times save_turn when a MemoryClient is
+built for every call (the old behaviour) versus one shared client.
+
+Usage:
+    python benchmarks/bench_memory_client.py --calls 200 --concurrency 1,8,16
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+REGION = "us-west-2"
+
+
+class StubMemoryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({
+            "event": {
+                "memoryId": "bench-memory",
+                "actorId": "user123",
+                "sessionId": "session456",
+                "eventId": "0000000000000#bench",
+                "eventTimestamp": 1700000000,
+                "payload": [],
+            }
+        }).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubMemoryHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def configure_environment(port: int) -> None:
+    endpoint = f"http://127.0.0.1:{port}"
+    os.environ["AWS_ENDPOINT_URL_BEDROCK_AGENTCORE"] = endpoint
+    os.environ["AWS_ENDPOINT_URL_BEDROCK_AGENTCORE_CONTROL"] = endpoint
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    os.environ.setdefault("AWS_REGION", REGION)
+
+
+def save_turn(client) -> None:
+    client.save_turn(
+        memory_id="bench-memory",
+        actor_id="user123",
+        session_id="session456",
+        user_input="benchmark",
+        agent_response="ok",
+    )
+
+
+def run(name: str, call, calls: int, concurrency: int) -> None:
+    latencies = []
+
+    def timed(_):
+        started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, range(calls)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:<10} conc={concurrency:<4} throughput={calls / elapsed:8.1f}/s  "
+        f"mean={statistics.mean(latencies) * 1000:7.2f}ms  p50={statistics.median(latencies) * 1000:7.2f}ms  "
+        f"p95={p95 * 1000:7.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="save_turn calls per run")
+    parser.add_argument("--concurrency", default="1,8,16", help="Comma-separated thread counts")
+    args = parser.parse_args()
+
+    server = start_stub_server()
+    configure_environment(server.server_address[1])
+
+    # Import after the endpoint variables are set so every client picks them up
+    from bedrock_agentcore.memory import MemoryClient
+    from memory_clients import create_memory_client
+
+    shared = create_memory_client(REGION)
+    save_turn(shared)  # warm up the shared client's connection pool
+
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        run("per-call", lambda: save_turn(MemoryClient(region_name=REGION)), args.calls, concurrency)
+        run("shared", lambda: save_turn(shared), args.calls, concurrency)
+        print()
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
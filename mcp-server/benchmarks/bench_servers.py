@@ -0,0 +1,371 @@
+"""
+SSE benchmark of every MCP server against stubbed AgentCore backends
+
+Each server (server.py, browser_server.py, code_server.py, memory_server.py)
+is started in its own process with the fakes from fakes.py standing in for
+BrowserClient/BrowserSession, the browser agent and chat model,
+CodeInterpreter and MemoryClient. Its tools are then called over the real SSE
+transport by N concurrent MCP clients (one session each), and throughput and
+p50/p95/p99 latency are reported per server, tool and concurrency level.
+
+Backend latency is set per backend as DISTRIBUTION:MEAN_SECONDS[:SPREAD]
+(fixed, uniform, exponential or lognormal) and failures as a rate:
+
+    python benchmarks/bench_servers.py --concurrency 1,8,32 --calls 100 \\
+        --latency browser=lognormal:0.5:0.6 --failures code=0.02 --json before.json
+
+Backends: browser (BrowserClient.start), page (CDP connect and page loads),
+llm (chat model calls and browser agent steps), code (executeCode), memory
+(save_turn / retrieve_memories). Run again on another commit with the same
+arguments and ``--compare before.json`` to print the change per row. Server
+settings (BROWSER_POOL_SIZE, TOOL_MAX_CONCURRENCY, ...) are read from the
+environment as usual.
+"""
+import argparse
+import asyncio
+import functools
+import importlib
+import itertools
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import AsyncExitStack
+from typing import Any, Callable, Dict, List, Optional
+
+MCP_SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(MCP_SERVER_DIR, "..", "shared"))
+sys.path.insert(0, MCP_SERVER_DIR)
+
+from fakes import LatencyModel, forecast_days  # noqa: E402
+
+BACKENDS = {
+    "browser": "lognormal:0.2:0.5",
+    "page": "lognormal:0.03:0.5",
+    "llm": "lognormal:0.1:0.5",
+    "code": "lognormal:0.05:0.5",
+    "memory": "lognormal:0.02:0.5",
+}
+
+FORECAST = json.dumps(forecast_days())
+
+# server module -> tool -> arguments for call i; arguments vary so caches and coalescing do not hide the backend
+SCENARIOS: Dict[str, Dict[str, Callable[[int], Dict[str, Any]]]] = {
+    "server": {
+        "get_weather_data": lambda i: {"city": f"Bench City {i}"},
+        "generate_analysis_code": lambda i: {"weather_data": FORECAST},
+        "classify_weather": lambda i: {"weather_data": FORECAST},
+        "execute_code": lambda i: {"python_code": f"print({i})"},
+        "store_user_preferences": lambda i: {"preferences": f"hiking {i}"},
+        "get_activity_preferences": lambda i: {},
+        "store_activity_plan": lambda i: {"city": f"Bench City {i}", "plan": "Hike in the morning"},
+    },
+    "browser_server": {
+        "get_weather_data": lambda i: {"city": f"Bench City {i}"},
+        "get_weather_data_batch": lambda i: {"cities": [f"Bench City {i}-{k}" for k in range(3)]},
+        "browse_url": lambda i: {"url": f"https://example.com/{i}", "task": "Summarize the page"},
+    },
+    "code_server": {
+        "execute_code": lambda i: {"python_code": f"print({i})"},
+        "classify_weather": lambda i: {"weather_data": FORECAST},
+    },
+    "memory_server": {
+        "store_user_preferences": lambda i: {"preferences": f"hiking {i}"},
+        "get_activity_preferences": lambda i: {},
+        "store_activity_plan": lambda i: {"city": f"Bench City {i}", "plan": "Hike in the morning"},
+        "store_memory": lambda i: {"key": f"key-{i}", "value": "value"},
+        "retrieve_memory": lambda i: {"query": f"key-{i}"},
+    },
+}
+
+SERVER_ENV = {
+    "BROWSER_ID": "bench-browser",
+    "CODE_INTERPRETER_ID": "bench-code-interpreter",
+    "MEMORY_ID": "bench-memory",
+}
+
+
+def backend_option(value: str):
+    backend, sep, setting = value.partition("=")
+    if not sep or backend not in BACKENDS:
+        raise argparse.ArgumentTypeError(f"Expected BACKEND=VALUE with BACKEND one of {', '.join(BACKENDS)}")
+    return backend, setting
+
+
+def latency_models(latency: List, failures: List, seed: int) -> Dict[str, LatencyModel]:
+    specs = dict(BACKENDS, **dict(latency))
+    rates = {backend: float(rate) for backend, rate in failures}
+    return {
+        backend: LatencyModel.parse(specs[backend], rates.get(backend, 0.0), seed + n)
+        for n, backend in enumerate(BACKENDS)
+    }
+
+
+def install_fakes(name: str, models: Dict[str, LatencyModel]):
+    """Import a server module with its AgentCore and Bedrock clients replaced by fakes"""
+    from code_sessions import InterpreterSessionManager
+    from fakes import (
+        FakeBrowserAgent, FakeBrowserClient, FakeBrowserSession, FakeChatModel, FakeCodeInterpreter,
+        FakeEmbedder, FakeMemoryClient,
+    )
+
+    def chat_model(*args, **kwargs):
+        return FakeChatModel(models["llm"])
+
+    browser_client = functools.partial(FakeBrowserClient, start_latency=models["browser"])
+    browser_session = functools.partial(FakeBrowserSession, page_latency=models["page"])
+    browser_agent = functools.partial(FakeBrowserAgent, latency=models["llm"])
+    interpreter = functools.partial(FakeCodeInterpreter, invoke_latency=models["code"])
+    memory_client = FakeMemoryClient(latency=models["memory"])
+
+    module = importlib.import_module(name)
+    if name == "server":
+        module.BrowserClient = browser_client
+        module.BrowserSession = browser_session
+        module.BrowserAgent = browser_agent
+        module.get_chat_model = chat_model
+        module.CodeInterpreter = interpreter
+        module.MemoryClient = lambda *args, **kwargs: memory_client
+    elif name == "browser_server":
+        import browser_pool
+        browser_pool.BrowserClient = browser_client
+        browser_pool.BrowserSession = browser_session
+        module.BrowserAgent = browser_agent
+        module.get_chat_model = chat_model
+    elif name == "code_server":
+        module.session_manager = InterpreterSessionManager(
+            module.CODE_INTERPRETER_ID, module.AWS_REGION, factory=interpreter
+        )
+    elif name == "memory_server":
+        module.memory_client = memory_client
+        module.embed_query = FakeEmbedder(models["llm"])
+    return module
+
+
+def serve(name: str, port: int, models: Dict[str, LatencyModel]) -> None:
+    module = install_fakes(name, models)
+    module.mcp.run(transport="sse", host="127.0.0.1", port=port)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(name: str, port: int, args) -> subprocess.Popen:
+    command = [sys.executable, os.path.abspath(__file__), "--serve", name, "--port", str(port), "--seed", str(args.seed)]
+    for backend, setting in args.latency:
+        command += ["--latency", f"{backend}={setting}"]
+    for backend, rate in args.failures:
+        command += ["--failures", f"{backend}={rate}"]
+    output = None if args.server_logs else subprocess.DEVNULL
+    return subprocess.Popen(
+        command, cwd=MCP_SERVER_DIR, env=dict(SERVER_ENV, **os.environ), stdout=output, stderr=output
+    )
+
+
+async def wait_until_listening(port: int, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} (rerun with --server-logs)")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"Server did not listen on port {port} within {timeout:.0f}s")
+
+
+def tool_status(result) -> str:
+    """The "status" of a tool's dict result, "error" when the call failed"""
+    if result.isError:
+        return "error"
+    text = "".join(getattr(item, "text", "") for item in result.content)
+    try:
+        return json.loads(text).get("status", "error")
+    except (ValueError, AttributeError):
+        return "error"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return float("nan")
+    return values[max(math.ceil(q / 100 * len(values)) - 1, 0)]
+
+
+async def run_level(url: str, tool: str, arguments, seq, calls: int, concurrency: int) -> Dict[str, Any]:
+    """Closed loop: ``concurrency`` clients call ``tool`` back to back until ``calls`` are done"""
+    from fastmcp import Client
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = itertools.count()
+
+    async def worker(client):
+        nonlocal errors
+        while next(remaining) < calls:
+            call_args = arguments(next(seq))
+            started = time.perf_counter()
+            try:
+                status = tool_status(await client.call_tool_mcp(tool, call_args))
+            except Exception:
+                status = "error"
+            latencies.append(time.perf_counter() - started)
+            errors += status != "success"
+
+    # Sessions are opened before the clock starts, so only tool calls are measured
+    async with AsyncExitStack() as stack:
+        clients = [await stack.enter_async_context(Client(url)) for _ in range(concurrency)]
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for client in clients))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "calls": len(latencies),
+        "errors": errors,
+        "error_rate": round(errors / len(latencies), 4) if latencies else None,
+        "seconds": round(elapsed, 3),
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 1) if latencies else None,
+        "p50_ms": round(1000 * percentile(latencies, 50), 1),
+        "p95_ms": round(1000 * percentile(latencies, 95), 1),
+        "p99_ms": round(1000 * percentile(latencies, 99), 1),
+        "max_ms": round(1000 * latencies[-1], 1) if latencies else None,
+    }
+
+
+def print_row(row: Dict[str, Any]) -> None:
+    print(
+        f"{row['server']:<15} {row['tool']:<25} conc={row['concurrency']:<4} calls={row['calls']:<5} "
+        f"throughput={row['throughput_per_s']:8.1f}/s  p50={row['p50_ms']:8.1f}ms  "
+        f"p95={row['p95_ms']:8.1f}ms  p99={row['p99_ms']:8.1f}ms  errors={row['errors']}"
+    )
+
+
+def change(before: Optional[float], after: Optional[float]) -> str:
+    if not before or after is None:
+        return "     n/a"
+    return f"{100 * (after - before) / before:+7.1f}%"
+
+
+def print_comparison(rows: List[Dict[str, Any]], baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    before = {(r["server"], r["tool"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"\nChange against {baseline_path} (commit {baseline.get('commit')})")
+    for row in rows:
+        old = before.get((row["server"], row["tool"], row["concurrency"]))
+        if old is None:
+            continue
+        print(
+            f"{row['server']:<15} {row['tool']:<25} conc={row['concurrency']:<4} "
+            f"throughput {change(old['throughput_per_s'], row['throughput_per_s'])}  "
+            f"p50 {change(old['p50_ms'], row['p50_ms'])}  p95 {change(old['p95_ms'], row['p95_ms'])}  "
+            f"p99 {change(old['p99_ms'], row['p99_ms'])}  errors {old['errors']} -> {row['errors']}"
+        )
+
+
+def git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=MCP_SERVER_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain"], cwd=MCP_SERVER_DIR, capture_output=True, text=True).stdout
+        return f"{commit}-dirty" if dirty.strip() else commit
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def benchmark(args) -> List[Dict[str, Any]]:
+    levels = [int(c) for c in args.concurrency.split(",")]
+    servers = args.servers.split(",") if args.servers else list(SCENARIOS)
+    tools = set(args.tools.split(",")) if args.tools else None
+
+    rows = []
+    for name in servers:
+        port = free_port()
+        process = start_server(name, port, args)
+        try:
+            await wait_until_listening(port, process)
+            url = f"http://127.0.0.1:{port}/sse"
+            for tool, arguments in SCENARIOS[name].items():
+                if tools and tool not in tools:
+                    continue
+                seq = itertools.count()
+                for concurrency in levels:
+                    if args.warmup:
+                        await run_level(url, tool, arguments, seq, args.warmup, min(concurrency, args.warmup))
+                    row = dict(server=name, tool=tool, **await run_level(url, tool, arguments, seq, args.calls, concurrency))
+                    print_row(row)
+                    rows.append(row)
+                print()
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servers", help=f"Comma-separated servers (default: {','.join(SCENARIOS)})")
+    parser.add_argument("--tools", help="Comma-separated tools to run (default: all)")
+    parser.add_argument("--calls", type=int, default=50, help="Timed calls per tool and concurrency level")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed calls before each level")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--latency", type=backend_option, action="append", default=[], metavar="BACKEND=SPEC",
+                        help="Backend latency, e.g. llm=lognormal:0.5:0.8 (repeatable)")
+    parser.add_argument("--failures", type=backend_option, action="append", default=[], metavar="BACKEND=RATE",
+                        help="Backend failure rate, e.g. code=0.02 (repeatable)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for sampled latencies and failures")
+    parser.add_argument("--json", dest="json_path", help="Write the report to this file")
+    parser.add_argument("--compare", help="Earlier --json report to compare against")
+    parser.add_argument("--server-logs", action="store_true", help="Show server output")
+    parser.add_argument("--serve", choices=list(SCENARIOS), help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    models = latency_models(args.latency, args.failures, args.seed)
+    if args.serve:
+        serve(args.serve, args.port, models)
+        return
+
+    for backend, model in models.items():
+        print(f"{backend:<8} {model.distribution} mean={model.mean * 1000:.0f}ms failure_rate={model.failure_rate}")
+    print()
+
+    rows = asyncio.run(benchmark(args))
+
+    if args.json_path:
+        report = {
+            "commit": git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "settings": {
+                "calls": args.calls,
+                "warmup": args.warmup,
+                "seed": args.seed,
+                "backends": {backend: model.describe() for backend, model in models.items()},
+            },
+            "results": rows,
+        }
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json_path}")
+
+    if args.compare:
+        print_comparison(rows, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Load test for the async MCP tools against stubbed AgentCore backends
+
+Calls execute_code and the memory tools in-process with fake clients that
+sleep for a fixed backend latency, and reports how throughput scales with the
+number of concurrent callers. Throughput should grow roughly linearly until
+the caller count reaches TOOL_MAX_CONCURRENCY (or CODE_INTERPRETER_MAX_SESSIONS
+for execute_code) and flatten after that.
+
+Usage:
+    python benchmarks/load_test_tools.py --latency 0.2 --calls 64 --concurrency 1,4,16,32
+"""
+import argparse
+import asyncio
+import functools
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "shared"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ.setdefault("CODE_INTERPRETER_ID", "fake-code-interpreter")
+os.environ.setdefault("MEMORY_ID", "fake-memory")
+
+import code_server  # noqa: E402
+import memory_server  # noqa: E402
+from code_sessions import InterpreterSessionManager  # noqa: E402
+from fakes import FakeCodeInterpreter, FakeMemoryClient  # noqa: E402
+
+
+def tool_fn(tool):
+    """Return the plain coroutine function behind a FastMCP tool"""
+    return getattr(tool, "fn", tool)
+
+
+def install_stubs(latency: float) -> None:
+    code_server.session_manager = InterpreterSessionManager(
+        code_server.CODE_INTERPRETER_ID,
+        code_server.AWS_REGION,
+        factory=functools.partial(FakeCodeInterpreter, invoke_latency=latency),
+    )
+    memory_server.memory_client = FakeMemoryClient(latency=latency)
+
+
+async def run_level(name: str, call, calls: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            result = await call(i)
+            latencies.append(time.perf_counter() - started)
+            if result.get("status") != "success":
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{name:<24} conc={concurrency:<4} calls={calls:<5} "
+        f"throughput={calls / elapsed:8.1f}/s  p50={statistics.median(latencies) * 1000:8.1f}ms  errors={errors}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2, help="Stubbed backend latency in seconds")
+    parser.add_argument("--calls", type=int, default=64, help="Calls per concurrency level")
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32", help="Comma-separated concurrency levels")
+    args = parser.parse_args()
+
+    install_stubs(args.latency)
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    scenarios = {
+        "execute_code": lambda i: tool_fn(code_server.execute_code)(f"print({i})"),
+        "store_memory": lambda i: tool_fn(memory_server.store_memory)(f"key-{i}", "value"),
+        "retrieve_memory": lambda i: tool_fn(memory_server.retrieve_memory)(f"key-{i}"),
+    }
+
+    print(f"backend latency={args.latency * 1000:.0f}ms")
+    for name, call in scenarios.items():
+        for concurrency in levels:
+            await run_level(name, call, args.calls, concurrency)
+        print()
+
+    code_server.session_manager.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
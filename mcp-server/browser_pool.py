@@ -0,0 +1,347 @@
+"""
+Warm pool of AgentCore Browser sessions
+
+Starting a browser (BrowserClient.start, WS header signing, CDP connect) is the
+bulk of a cold tool call, so sessions are started ahead of time, leased to tool
+calls, health-checked when they come back and recycled after a number of uses
+or a maximum age. A background task keeps the pool topped up.
+
+Sessions are shared between callers, so on release each one is reset: extra
+tabs are closed, cookies and the storage of the open sites are cleared and the
+remaining tab goes back to about:blank. A session that cannot be reset is
+retired instead of reused.
+
+Health checks and resets use the Playwright-based BrowserSession API of
+browser-use 0.4 and 0.5 (``is_connected(restart=...)``, ``browser_context``),
+which is why requirements.txt pins that range.
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from contextlib import asynccontextmanager, suppress
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+from bedrock_agentcore.tools.browser_client import BrowserClient
+from browser_use.browser.session import BrowserSession
+from browser_use.browser import BrowserProfile
+
+from metrics import SESSION_START, TEARDOWN, phase
+from profiler import stage
+
+logger = logging.getLogger("browser-mcp-server")
+
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "2"))
+BROWSER_POOL_MAX_USES = int(os.environ.get("BROWSER_POOL_MAX_USES", "10"))
+BROWSER_POOL_MAX_AGE_SECONDS = float(os.environ.get("BROWSER_POOL_MAX_AGE_SECONDS", "600"))
+BROWSER_POOL_LEASE_TIMEOUT_SECONDS = float(os.environ.get("BROWSER_POOL_LEASE_TIMEOUT_SECONDS", "60"))
+BROWSER_POOL_HEALTH_CHECK_TIMEOUT_SECONDS = 5.0
+BROWSER_POOL_RESET_TIMEOUT_SECONDS = 10.0
+BROWSER_POOL_REFILL_BACKOFF_SECONDS = 5.0
+
+
+class PooledBrowser:
+    """A started AgentCore browser and the CDP session attached to it"""
+
+    def __init__(self, client: BrowserClient, session: BrowserSession):
+        self.client = client
+        self.session = session
+        self.created_at = time.monotonic()
+        self.uses = 0
+        self.healthy = True
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+
+def site_origin(url: str) -> Optional[str]:
+    parsed = urlparse(url or "")
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        return None
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+async def reset_session(session: BrowserSession) -> None:
+    """Close all tabs but one, clear cookies and the open sites' storage, and load about:blank"""
+    context = session.browser_context
+    pages = list(context.pages)
+    origins = {site_origin(page.url) for page in pages} - {None}
+    for page in pages[1:]:
+        await page.close()
+    await context.clear_cookies()
+    if not pages:
+        return
+
+    cdp = await context.new_cdp_session(pages[0])
+    try:
+        for origin in origins:
+            await cdp.send("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+    finally:
+        with suppress(Exception):
+            await cdp.detach()
+    await pages[0].goto("about:blank")
+
+
+class BrowserSessionPool:
+    """Bounded pool of pre-started browser sessions.
+
+    A size of 0 disables pooling: every lease starts a fresh session and
+    tears it down on release, which is the original per-call behaviour.
+    """
+
+    def __init__(
+        self,
+        browser_id: Optional[str],
+        region: str,
+        size: int = BROWSER_POOL_SIZE,
+        max_uses: int = BROWSER_POOL_MAX_USES,
+        max_age_seconds: float = BROWSER_POOL_MAX_AGE_SECONDS,
+        lease_timeout_seconds: float = BROWSER_POOL_LEASE_TIMEOUT_SECONDS,
+    ):
+        self.browser_id = browser_id
+        self.region = region
+        self.size = max(size, 0)
+        self.max_uses = max_uses
+        self.max_age_seconds = max_age_seconds
+        self.lease_timeout_seconds = lease_timeout_seconds
+
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._total = 0
+        self._leased = 0
+        self._waiters = 0
+        self._refill_needed = asyncio.Event()
+        self._refill_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self._leases = 0
+        self._hits = 0
+        self._misses = 0
+        self._recycled = 0
+        self._failed_health_checks = 0
+        self._failed_resets = 0
+        self._lease_wait_total = 0.0
+        self._lease_wait_max = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def ensure_started(self) -> None:
+        """Start the background refill task (needs a running event loop)"""
+        if not self.enabled or self._closed or not self.browser_id:
+            return
+        if self._refill_task is None or self._refill_task.done():
+            # A fresh context keeps background starts out of the calling request's metrics and profile
+            self._refill_task = asyncio.get_running_loop().create_task(
+                self._refill_loop(), context=contextvars.Context()
+            )
+            self._refill_needed.set()
+
+    async def _start_session(self) -> PooledBrowser:
+        """Start an AgentCore browser and connect a browser_use session to it"""
+        client = BrowserClient(self.region)
+        starting = asyncio.ensure_future(asyncio.to_thread(client.start, identifier=self.browser_id))
+        try:
+            with stage("browser_client.start"):
+                await asyncio.shield(starting)
+        except asyncio.CancelledError:
+            # The start keeps running in its thread, so stop the browser once it is up
+            asyncio.ensure_future(self._stop_when_started(client, starting))
+            raise
+
+        try:
+            with stage("generate_ws_headers"):
+                ws_url, headers = client.generate_ws_headers()
+            browser_profile = BrowserProfile(headers=headers, timeout=150000)
+            browser_session = BrowserSession(cdp_url=ws_url, browser_profile=browser_profile, keep_alive=True)
+            with stage("browser_session.start"):
+                await browser_session.start()
+        except BaseException:
+            with suppress(Exception):
+                await asyncio.to_thread(client.stop)
+            raise
+
+        return PooledBrowser(client, browser_session)
+
+    async def _stop_when_started(self, client: BrowserClient, starting: asyncio.Future) -> None:
+        """Stop a browser whose start was cancelled (e.g. at a request deadline) after the start returns"""
+        with suppress(Exception):
+            await starting
+        with suppress(Exception):
+            await asyncio.to_thread(client.stop)
+
+    async def _retire(self, browser: PooledBrowser) -> None:
+        """Close a session and stop its remote browser"""
+        self._total -= 1
+        with stage("browser_session.close"), suppress(Exception):
+            await browser.session.close()
+        with stage("browser_client.stop"), suppress(Exception):
+            await asyncio.to_thread(browser.client.stop)
+        if self.enabled and not self._closed:
+            self._refill_needed.set()
+
+    def _expired(self, browser: PooledBrowser) -> bool:
+        return browser.uses >= self.max_uses or browser.age >= self.max_age_seconds
+
+    async def _is_healthy(self, browser: PooledBrowser) -> bool:
+        if not browser.healthy:
+            return False
+        try:
+            return bool(await asyncio.wait_for(
+                browser.session.is_connected(restart=False),
+                timeout=BROWSER_POOL_HEALTH_CHECK_TIMEOUT_SECONDS,
+            ))
+        except Exception:
+            return False
+
+    async def _reset(self, browser: PooledBrowser) -> bool:
+        """Clear what the last caller left behind; False if the session could not be reset"""
+        try:
+            await asyncio.wait_for(reset_session(browser.session), timeout=BROWSER_POOL_RESET_TIMEOUT_SECONDS)
+            return True
+        except Exception as e:
+            logger.warning(f"Browser session reset failed: {e}")
+            return False
+
+    async def _refill_loop(self) -> None:
+        while not self._closed:
+            await self._refill_needed.wait()
+            self._refill_needed.clear()
+
+            while not self._closed and self._total < self.size:
+                self._total += 1
+                try:
+                    browser = await self._start_session()
+                except Exception as e:
+                    self._total -= 1
+                    logger.warning(f"Browser pool refill failed: {e}")
+                    await asyncio.sleep(BROWSER_POOL_REFILL_BACKOFF_SECONDS)
+                    self._refill_needed.set()
+                    break
+                self._idle.put_nowait(browser)
+
+    async def acquire(self) -> PooledBrowser:
+        """Lease a session, starting one inline if the pool is empty and below size"""
+        self.ensure_started()
+        started = time.monotonic()
+        hit = True
+
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except asyncio.QueueEmpty:
+                if not self.enabled or self._total < self.size:
+                    hit = False
+                    self._total += 1
+                    try:
+                        browser = await self._start_session()
+                    except BaseException:
+                        self._total -= 1
+                        raise
+                else:
+                    self._waiters += 1
+                    try:
+                        browser = await asyncio.wait_for(self._idle.get(), timeout=self.lease_timeout_seconds)
+                    except asyncio.TimeoutError:
+                        raise TimeoutError(
+                            f"No browser session available after {self.lease_timeout_seconds:.0f}s"
+                        )
+                    finally:
+                        self._waiters -= 1
+
+            if self._expired(browser):
+                self._recycled += 1
+                await self._retire(browser)
+                continue
+            break
+
+        wait = time.monotonic() - started
+        self._leases += 1
+        self._leased += 1
+        if hit:
+            self._hits += 1
+        else:
+            self._misses += 1
+        self._lease_wait_total += wait
+        self._lease_wait_max = max(self._lease_wait_max, wait)
+        return browser
+
+    async def release(self, browser: PooledBrowser) -> None:
+        """Return a leased session; unhealthy or worn-out sessions are retired"""
+        self._leased -= 1
+        browser.uses += 1
+
+        if not self.enabled or self._closed:
+            await self._retire(browser)
+            return
+
+        if self._expired(browser):
+            self._recycled += 1
+            await self._retire(browser)
+            return
+
+        with stage("health_check"):
+            healthy = await self._is_healthy(browser)
+        if not healthy:
+            self._failed_health_checks += 1
+            await self._retire(browser)
+            return
+
+        with stage("session_reset"):
+            reset = await self._reset(browser)
+        if not reset:
+            self._failed_resets += 1
+            await self._retire(browser)
+            return
+
+        self._idle.put_nowait(browser)
+
+    @asynccontextmanager
+    async def lease(self):
+        """Lease a browser for the duration of a block.
+
+        Any exception raised inside the block marks the session unhealthy so it
+        is retired rather than handed to the next caller.
+        """
+        with phase(SESSION_START), stage("lease.acquire"):
+            browser = await self.acquire()
+        try:
+            yield browser
+        except BaseException:
+            browser.healthy = False
+            raise
+        finally:
+            with phase(TEARDOWN), stage("lease.release"):
+                await self.release(browser)
+
+    async def close(self) -> None:
+        """Stop the refill task and retire every idle session; leased sessions are retired on release"""
+        self._closed = True
+        if self._refill_task:
+            self._refill_task.cancel()
+            with suppress(asyncio.CancelledError, Exception):
+                await self._refill_task
+        while not self._idle.empty():
+            await self._retire(self._idle.get_nowait())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "size": self.size,
+            "total": self._total,
+            "idle": self._idle.qsize(),
+            "leased": self._leased,
+            "queue_depth": self._waiters,
+            "leases": self._leases,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / self._leases, 3) if self._leases else None,
+            "recycled": self._recycled,
+            "failed_health_checks": self._failed_health_checks,
+            "failed_resets": self._failed_resets,
+            "lease_wait_avg_ms": round(1000 * self._lease_wait_total / self._leases, 1) if self._leases else None,
+            "lease_wait_max_ms": round(1000 * self._lease_wait_max, 1),
+        }
@@ -2,17 +2,27 @@
 MCP Server exposing AgentCore Browser capabilities
 """
 import os
+import re
+import json
+import asyncio
 import logging
-from typing import Dict, Any
-from fastmcp import FastMCP
+from contextlib import asynccontextmanager, suppress
+from datetime import date
+from typing import Dict, Any, List
+from fastmcp import FastMCP, Context
 from starlette.responses import JSONResponse
-from contextlib import suppress
 
-from bedrock_agentcore.tools.browser_client import BrowserClient
 from browser_use import Agent as BrowserAgent
-from browser_use.browser.session import BrowserSession
-from browser_use.browser import BrowserProfile
-from langchain_aws import ChatBedrockConverse
+
+from browser_pool import BROWSER_POOL_SIZE, BrowserSessionPool
+from coalesce import coalesce, coalesce_stats
+from deadline import enforce_deadline
+from concurrency_limit import AdaptiveLimiter, LimitExceeded
+from metrics import LLM, REMOTE_EXECUTION, instrument, metrics_response, phase
+from profiler import PROFILER_ENABLED, profile_request, record_agent_run, slowest_requests, stage, track_llm_usage
+from forecast_parser import ForecastPageError, parse_forecast_html, printable_url, search_url
+from llm_clients import get_chat_model
+from result_cache import ResultCache, create_backend, is_success, normalize_city, weather_cache_key, WEATHER_CACHE_ENABLED
 
 # Langfuse observability
 from langfuse import Langfuse, observe
@@ -20,8 +30,18 @@ from langfuse import Langfuse, observe
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("browser-mcp-server")
 
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Stop the pooled browsers on shutdown; they would otherwise run until their remote session timeout"""
+    try:
+        yield {}
+    finally:
+        await browser_pool.close()
+
+
 # Initialize MCP server
-mcp = FastMCP("Browser MCP Server")
+mcp = FastMCP("Browser MCP Server", lifespan=lifespan)
 
 # Langfuse configuration
 LANGFUSE_PUBLIC_KEY = os.environ.get('LANGFUSE_PUBLIC_KEY')
@@ -39,21 +59,84 @@ if LANGFUSE_PUBLIC_KEY and LANGFUSE_SECRET_KEY:
 else:
     logger.warning("Langfuse not configured")
 
+# Get capability IDs from environment
+BROWSER_ID = os.environ.get("BROWSER_ID")
+AWS_REGION = os.environ.get("AWS_REGION", "us-west-2")
+
+# "direct" loads the printable forecast and parses it, using the LLM browser agent only as a fallback;
+# "agent" always uses the browser agent
+WEATHER_EXTRACTION_MODE = os.environ.get("WEATHER_EXTRACTION_MODE", "direct").lower()
+# Save every page the direct parser sees, to collect fixtures for forecast_parser.py
+FORECAST_HTML_SAVE_DIR = os.environ.get("FORECAST_HTML_SAVE_DIR")
+
+# Cities fetched at once by get_weather_data_batch; sessions beyond the pool size are started on demand
+WEATHER_BATCH_CONCURRENCY = int(os.environ.get("WEATHER_BATCH_CONCURRENCY", str(BROWSER_POOL_SIZE or 2)))
+WEATHER_BATCH_MAX_CITIES = int(os.environ.get("WEATHER_BATCH_MAX_CITIES", "20"))
+
+# Adaptive limit on concurrent browser runs; calls over it queue, and are shed once the queue is full
+BROWSER_CONCURRENCY_LIMIT_ENABLED = os.environ.get("BROWSER_CONCURRENCY_LIMIT_ENABLED", "true").lower() == "true"
+BROWSER_CONCURRENCY_INITIAL_LIMIT = int(os.environ.get("BROWSER_CONCURRENCY_INITIAL_LIMIT", "4"))
+BROWSER_CONCURRENCY_MIN_LIMIT = int(os.environ.get("BROWSER_CONCURRENCY_MIN_LIMIT", "1"))
+BROWSER_CONCURRENCY_MAX_LIMIT = int(os.environ.get("BROWSER_CONCURRENCY_MAX_LIMIT", "16"))
+BROWSER_CONCURRENCY_MAX_QUEUE = int(os.environ.get("BROWSER_CONCURRENCY_MAX_QUEUE", "16"))
+BROWSER_CONCURRENCY_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("BROWSER_CONCURRENCY_QUEUE_TIMEOUT_SECONDS", "30"))
+BROWSER_CONCURRENCY_LATENCY_TOLERANCE = float(os.environ.get("BROWSER_CONCURRENCY_LATENCY_TOLERANCE", "2.0"))
+
+# Warm pool of browser sessions shared by all tool calls
+browser_pool = BrowserSessionPool(BROWSER_ID, AWS_REGION)
+
+browser_limiter = AdaptiveLimiter(
+    "browser",
+    initial_limit=BROWSER_CONCURRENCY_INITIAL_LIMIT,
+    min_limit=BROWSER_CONCURRENCY_MIN_LIMIT,
+    max_limit=BROWSER_CONCURRENCY_MAX_LIMIT,
+    max_queue=BROWSER_CONCURRENCY_MAX_QUEUE,
+    queue_timeout_seconds=BROWSER_CONCURRENCY_QUEUE_TIMEOUT_SECONDS,
+    tolerance=BROWSER_CONCURRENCY_LATENCY_TOLERANCE,
+    enabled=BROWSER_CONCURRENCY_LIMIT_ENABLED,
+)
+
+# Forecasts change a few times a day, so repeat lookups are served from cache
+weather_cache = ResultCache(create_backend(), enabled=WEATHER_CACHE_ENABLED)
+
 # Health check endpoint
 @mcp.custom_route("/health", methods=["GET"])
 async def health_check(request):
-    return JSONResponse({"status": "healthy"})
+    # Probes hit this route as soon as the pod starts, so use it to warm the pool
+    browser_pool.ensure_started()
+    # Stays 200 while shedding, since this route is also the liveness probe
+    return JSONResponse({
+        "status": "overloaded" if browser_limiter.queue_full else "healthy",
+        "browser_pool": browser_pool.stats(),
+        "concurrency_limit": browser_limiter.stats(),
+        "weather_cache": weather_cache.stats(),
+        "coalescing": coalesce_stats(),
+    })
 
-# Get capability IDs from environment
-BROWSER_ID = os.environ.get("BROWSER_ID")
-AWS_REGION = os.environ.get("AWS_REGION", "us-west-2")
+
+# Slowest recent tool runs with per-stage timings, agent steps and token usage
+@mcp.custom_route("/debug/slow-requests", methods=["GET"])
+async def slow_requests(request):
+    return JSONResponse({
+        "enabled": PROFILER_ENABLED,
+        "recorded": slowest_requests.recorded,
+        "slowest": slowest_requests.snapshot(),
+    })
+
+
+# Prometheus scrape endpoint: per-tool calls, errors, latency and phase histograms
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request):
+    return metrics_response()
 
 
 @observe(name="browser_task_execution")
 async def run_browser_task(browser_session, bedrock_chat, task: str) -> str:
     """Run a browser automation task"""
     agent = BrowserAgent(task=task, llm=bedrock_chat, browser=browser_session)
-    result = await agent.run()
+    with phase(LLM), stage("browser_agent.run"), track_llm_usage() as usage:
+        result = await agent.run()
+    record_agent_run(result, usage)
     
     if 'done' in result.last_action() and 'text' in result.last_action()['done']:
         return result.last_action()['done']['text']
@@ -61,30 +144,93 @@ async def run_browser_task(browser_session, bedrock_chat, task: str) -> str:
         raise ValueError("No data returned from browser task")
 
 
-async def initialize_browser_session():
-    """Initialize Browser session with AgentCore"""
-    client = BrowserClient(AWS_REGION)
-    client.start(identifier=BROWSER_ID)
-    
-    ws_url, headers = client.generate_ws_headers()
-    browser_profile = BrowserProfile(headers=headers, timeout=150000)
-    browser_session = BrowserSession(cdp_url=ws_url, browser_profile=browser_profile, keep_alive=True)
-    
-    await browser_session.start()
-    
-    bedrock_chat = ChatBedrockConverse(
-        model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-        region_name=AWS_REGION
-    )
-    
-    return browser_session, bedrock_chat, client
+def weather_task(city: str) -> str:
+    """Natural-language instructions for the LLM browser agent"""
+    return f"""Extract 8-Day Weather Forecast for {city} from weather.gov
+    Steps:
+    - Go to https://weather.gov
+    - Search for "{city}" and click GO
+    - Click "Printable Forecast" link
+    - Extract date, high, low, conditions, wind, precip for each day
+    - Return JSON array of daily forecasts
+    """
+
+
+def save_forecast_html(city: str, html: str) -> None:
+    if not FORECAST_HTML_SAVE_DIR:
+        return
+    try:
+        os.makedirs(FORECAST_HTML_SAVE_DIR, exist_ok=True)
+        slug = re.sub(r"[^a-z0-9]+", "-", city.lower()).strip("-")
+        with open(os.path.join(FORECAST_HTML_SAVE_DIR, f"{slug}-{date.today().isoformat()}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+    except OSError as e:
+        logger.warning(f"Could not save forecast page for {city}: {e}")
+
+
+@observe(name="direct_forecast_extraction")
+async def extract_forecast_direct(browser_session, city: str) -> List[Dict[str, Any]]:
+    """Navigate straight to the printable forecast over CDP and parse it, no LLM involved"""
+    with phase(REMOTE_EXECUTION), stage("direct_extraction"):
+        page = await browser_session.get_current_page()
+        # The search endpoint redirects to the point forecast, whose URL carries lat/lon
+        await page.goto(search_url(city), wait_until="domcontentloaded")
+        url = printable_url(page.url)
+        if url is None:
+            raise ForecastPageError(f"weather.gov search for {city!r} did not resolve to a forecast ({page.url})")
+
+        await page.goto(url, wait_until="domcontentloaded")
+        html = await page.content()
+    save_forecast_html(city, html)
+    return parse_forecast_html(html)
+
+
+def shed_result(error: LimitExceeded, profile) -> Dict[str, Any]:
+    """Error result for a call rejected by the concurrency limiter, with a retry-after hint"""
+    logger.warning(f"Shedding browser call ({error.reason}): {error}")
+    if profile:
+        profile.status = "shed"
+    return {
+        "status": "error",
+        "content": [{"text": f"Error: browser capacity exhausted, retry after {error.retry_after_seconds} seconds"}],
+        "retry_after_seconds": error.retry_after_seconds,
+    }
+
+
+async def fetch_weather_data(city: str) -> Dict[str, Any]:
+    """Extract the forecast from weather.gov, parsing it directly when possible"""
+    async with profile_request("get_weather_data", city=city) as profile:
+        try:
+            async with browser_limiter.slot(), browser_pool.lease() as browser:
+                if WEATHER_EXTRACTION_MODE == "direct":
+                    try:
+                        days = await extract_forecast_direct(browser.session, city)
+                        return {"status": "success", "content": [{"text": json.dumps(days)}]}
+                    except Exception as e:
+                        logger.warning(f"Direct forecast extraction failed for {city} ({e}), using browser agent")
+
+                result = await run_browser_task(browser.session, get_chat_model(region=AWS_REGION), weather_task(city))
+
+            return {"status": "success", "content": [{"text": result}]}
+            
+        except LimitExceeded as e:
+            return shed_result(e, profile)
+        except Exception as e:
+            if profile:
+                profile.status = "error"
+            return {"status": "error", "content": [{"text": f"Error: {str(e)}"}]}
 
 
 @mcp.tool()
 @observe(name="mcp_get_weather_data")
+@instrument()
+@enforce_deadline()
+@coalesce()
 async def get_weather_data(city: str) -> Dict[str, Any]:
     """Get weather data for a city using browser automation.
     
+    Results are cached per city and forecast window.
+    
     Args:
         city: The city name to get weather data for
         
@@ -94,39 +240,96 @@ async def get_weather_data(city: str) -> Dict[str, Any]:
     if not BROWSER_ID:
         return {"status": "error", "content": [{"text": "BROWSER_ID not configured"}]}
     
-    browser_session = None
-    browser_client = None
-    
+    return await cached_weather_data(city)
+
+
+async def cached_weather_data(city: str) -> Dict[str, Any]:
+    return await weather_cache.get_or_compute(
+        weather_cache_key(city),
+        lambda: fetch_weather_data(city),
+        cacheable=is_success,
+    )
+
+
+def forecast_value(result: Dict[str, Any]) -> Any:
+    """Forecast of a successful result, decoded when it is JSON"""
+    text = "".join(item.get("text", "") for item in result.get("content", []))
     try:
-        browser_session, bedrock_chat, browser_client = await initialize_browser_session()
-        
-        task = f"""Extract 8-Day Weather Forecast for {city} from weather.gov
-        Steps:
-        - Go to https://weather.gov
-        - Search for "{city}" and click GO
-        - Click "Printable Forecast" link
-        - Extract date, high, low, conditions, wind, precip for each day
-        - Return JSON array of daily forecasts
-        """
-        
-        result = await run_browser_task(browser_session, bedrock_chat, task)
-        
-        if browser_client:
-            browser_client.stop()
+        return json.loads(text)
+    except ValueError:
+        return text
 
-        return {"status": "success", "content": [{"text": result}]}
-        
-    except Exception as e:
-        return {"status": "error", "content": [{"text": f"Error: {str(e)}"}]}
+
+@mcp.tool()
+@observe(name="mcp_get_weather_data_batch")
+@instrument()
+@enforce_deadline()
+async def get_weather_data_batch(cities: list[str], ctx: Context | None = None) -> Dict[str, Any]:
+    """Get weather data for several cities at once using browser automation.
+    
+    Cities are fetched concurrently (bounded per pod) and each result is streamed to
+    the client as a progress notification as soon as it completes. Cities that fail
+    are reported separately, so one bad city does not fail the batch.
+    
+    Args:
+        cities: The city names to get weather data for
         
-    finally:
-        if browser_session:
+    Returns:
+        Dictionary whose first content item is a JSON object mapping each city to its
+        forecast (ready for classify_weather), followed by an item listing failures
+    """
+    if not BROWSER_ID:
+        return {"status": "error", "content": [{"text": "BROWSER_ID not configured"}]}
+
+    # Spelling variants of the same city ("Richmond, VA" / "richmond va") are fetched once
+    by_key = {}
+    for city in cities:
+        if city.strip():
+            by_key.setdefault(normalize_city(city), city.strip())
+    unique = list(by_key.values())
+    if not unique:
+        return {"status": "error", "content": [{"text": "No cities given"}]}
+    if len(unique) > WEATHER_BATCH_MAX_CITIES:
+        return {"status": "error", "content": [{"text": f"At most {WEATHER_BATCH_MAX_CITIES} cities per batch"}]}
+
+    slots = asyncio.Semaphore(WEATHER_BATCH_CONCURRENCY)
+
+    async def fetch(city: str):
+        async with slots:
+            try:
+                return city, await cached_weather_data(city)
+            except asyncio.CancelledError:
+                # Only our own cancellation stops the batch; one relayed from a shared fetch fails this city
+                if asyncio.current_task().cancelling():
+                    raise
+                return city, {"status": "error", "content": [{"text": "Error: fetch was cancelled"}]}
+            except Exception as e:
+                return city, {"status": "error", "content": [{"text": f"Error: {str(e)}"}]}
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for finished in asyncio.as_completed([fetch(city) for city in unique]):
+        city, result = await finished
+        results[city] = result
+        if ctx is not None:
+            summary = "done" if is_success(result) else result["content"][0]["text"]
+            # A client that went away must not fail the rest of the batch
             with suppress(Exception):
-                await browser_session.close()
+                await ctx.report_progress(progress=len(results), total=len(unique), message=f"{city}: {summary}")
+
+    forecasts = {city: forecast_value(results[city]) for city in unique if is_success(results[city])}
+    failures = [f"{city}: {results[city]['content'][0]['text']}" for city in unique if not is_success(results[city])]
+
+    content = [{"text": json.dumps(forecasts)}]
+    if failures:
+        content.append({"text": "Failed cities:\n" + "\n".join(failures)})
+    return {"status": "success" if forecasts else "error", "content": content}
 
 
 @mcp.tool()
 @observe(name="mcp_browse_url")
+@instrument()
+@enforce_deadline()
+@coalesce()
 async def browse_url(url: str, task: str) -> Dict[str, Any]:
     """Browse a URL and perform a task using browser automation.
     
@@ -140,30 +343,23 @@ async def browse_url(url: str, task: str) -> Dict[str, Any]:
     if not BROWSER_ID:
         return {"status": "error", "content": [{"text": "BROWSER_ID not configured"}]}
     
-    browser_session = None
-    browser_client = None
-    
-    try:
-        browser_session, bedrock_chat, browser_client = await initialize_browser_session()
-        
-        full_task = f"""Navigate to {url} and perform the following task:
-        {task}
-        """
-        
-        result = await run_browser_task(browser_session, bedrock_chat, full_task)
-        
-        if browser_client:
-            browser_client.stop()
+    async with profile_request("browse_url", url=url) as profile:
+        try:
+            full_task = f"""Navigate to {url} and perform the following task:
+            {task}
+            """
+            
+            async with browser_limiter.slot(), browser_pool.lease() as browser:
+                result = await run_browser_task(browser.session, get_chat_model(region=AWS_REGION), full_task)
 
-        return {"status": "success", "content": [{"text": result}]}
-        
-    except Exception as e:
-        return {"status": "error", "content": [{"text": f"Error: {str(e)}"}]}
-        
-    finally:
-        if browser_session:
-            with suppress(Exception):
-                await browser_session.close()
+            return {"status": "success", "content": [{"text": result}]}
+            
+        except LimitExceeded as e:
+            return shed_result(e, profile)
+        except Exception as e:
+            if profile:
+                profile.status = "error"
+            return {"status": "error", "content": [{"text": f"Error: {str(e)}"}]}
 
 
 if __name__ == "__main__":
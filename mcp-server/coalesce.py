@@ -0,0 +1,142 @@
+"""
+Single-flight coalescing of concurrent identical tool calls
+
+Tools opt in with the ``@coalesce()`` decorator, placed under ``@observe`` so
+every caller still gets its own trace span. While a call is in flight, other
+calls with the same arguments wait for it and receive its result instead of
+starting their own browser session, LLM run or interpreter execution.
+Deadlines bound each caller's wait, not the shared execution.
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from deadline import request_deadline
+
+COALESCE_ENABLED = os.environ.get("COALESCE_ENABLED", "true").lower() == "true"
+
+
+class _Flight:
+    """One shared execution and the number of callers still waiting for it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one in-flight execution.
+
+    The execution runs as its own task and every caller, the first included,
+    waits on it through ``asyncio.shield``. A caller that is cancelled (a
+    deadline, a disconnect) only stops waiting; the task is cancelled once the
+    last waiter has left, so nobody else sees the cancellation.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, _Flight] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(
+        self, key: str, fn: Callable[[], Awaitable[Any]], context: Optional[contextvars.Context] = None
+    ) -> Any:
+        """Wait for the execution of ``fn`` for ``key``, starting it (in ``context``) if none is in flight"""
+        self.calls += 1
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.get_running_loop().create_task(fn(), context=context))
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "executions": self.calls - self.coalesced,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+        }
+
+
+_flights: Dict[str, SingleFlight] = {}
+
+
+def coalesce(
+    name: Optional[str] = None,
+    exclude: Iterable[str] = (),
+    generation: Optional[Callable[[], Any]] = None,
+):
+    """Share one in-flight execution between concurrent calls with identical arguments.
+
+    Tools that stream progress through their MCP Context cannot be coalesced:
+    only the first caller's client would get the notifications.
+
+    Args:
+        name: Name the metrics are reported under (defaults to the function name)
+        exclude: Parameters left out of the key
+        generation: Called on every call and made part of the key, e.g. a write
+            counter, so a call made after a write never joins a read started before it
+    """
+    excluded = set(exclude)
+
+    def decorator(fn: Callable[..., Awaitable[Any]]):
+        signature = inspect.signature(fn)
+        if "ctx" in signature.parameters:
+            raise TypeError(f"{fn.__name__} reports progress through ctx and cannot be coalesced")
+        flight = _flights.setdefault(name or fn.__name__, SingleFlight())
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not COALESCE_ENABLED:
+                return await fn(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = json.dumps(
+                {
+                    "args": {k: v for k, v in bound.arguments.items() if k not in excluded},
+                    "generation": generation() if generation else None,
+                },
+                sort_keys=True,
+                default=str,
+            )
+            return await flight.do(key, lambda: fn(*args, **kwargs), context=shared_context())
+
+        return wrapper
+
+    return decorator
+
+
+def shared_context() -> contextvars.Context:
+    """The caller's context without its deadline, for an execution other callers may share"""
+    context = contextvars.copy_context()
+    context.run(request_deadline.set, None)
+    return context
+
+
+def coalesce_stats() -> Dict[str, Any]:
+    """Per-tool call, execution and coalesced counts"""
+    return {tool: flight.stats() for tool, flight in _flights.items()}
@@ -1,15 +1,23 @@
 """
 MCP Server exposing Code Interpreter as an MCP Tool
-Only exposes execute_code - other tools remain local to the agent
+Only exposes execute_code and the local weather classifier - other tools remain local to the agent
 """
 import os
 import json
+import atexit
+import asyncio
 import logging
-from typing import Dict, Any
-from fastmcp import FastMCP
+from contextlib import suppress
+from typing import Dict, Any, Callable, Optional
+from fastmcp import FastMCP, Context
 from starlette.responses import JSONResponse
 
-from bedrock_agentcore.tools.code_interpreter_client import CodeInterpreter
+from code_sessions import InterpreterSessionManager
+from coalesce import coalesce_stats
+from deadline import enforce_deadline, stop_at_deadline
+from tool_executor import executor_stats, run_blocking
+from metrics import REMOTE_EXECUTION, instrument, metrics_response, phase
+from weather_classifier import ForecastParseError, classify_weather_data
 
 # Langfuse observability
 from langfuse import Langfuse, observe
@@ -36,47 +44,126 @@ if LANGFUSE_PUBLIC_KEY and LANGFUSE_SECRET_KEY:
 else:
     logger.warning("Langfuse not configured")
 
+# Get capability IDs from environment
+CODE_INTERPRETER_ID = os.environ.get("CODE_INTERPRETER_ID")
+AWS_REGION = os.environ.get("AWS_REGION", "us-west-2")
+
+# Forward interpreter output to the MCP client as progress notifications while code runs
+CODE_STREAM_EVENTS = os.environ.get("CODE_STREAM_EVENTS", "true").lower() == "true"
+
+# Started interpreter sessions reused across tool calls, stopped on exit
+session_manager = InterpreterSessionManager(CODE_INTERPRETER_ID, AWS_REGION)
+atexit.register(session_manager.shutdown)
+
 # Health check endpoint
 @mcp.custom_route("/health", methods=["GET"])
 async def health_check(request):
-    return JSONResponse({"status": "healthy"})
+    return JSONResponse({
+        "status": "healthy",
+        "code_interpreter_sessions": session_manager.stats(),
+        "tool_executor": executor_stats(),
+        "coalescing": coalesce_stats(),
+    })
 
-# Get capability IDs from environment
-CODE_INTERPRETER_ID = os.environ.get("CODE_INTERPRETER_ID")
-AWS_REGION = os.environ.get("AWS_REGION", "us-west-2")
+
+# Prometheus scrape endpoint: per-tool calls, errors, latency and phase histograms
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request):
+    return metrics_response()
+
+
+def result_text(result: Dict[str, Any]) -> str:
+    """Join the text items of a code interpreter result"""
+    return "".join(item.get("text", "") for item in result.get("content", []))
+
+
+def run_code(python_code: str, on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Optional[Dict[str, Any]]:
+    """Run code on a leased interpreter session (blocking).
+
+    Every stream event is passed to ``on_event`` as it arrives and merged into a
+    single result: content items are concatenated in order, the last
+    structuredContent wins and isError is set if any event reported an error.
+    """
+    aggregated: Optional[Dict[str, Any]] = None
+
+    # Stopping the session at the deadline ends the remote execution; the lease then discards it
+    with session_manager.lease() as session, phase(REMOTE_EXECUTION), stop_at_deadline(session.stop):
+        # clearContext resets interpreter state so a reused session behaves like a fresh one
+        response = session.client.invoke("executeCode", {
+            "code": python_code,
+            "language": "python",
+            "clearContext": True
+        })
+
+        for event in response["stream"]:
+            result = event.get("result")
+            if not result:
+                continue
+            if on_event:
+                on_event(result)
+
+            if aggregated is None:
+                aggregated = {"content": [], "isError": False}
+            aggregated["content"].extend(result.get("content", []))
+            aggregated["isError"] = aggregated["isError"] or bool(result.get("isError"))
+            if "structuredContent" in result:
+                aggregated["structuredContent"] = result["structuredContent"]
+
+    return aggregated
+
+
+async def run_code_streaming(python_code: str, ctx: Context) -> Optional[Dict[str, Any]]:
+    """Run code while forwarding each stream event to the client as a progress notification"""
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def forward_events():
+        progress = 0
+        while (result := await events.get()) is not None:
+            progress += 1
+            # A client that went away must not fail the execution itself
+            with suppress(Exception):
+                await ctx.report_progress(progress=progress, message=result_text(result))
+
+    forwarder = asyncio.create_task(forward_events())
+    try:
+        return await run_blocking(run_code, python_code, lambda r: loop.call_soon_threadsafe(events.put_nowait, r))
+    finally:
+        # Events are queued before the executor future completes, so the sentinel comes last
+        events.put_nowait(None)
+        await forwarder
 
 
 @mcp.tool()
 @observe(name="mcp_execute_code")
-def execute_code(python_code: str) -> Dict[str, Any]:
+@instrument()
+@enforce_deadline()
+async def execute_code(python_code: str, ctx: Context | None = None) -> Dict[str, Any]:
     """Execute Python code using AgentCore Code Interpreter.
     
+    Output is streamed to the client as progress notifications while the code runs.
+    
     Args:
         python_code: The Python code to execute
         
     Returns:
-        Dictionary with status and execution results
+        Dictionary with status and the program's output; status is error when
+        the program raised
     """
     try:
         if not CODE_INTERPRETER_ID:
             return {"status": "error", "content": [{"text": "CODE_INTERPRETER_ID not configured"}]}
             
-        code_client = CodeInterpreter(AWS_REGION)
-        code_client.start(identifier=CODE_INTERPRETER_ID)
-
-        response = code_client.invoke("executeCode", {
-            "code": python_code,
-            "language": "python",
-            "clearContext": True
-        })
-
-        code_execute_result = None
-        for event in response["stream"]:
-            code_execute_result = json.dumps(event["result"])
+        if ctx is not None and CODE_STREAM_EVENTS:
+            analysis_results = await run_code_streaming(python_code, ctx)
+        else:
+            analysis_results = await run_blocking(run_code, python_code)
         
-        if code_execute_result:
-            analysis_results = json.loads(code_execute_result)
-            return {"status": "success", "content": [{"text": str(analysis_results)}]}
+        if analysis_results:
+            # The program's output, not the repr of the whole aggregated stream
+            text = result_text(analysis_results) or json.dumps(analysis_results.get("structuredContent", {}))
+            status = "error" if analysis_results["isError"] else "success"
+            return {"status": status, "content": [{"text": text}]}
         else:
             return {"status": "error", "content": [{"text": "No result returned from code interpreter"}]}
 
@@ -84,6 +171,30 @@ def execute_code(python_code: str) -> Dict[str, Any]:
         return {"status": "error", "content": [{"text": f"Error: {str(e)}"}]}
 
 
+@mcp.tool()
+@observe(name="mcp_classify_weather")
+@instrument()
+def classify_weather(weather_data: str) -> Dict[str, Any]:
+    """Classify forecast days as GOOD/OK/POOR with the standard rules, locally.
+
+    Use this instead of generate_analysis_code + execute_code unless the user
+    asks for custom rules.
+
+    Args:
+        weather_data: Forecast JSON from get_weather_data, or a JSON object
+            mapping city names to forecasts to classify several cities at once
+
+    Returns:
+        Dictionary with status and a JSON list of [date, label] pairs
+        (or an object of such lists keyed by city)
+    """
+    try:
+        classification = classify_weather_data(weather_data)
+        return {"status": "success", "content": [{"text": json.dumps(classification)}]}
+    except ForecastParseError as e:
+        return {"status": "error", "content": [{"text": f"Could not classify forecast ({e}); use generate_analysis_code and execute_code instead"}]}
+
+
 if __name__ == "__main__":
     # Run with SSE transport for agentgateway compatibility
     mcp.run(transport="sse", host="0.0.0.0", port=8080)
@@ -0,0 +1,221 @@
+"""
+Persistent AgentCore Code Interpreter sessions
+
+Starting an interpreter session is slow and sessions that are never stopped
+keep running remotely until they time out. The manager keeps a small set of
+started sessions per pod, hands one out per call (callers reset state with
+clearContext instead of restarting), stops sessions that sit idle too long and
+stops everything on shutdown.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, suppress
+from typing import Any, Callable, Dict, List, Optional
+
+from bedrock_agentcore.tools.code_interpreter_client import CodeInterpreter
+
+from deadline import bounded_timeout
+from metrics import SESSION_START, TEARDOWN, phase
+
+logger = logging.getLogger("code-mcp-server")
+
+CODE_INTERPRETER_MAX_SESSIONS = int(os.environ.get("CODE_INTERPRETER_MAX_SESSIONS", "4"))
+CODE_INTERPRETER_IDLE_TIMEOUT_SECONDS = float(os.environ.get("CODE_INTERPRETER_IDLE_TIMEOUT_SECONDS", "300"))
+CODE_INTERPRETER_LEASE_TIMEOUT_SECONDS = float(os.environ.get("CODE_INTERPRETER_LEASE_TIMEOUT_SECONDS", "60"))
+# Stay below the default 900s remote session timeout
+CODE_INTERPRETER_MAX_AGE_SECONDS = float(os.environ.get("CODE_INTERPRETER_MAX_AGE_SECONDS", "600"))
+
+
+class InterpreterSession:
+    """A started interpreter client plus bookkeeping"""
+
+    def __init__(self, client: Any):
+        self.client = client
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+        self.healthy = True
+
+    def stop(self) -> None:
+        """Stop the remote session mid-call, e.g. from a deadline timer; it is discarded on release"""
+        self.healthy = False
+        self.client.stop()
+
+
+class InterpreterSessionManager:
+    """Thread-safe pool of started Code Interpreter sessions.
+
+    ``factory`` builds an unstarted client from a region; it defaults to the
+    real CodeInterpreter and can be swapped for ``fakes.FakeCodeInterpreter``
+    to exercise lease/reuse/eviction offline.
+    """
+
+    def __init__(
+        self,
+        identifier: Optional[str],
+        region: str,
+        max_sessions: int = CODE_INTERPRETER_MAX_SESSIONS,
+        idle_timeout_seconds: float = CODE_INTERPRETER_IDLE_TIMEOUT_SECONDS,
+        lease_timeout_seconds: float = CODE_INTERPRETER_LEASE_TIMEOUT_SECONDS,
+        max_age_seconds: float = CODE_INTERPRETER_MAX_AGE_SECONDS,
+        factory: Callable[[str], Any] = CodeInterpreter,
+    ):
+        self.identifier = identifier
+        self.region = region
+        self.max_sessions = max(max_sessions, 1)
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.lease_timeout_seconds = lease_timeout_seconds
+        self.max_age_seconds = max_age_seconds
+        self.factory = factory
+
+        self._cond = threading.Condition()
+        self._idle: List[InterpreterSession] = []
+        self._total = 0
+        self._leased = 0
+        self._closed = False
+        self._reaper: Optional[threading.Thread] = None
+        self._stop_reaper = threading.Event()
+
+        self._leases = 0
+        self._reused = 0
+        self._started = 0
+        self._evicted = 0
+
+    def _start_session(self) -> InterpreterSession:
+        client = self.factory(self.region)
+        client.start(identifier=self.identifier)
+        self._started += 1
+        return InterpreterSession(client)
+
+    def _stop_session(self, session: InterpreterSession) -> None:
+        with suppress(Exception):
+            session.client.stop()
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is None and self.idle_timeout_seconds > 0:
+            self._reaper = threading.Thread(target=self._reap_loop, name="code-interpreter-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        interval = max(self.idle_timeout_seconds / 4, 1.0)
+        while not self._stop_reaper.wait(interval):
+            self.evict_idle()
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Stop sessions idle longer than the idle timeout or older than the max age"""
+        now = time.monotonic() if now is None else now
+        with self._cond:
+            expired = [
+                s for s in self._idle
+                if now - s.last_used >= self.idle_timeout_seconds or now - s.created_at >= self.max_age_seconds
+            ]
+            self._idle = [s for s in self._idle if s not in expired]
+            self._total -= len(expired)
+            self._evicted += len(expired)
+            if expired:
+                self._cond.notify_all()
+
+        for session in expired:
+            self._stop_session(session)
+        if expired:
+            logger.info(f"Stopped {len(expired)} idle code interpreter session(s)")
+        return len(expired)
+
+    def acquire(self) -> InterpreterSession:
+        """Lease a started session, starting a new one if below max_sessions"""
+        lease_timeout = bounded_timeout(self.lease_timeout_seconds)
+        deadline = time.monotonic() + lease_timeout
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Code interpreter session manager is shut down")
+            self._ensure_reaper()
+
+            while not self._idle and self._total >= self.max_sessions:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"No code interpreter session available after {lease_timeout:.0f}s"
+                    )
+                self._cond.wait(remaining)
+
+            self._leases += 1
+            self._leased += 1
+            if self._idle:
+                # Most recently used first, so surplus sessions age out
+                self._reused += 1
+                return self._idle.pop()
+            self._total += 1
+
+        try:
+            return self._start_session()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._leased -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, session: InterpreterSession) -> None:
+        """Return a session; unhealthy or aged-out sessions are stopped instead of reused"""
+        session.uses += 1
+        session.last_used = time.monotonic()
+
+        with self._cond:
+            self._leased -= 1
+            keep = (
+                session.healthy
+                and not self._closed
+                and session.last_used - session.created_at < self.max_age_seconds
+            )
+            if keep:
+                self._idle.append(session)
+            else:
+                self._total -= 1
+            self._cond.notify()
+
+        if not keep:
+            self._stop_session(session)
+
+    @contextmanager
+    def lease(self):
+        """Lease a session for a block; an exception inside marks it unhealthy"""
+        with phase(SESSION_START):
+            session = self.acquire()
+        try:
+            yield session
+        except BaseException:
+            session.healthy = False
+            raise
+        finally:
+            with phase(TEARDOWN):
+                self.release(session)
+
+    def shutdown(self) -> None:
+        """Stop the reaper and every idle session; leased sessions stop on release"""
+        self._stop_reaper.set()
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+
+        for session in idle:
+            self._stop_session(session)
+        if idle:
+            logger.info(f"Stopped {len(idle)} code interpreter session(s) on shutdown")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "max_sessions": self.max_sessions,
+                "total": self._total,
+                "idle": len(self._idle),
+                "leased": self._leased,
+                "leases": self._leases,
+                "reused": self._reused,
+                "started": self._started,
+                "evicted_idle": self._evicted,
+            }
@@ -0,0 +1,206 @@
+"""
+Adaptive concurrency limit with load shedding
+
+Calls that need a scarce resource (a remote browser) run through an AIMD
+limiter. While calls finish within ``tolerance`` times the baseline latency
+and the limit is in use, it grows by about one per limit's worth of calls.
+When calls slow down past that, fail or time out, it is cut by ``backoff``,
+at most once per baseline latency. The baseline follows faster calls quickly
+and slower ones slowly, so it tracks the uncongested latency.
+
+Calls over the limit wait in a bounded queue. When the queue is full, or a
+call waits longer than ``queue_timeout_seconds``, it is rejected at once with
+LimitExceeded and a retry-after hint, instead of piling onto sessions that are
+already slow.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+
+from metrics import CALLS_SHED, CONCURRENCY_IN_FLIGHT, CONCURRENCY_LIMIT, CONCURRENCY_QUEUED
+
+# Samples before the limit starts to move
+WARMUP_SAMPLES = 5
+BASELINE_RISE = 0.02
+LATENCY_SMOOTHING = 0.3
+
+
+class LimitExceeded(Exception):
+    """No capacity for the call; retry after ``retry_after_seconds``"""
+
+    def __init__(self, reason: str, retry_after_seconds: int, message: str):
+        super().__init__(f"{message}; retry after {retry_after_seconds}s")
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit driven by call latency, with a bounded wait queue"""
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        max_queue: int = 16,
+        queue_timeout_seconds: float = 30.0,
+        tolerance: float = 2.0,
+        backoff: float = 0.75,
+        enabled: bool = True,
+    ):
+        self.name = name
+        self.min_limit = max(min_limit, 1)
+        self.max_limit = max(max_limit, self.min_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.max_queue = max(max_queue, 0)
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.enabled = enabled
+
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._baseline: Optional[float] = None
+        self._recent: Optional[float] = None
+        self._samples = 0
+        self._last_decrease = 0.0
+
+        self.accepted = 0
+        self.rejected: Dict[str, int] = {"queue_full": 0, "queue_timeout": 0}
+        self.increases = 0
+        self.decreases = 0
+        self._publish()
+
+    @property
+    def capacity(self) -> int:
+        return int(self.limit)
+
+    @property
+    def queue_full(self) -> bool:
+        return self.enabled and len(self._waiters) >= self.max_queue and self._in_flight >= self.capacity
+
+    def _publish(self) -> None:
+        CONCURRENCY_LIMIT.labels(self.name).set(self.limit)
+        CONCURRENCY_IN_FLIGHT.labels(self.name).set(self._in_flight)
+        CONCURRENCY_QUEUED.labels(self.name).set(len(self._waiters))
+
+    def retry_after(self) -> int:
+        """Seconds until a retry is likely to be admitted: the queue ahead drained at the current limit"""
+        latency = self._recent or self._baseline or 10.0
+        return min(max(math.ceil((len(self._waiters) + 1) * latency / max(self.limit, 1)), 1), 300)
+
+    def _reject(self, reason: str, message: str) -> LimitExceeded:
+        self.rejected[reason] += 1
+        CALLS_SHED.labels(self.name, reason).inc()
+        return LimitExceeded(reason, self.retry_after(), message)
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.capacity:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    async def _acquire(self) -> None:
+        if self._in_flight < self.capacity and not self._waiters:
+            self._in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full", f"{self.name} at capacity ({self._in_flight} running, {len(self._waiters)} queued)")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._publish()
+        try:
+            await asyncio.wait_for(waiter, timeout=self.queue_timeout_seconds)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted a slot just as the wait ended; hand it on
+                self._in_flight -= 1
+                self._wake()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject(
+                    "queue_timeout", f"{self.name} had no capacity within {self.queue_timeout_seconds:.0f}s"
+                ) from None
+            raise
+        finally:
+            self._publish()
+
+    def _observe(self, latency: float, failed: bool, saturated: bool) -> None:
+        if self._baseline is None:
+            self._baseline = self._recent = latency
+        self._recent += LATENCY_SMOOTHING * (latency - self._recent)
+        # Falls fast and rises slowly, so it tracks the uncongested latency
+        if latency < self._baseline:
+            self._baseline = (self._baseline + latency) / 2
+        else:
+            self._baseline += BASELINE_RISE * (latency - self._baseline)
+        self._samples += 1
+        if self._samples < WARMUP_SAMPLES:
+            return
+
+        now = time.monotonic()
+        if failed or latency > self.tolerance * self._baseline:
+            if now - self._last_decrease >= self._baseline:
+                self.limit = max(self.limit * self.backoff, float(self.min_limit))
+                self._last_decrease = now
+                self.decreases += 1
+        elif saturated and self.limit < self.max_limit:
+            self.limit = min(self.limit + 1 / self.limit, float(self.max_limit))
+            self.increases += 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold a concurrency slot for the block; raises LimitExceeded when shedding.
+
+        Exceptions from the block count as failures; cancelled calls free their
+        slot without a latency sample.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        await self._acquire()
+        self.accepted += 1
+        saturated = self._in_flight >= self.capacity
+        self._publish()
+        started = time.monotonic()
+        failed = True
+        try:
+            yield
+            failed = False
+        except asyncio.CancelledError:
+            failed = None
+            raise
+        finally:
+            saturated = saturated or self._in_flight >= self.capacity
+            self._in_flight -= 1
+            if failed is not None:
+                self._observe(time.monotonic() - started, failed, saturated)
+            self._wake()
+            self._publish()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "limit": round(self.limit, 2),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "max_queue": self.max_queue,
+            "queue_full": self.queue_full,
+            "retry_after_seconds": self.retry_after(),
+            "baseline_latency_ms": round(1000 * self._baseline, 1) if self._baseline is not None else None,
+            "recent_latency_ms": round(1000 * self._recent, 1) if self._recent is not None else None,
+            "accepted": self.accepted,
+            "rejected": dict(self.rejected),
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
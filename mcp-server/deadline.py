@@ -0,0 +1,75 @@
+"""
+Request deadlines for MCP tool calls
+
+Callers send the time by which they need an answer in the ``X-Request-Deadline``
+header, as a Unix timestamp in seconds. MCP clients set headers once per SSE
+connection, and each tool call's POST carries them, so the deadline is absolute
+rather than a remaining budget.
+
+``@enforce_deadline()`` applies it to a tool call. A call whose deadline has
+already passed returns an error without doing any work. A call still running
+at the deadline is cancelled, which releases its browser session through the
+pool lease. Blocking work that cannot be cancelled reads the deadline from a
+context variable: interpreter executions stop their session with
+``stop_at_deadline`` and queued executor jobs are skipped. Header parsing and
+those helpers are shared with the agent in ``request_deadline``.
+"""
+import asyncio
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from fastmcp.server.dependencies import get_http_headers
+
+from metrics import DEADLINE_EXCEEDED, current_tool
+from request_deadline import (  # noqa: F401 - re-exported for the tools
+    DEADLINE_HEADER,
+    DeadlineExceeded,
+    bounded_timeout,
+    check_deadline,
+    parse_deadline,
+    remaining_seconds,
+    request_deadline,
+    stop_at_deadline,
+)
+
+
+def deadline_result(message: str) -> Dict[str, Any]:
+    DEADLINE_EXCEEDED.labels(current_tool.get()).inc()
+    return {"status": "error", "content": [{"text": f"Error: {message}"}]}
+
+
+def enforce_deadline():
+    """Bound an async tool call by the caller's X-Request-Deadline.
+
+    Place it under ``@instrument()`` so calls stopped at the deadline are
+    counted as errors; calls without the header run unbounded.
+    """
+
+    def decorator(fn: Callable[..., Awaitable[Any]]):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            deadline = parse_deadline(get_http_headers().get(DEADLINE_HEADER))
+            if deadline is None:
+                return await fn(*args, **kwargs)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return deadline_result(f"Deadline passed {-remaining:.1f}s before the call started")
+
+            token = request_deadline.set(deadline)
+            try:
+                return await asyncio.wait_for(fn(*args, **kwargs), timeout=remaining)
+            except asyncio.TimeoutError:
+                if time.monotonic() < deadline:
+                    # Raised by the tool itself, e.g. a lease timeout
+                    raise
+                return deadline_result(f"Deadline exceeded after {remaining:.1f}s; the call was cancelled")
+            except DeadlineExceeded as e:
+                return deadline_result(str(e))
+            finally:
+                request_deadline.reset(token)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,456 @@
+"""
+Offline stand-ins for AgentCore clients
+
+These mimic the small surface of the bedrock_agentcore clients that the MCP
+servers use, so pooling and session logic can be exercised without AWS.
+Latencies are either fixed seconds or a LatencyModel, which also injects
+failures at a given rate.
+"""
+import asyncio
+import hashlib
+import itertools
+import json
+import math
+import random
+import time
+import uuid
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Union
+
+from forecast_parser import MONTHS, WEEKDAYS
+
+
+class FakeBackendError(RuntimeError):
+    """Failure injected by a LatencyModel"""
+
+
+class LatencyModel:
+    """Random backend latency with an optional failure rate.
+
+    ``distribution`` is one of fixed, uniform (mean +/- spread * mean),
+    exponential or lognormal (sigma = spread, scaled to keep the mean)::
+
+        LatencyModel.parse("lognormal:0.2:0.5", failure_rate=0.01)
+    """
+
+    DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+    def __init__(
+        self,
+        mean: float = 0.0,
+        distribution: str = "fixed",
+        spread: float = 0.5,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {distribution!r}, expected one of {self.DISTRIBUTIONS}")
+        self.mean = max(mean, 0.0)
+        self.distribution = distribution
+        self.spread = max(spread, 0.0)
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+    @classmethod
+    def parse(cls, spec: str, failure_rate: float = 0.0, seed: Optional[int] = None) -> "LatencyModel":
+        """Model from ``DISTRIBUTION:MEAN_SECONDS[:SPREAD]``, or a bare number of seconds"""
+        parts = spec.split(":")
+        try:
+            if len(parts) == 1:
+                return cls(float(parts[0]), failure_rate=failure_rate, seed=seed)
+            spread = float(parts[2]) if len(parts) > 2 else 0.5
+            return cls(float(parts[1]), parts[0], spread, failure_rate, seed)
+        except (IndexError, ValueError) as e:
+            raise ValueError(f"Invalid latency spec {spec!r}: {e}")
+
+    def sample(self) -> float:
+        if self.mean == 0 or self.distribution == "fixed":
+            return self.mean
+        if self.distribution == "uniform":
+            return max(self._random.uniform(self.mean * (1 - self.spread), self.mean * (1 + self.spread)), 0.0)
+        if self.distribution == "exponential":
+            return self._random.expovariate(1 / self.mean)
+        return self._random.lognormvariate(math.log(self.mean) - self.spread ** 2 / 2, self.spread)
+
+    def _check(self, what: str) -> None:
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise FakeBackendError(f"Injected {what} failure")
+
+    def wait(self, what: str = "backend") -> None:
+        """Sleep for one sample, then fail at the configured rate"""
+        time.sleep(self.sample())
+        self._check(what)
+
+    async def wait_async(self, what: str = "backend") -> None:
+        await asyncio.sleep(self.sample())
+        self._check(what)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "distribution": self.distribution,
+            "mean_seconds": self.mean,
+            "spread": self.spread,
+            "failure_rate": self.failure_rate,
+        }
+
+
+Latency = Union[float, LatencyModel]
+
+
+def latency_model(latency: Latency) -> LatencyModel:
+    return latency if isinstance(latency, LatencyModel) else LatencyModel(latency)
+
+
+class FakeCodeInterpreter:
+    """Stand-in for bedrock_agentcore CodeInterpreter.
+
+    Records every started and stopped session on the class so callers can
+    assert on reuse and eviction, e.g.::
+
+        manager = InterpreterSessionManager("ci-id", "us-west-2", factory=FakeCodeInterpreter)
+        with manager.lease() as session:
+            session.client.invoke("executeCode", {"code": "print(1)", "clearContext": True})
+    """
+
+    started: Dict[str, "FakeCodeInterpreter"] = {}
+    stopped: Dict[str, "FakeCodeInterpreter"] = {}
+    _counter = itertools.count(1)
+
+    def __init__(self, region: str, start_latency: Latency = 0.0, invoke_latency: Latency = 0.0):
+        self.region = region
+        self.start_latency = latency_model(start_latency)
+        self.invoke_latency = latency_model(invoke_latency)
+        self.identifier: Optional[str] = None
+        self.session_id: Optional[str] = None
+        self.invocations = 0
+        self.context: Dict[str, Any] = {}
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.started = {}
+        cls.stopped = {}
+
+    def start(self, identifier: Optional[str] = None, **kwargs) -> str:
+        self.start_latency.wait("code interpreter start")
+        self.identifier = identifier
+        self.session_id = f"fake-ci-{next(self._counter)}-{uuid.uuid4().hex[:6]}"
+        FakeCodeInterpreter.started[self.session_id] = self
+        return self.session_id
+
+    def stop(self) -> bool:
+        if self.session_id:
+            FakeCodeInterpreter.stopped[self.session_id] = self
+        self.session_id = None
+        return True
+
+    def invoke(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if not self.session_id:
+            raise RuntimeError("Code interpreter session not started")
+        params = params or {}
+        self.invoke_latency.wait(method)
+        self.invocations += 1
+
+        if params.get("clearContext"):
+            self.context = {}
+        self.context["last_code"] = params.get("code", "")
+
+        return {
+            "stream": [
+                {
+                    "result": {
+                        "content": [{"type": "text", "text": f"ran {method} on {self.session_id}"}],
+                        "structuredContent": {"stdout": "", "stderr": "", "exitCode": 0},
+                        "isError": False,
+                    }
+                }
+            ]
+        }
+
+
+class FakeMemoryClient:
+    """Stand-in for bedrock_agentcore MemoryClient backed by an in-process list"""
+
+    events: list = []
+
+    def __init__(self, region_name: Optional[str] = None, latency: Latency = 0.0, **kwargs):
+        self.region_name = region_name
+        self.latency = latency_model(latency)
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.events = []
+
+    def save_turn(self, memory_id: str, actor_id: str, session_id: str, user_input: str, agent_response: str) -> Dict[str, Any]:
+        self.latency.wait("save_turn")
+        event = {
+            "memoryId": memory_id,
+            "actorId": actor_id,
+            "sessionId": session_id,
+            "eventId": uuid.uuid4().hex,
+            "payload": [{"USER": user_input}, {"ASSISTANT": agent_response}],
+        }
+        FakeMemoryClient.events.append(event)
+        return event
+
+    def retrieve_memories(self, memory_id: str, query: str, max_results: int = 5, **kwargs) -> list:
+        self.latency.wait("retrieve_memories")
+        words = query.lower().split()
+        matches = []
+        for e in reversed(FakeMemoryClient.events):
+            text = f"{e['payload'][0]['USER']}: {e['payload'][1]['ASSISTANT']}"
+            if e["memoryId"] == memory_id and any(w in text.lower() for w in words):
+                matches.append({"content": {"text": text}})
+        return matches[:max_results]
+
+
+class FakeEmbedder:
+    """Stand-in for read_cache.BedrockEmbedder: a deterministic 16-dimension hash embedding"""
+
+    def __init__(self, latency: Latency = 0.0):
+        self.latency = latency_model(latency)
+
+    def __call__(self, text: str) -> List[float]:
+        self.latency.wait("embedding")
+        digest = hashlib.sha256(text.lower().encode()).digest()
+        return [b / 255 for b in digest[:16]]
+
+
+def forecast_days(days: int = 7, today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """A plausible daily forecast in the shape the browser tools return"""
+    today = today or date.today()
+    return [
+        {
+            "date": (today + timedelta(days=i)).isoformat(),
+            "high": 62 + (i * 7) % 25,
+            "low": 48 + (i * 5) % 15,
+            "conditions": ("Sunny", "Partly Cloudy", "Chance Showers")[i % 3],
+            "wind": "South wind 5 to 9 mph.",
+            "precip": (0, 20, 60)[i % 3],
+        }
+        for i in range(days)
+    ]
+
+
+def forecast_page_html(days: int = 7, today: Optional[date] = None) -> str:
+    """A weather.gov printable forecast page that forecast_parser can read"""
+    today = today or date.today()
+    rows = [f"<b>Last Update:</b> 5:00 am EDT {MONTHS[today.month - 1].capitalize()} {today.day}, {today.year}<br><hr>"]
+    for i, day in enumerate(forecast_days(days, today)):
+        weekday = WEEKDAYS[date.fromisoformat(day["date"]).weekday()].capitalize()
+        label, night_label = ("Today", "Tonight") if i == 0 else (weekday, f"{weekday} Night")
+        rows.append(
+            f"<b>{label}</b>: {day['conditions']}, with a high near {day['high']}. {day['wind']} "
+            f"Chance of precipitation is {day['precip']}%.<br><br>"
+        )
+        rows.append(f"<b>{night_label}</b>: Mostly clear, with a low around {day['low']}.<br><br>")
+    return f"<html><body><table><tr><td>{''.join(rows)}</td></tr></table></body></html>"
+
+
+class FakePage:
+    """Stand-in for the browser_use page used by direct forecast extraction.
+
+    A weather.gov search lands on a MapClick URL with lat/lon; any other URL
+    serves a printable forecast.
+    """
+
+    def __init__(self, latency: Latency = 0.0, context: Optional["FakeBrowserContext"] = None):
+        self.latency = latency_model(latency)
+        self.context = context
+        self.url = "about:blank"
+        self._html = "<html></html>"
+
+    async def goto(self, url: str, **kwargs) -> None:
+        if url == "about:blank":
+            self.url, self._html = url, "<html></html>"
+            return
+        await self.latency.wait_async("page load")
+        if "zipcity.php" in url:
+            self.url = "https://forecast.weather.gov/MapClick.php?lat=37.5407&lon=-77.436"
+            self._html = "<html><body>Point forecast</body></html>"
+        else:
+            self.url = url
+            self._html = forecast_page_html()
+
+    async def content(self) -> str:
+        return self._html
+
+    async def close(self) -> None:
+        if self.context and self in self.context.pages:
+            self.context.pages.remove(self)
+
+
+class FakeCDPSession:
+    """CDP session of a FakeBrowserContext; Storage.clearDataForOrigin forgets the origin's storage"""
+
+    def __init__(self, context: "FakeBrowserContext"):
+        self.context = context
+
+    async def send(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if method == "Storage.clearDataForOrigin":
+            self.context.storage.pop(params["origin"], None)
+        return {}
+
+    async def detach(self) -> None:
+        pass
+
+
+class FakeBrowserContext:
+    """The parts of a Playwright BrowserContext the browser pool uses to reset sessions.
+
+    Tests dirty a session through ``cookies`` and ``storage`` (origin -> data)
+    and by opening pages with ``new_page``.
+    """
+
+    def __init__(self, page_latency: Latency = 0.0):
+        self.page_latency = page_latency
+        self.pages: List[FakePage] = []
+        self.cookies: List[Dict[str, Any]] = []
+        self.storage: Dict[str, Dict[str, Any]] = {}
+
+    async def new_page(self) -> FakePage:
+        page = FakePage(self.page_latency, context=self)
+        self.pages.append(page)
+        return page
+
+    async def clear_cookies(self) -> None:
+        self.cookies = []
+
+    async def new_cdp_session(self, page: FakePage) -> FakeCDPSession:
+        return FakeCDPSession(self)
+
+
+class FakeBrowserClient:
+    """Stand-in for bedrock_agentcore BrowserClient"""
+
+    _counter = itertools.count(1)
+
+    def __init__(self, region: str, start_latency: Latency = 0.0):
+        self.region = region
+        self.start_latency = latency_model(start_latency)
+        self.session_id: Optional[str] = None
+
+    def start(self, identifier: Optional[str] = None, **kwargs) -> str:
+        self.start_latency.wait("browser start")
+        self.session_id = f"fake-browser-{next(self._counter)}"
+        return self.session_id
+
+    def generate_ws_headers(self):
+        if not self.session_id:
+            raise RuntimeError("Browser session not started")
+        return f"wss://fake-browser.local/{self.session_id}", {"Authorization": "fake"}
+
+    def stop(self) -> bool:
+        self.session_id = None
+        return True
+
+
+class FakeBrowserSession:
+    """Stand-in for browser_use BrowserSession connected over CDP.
+
+    Models the Playwright-based API of browser-use 0.4 and 0.5, the versions
+    requirements.txt allows: async ``is_connected(restart=...)`` and a
+    ``browser_context`` with pages, cookies and CDP sessions.
+    """
+
+    def __init__(self, cdp_url: Optional[str] = None, page_latency: Latency = 0.0, **kwargs):
+        self.cdp_url = cdp_url
+        self.page_latency = latency_model(page_latency)
+        self.connected = False
+        self.browser_context = FakeBrowserContext(self.page_latency)
+
+    async def start(self) -> None:
+        await self.page_latency.wait_async("CDP connect")
+        self.connected = True
+
+    async def close(self) -> None:
+        self.connected = False
+
+    async def is_connected(self, restart: bool = True) -> bool:
+        return self.connected
+
+    async def get_current_page(self) -> FakePage:
+        if not self.connected:
+            raise RuntimeError("Browser session not started")
+        if not self.browser_context.pages:
+            await self.browser_context.new_page()
+        return self.browser_context.pages[-1]
+
+
+class FakeAgentHistory:
+    """The parts of browser_use's AgentHistoryList the servers read"""
+
+    def __init__(self, text: str, steps: int):
+        self.text = text
+        self.steps = steps
+        self.history: list = []
+
+    def last_action(self) -> Dict[str, Any]:
+        return {"done": {"text": self.text}}
+
+    def number_of_steps(self) -> int:
+        return self.steps
+
+    def total_input_tokens(self) -> int:
+        return 0
+
+
+class FakeBrowserAgent:
+    """Stand-in for browser_use Agent: one sampled latency per step, then a forecast"""
+
+    def __init__(self, task: str, llm: Any = None, browser: Any = None, latency: Latency = 0.0, steps: int = 3, **kwargs):
+        self.task = task
+        self.browser = browser
+        self.latency = latency_model(latency)
+        self.steps = steps
+
+    async def run(self) -> FakeAgentHistory:
+        for _ in range(self.steps):
+            await self.latency.wait_async("browser agent step")
+        return FakeAgentHistory(json.dumps(forecast_days()), self.steps)
+
+
+class FakeChatReply:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class FakeChatModel:
+    """Stand-in for the Bedrock chat model: replies with a classify(days) function"""
+
+    REPLY = """```python
+def classify(days):
+    results = []
+    for day in days:
+        high = float(str(day.get("high", 0)).rstrip("°F"))
+        label = "GOOD" if 65 <= high <= 80 else "OK" if 55 <= high <= 85 else "POOR"
+        results.append((day.get("date"), label))
+    return results
+```"""
+
+    def __init__(self, latency: Latency = 0.0):
+        self.latency = latency_model(latency)
+
+    def invoke(self, prompt: Any) -> FakeChatReply:
+        self.latency.wait("model invocation")
+        return FakeChatReply(self.REPLY)
+
+
+class FakeRedis:
+    """In-memory stand-in for a redis.asyncio client (get/set with ex=)"""
+
+    def __init__(self):
+        self.store: Dict[str, Any] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self.store.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.store[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ex: Optional[int] = None) -> bool:
+        self.store[key] = (value, time.monotonic() + ex if ex else None)
+        return True
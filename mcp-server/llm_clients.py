@@ -0,0 +1,64 @@
+"""
+Process-wide registry of Bedrock chat clients
+
+ChatBedrockConverse and the boto3 client underneath it are expensive to build
+(credential resolution, endpoint setup, TLS handshakes), so they are built
+lazily once per (model id, region) and shared by every tool call. boto3 clients
+are thread-safe and the chat model holds no per-call state, so a shared
+instance can be used from concurrent asyncio tasks and executor threads.
+"""
+import os
+import threading
+from typing import Dict, Tuple
+
+import boto3
+from botocore.config import Config
+from langchain_aws import ChatBedrockConverse
+
+DEFAULT_MODEL_ID = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+BEDROCK_MAX_POOL_CONNECTIONS = int(os.environ.get("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+
+_lock = threading.Lock()
+_session = None
+_runtime_clients: Dict[str, object] = {}
+_chat_models: Dict[Tuple[str, str], ChatBedrockConverse] = {}
+
+
+def _bedrock_runtime_client(region: str):
+    """Return the shared bedrock-runtime client for a region (caller holds the lock)"""
+    global _session
+
+    client = _runtime_clients.get(region)
+    if client is None:
+        if _session is None:
+            _session = boto3.session.Session()
+        client = _session.client(
+            "bedrock-runtime",
+            region_name=region,
+            config=Config(
+                max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+                tcp_keepalive=True,
+                retries={"mode": "adaptive", "max_attempts": 4},
+            ),
+        )
+        _runtime_clients[region] = client
+    return client
+
+
+def get_chat_model(model_id: str = DEFAULT_MODEL_ID, region: str = "us-west-2") -> ChatBedrockConverse:
+    """Get the shared ChatBedrockConverse for a model and region, building it on first use"""
+    key = (model_id, region)
+    model = _chat_models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _chat_models.get(key)
+        if model is None:
+            model = ChatBedrockConverse(
+                model_id=model_id,
+                region_name=region,
+                client=_bedrock_runtime_client(region),
+            )
+            _chat_models[key] = model
+    return model
@@ -0,0 +1,53 @@
+"""
+Process-wide AgentCore MemoryClient
+
+Constructing a MemoryClient builds fresh boto3 clients, which means credential
+resolution and new TLS connections on the next call. One client per region is
+built at startup and shared by every tool; boto3 clients are thread-safe, so
+it can be used from all tool executor threads at once.
+"""
+import os
+import threading
+from typing import Dict
+
+import boto3
+from botocore.config import Config
+from bedrock_agentcore.memory import MemoryClient
+
+# Keep at least one connection per tool executor thread
+MEMORY_MAX_POOL_CONNECTIONS = int(
+    os.environ.get("MEMORY_MAX_POOL_CONNECTIONS", os.environ.get("TOOL_MAX_CONCURRENCY", "16"))
+)
+
+_lock = threading.Lock()
+_clients: Dict[str, MemoryClient] = {}
+
+
+def create_memory_client(region: str, max_pool_connections: int = MEMORY_MAX_POOL_CONNECTIONS) -> MemoryClient:
+    """Build a MemoryClient whose data-plane client has a pool sized for concurrent tools"""
+    client = MemoryClient(region_name=region)
+    # save_turn and retrieve_memories go to the data plane; its default pool holds 10 connections.
+    # The pool is fixed when a boto3 client is built, so rebuild it from the SDK's own client,
+    # keeping its endpoint and Config (the SDK user agent) and adding the pool settings.
+    sdk_client = client.gmdp_client.meta
+    client.gmdp_client = boto3.client(
+        sdk_client.service_model.service_name,
+        region_name=sdk_client.region_name,
+        endpoint_url=sdk_client.endpoint_url,
+        config=sdk_client.config.merge(Config(max_pool_connections=max_pool_connections, tcp_keepalive=True)),
+    )
+    return client
+
+
+def get_memory_client(region: str = "us-west-2") -> MemoryClient:
+    """Get the shared MemoryClient for a region, building it on first use"""
+    client = _clients.get(region)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(region)
+        if client is None:
+            client = create_memory_client(region)
+            _clients[region] = client
+    return client
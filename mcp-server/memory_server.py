@@ -2,12 +2,19 @@
 MCP Server exposing AgentCore Memory capabilities
 """
 import os
+import atexit
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from fastmcp import FastMCP
 from starlette.responses import JSONResponse
 
-from bedrock_agentcore.memory import MemoryClient
+from coalesce import coalesce, coalesce_stats
+from deadline import enforce_deadline
+from memory_clients import get_memory_client
+from metrics import LLM, REMOTE_EXECUTION, instrument, metrics_response, phase
+from read_cache import BedrockEmbedder, create_read_cache
+from tool_executor import executor_stats, run_blocking
+from write_behind import PendingWrite, WriteBehindQueue, MEMORY_WRITE_BEHIND
 
 # Langfuse observability
 from langfuse import Langfuse, observe
@@ -34,19 +41,126 @@ if LANGFUSE_PUBLIC_KEY and LANGFUSE_SECRET_KEY:
 else:
     logger.warning("Langfuse not configured")
 
+# Get capability IDs from environment
+MEMORY_ID = os.environ.get("MEMORY_ID")
+AWS_REGION = os.environ.get("AWS_REGION", "us-west-2")
+ACTOR_ID = "user123"
+SESSION_ID = "session456"
+
+# Shared client built at startup and reused by every tool
+memory_client = get_memory_client(AWS_REGION) if MEMORY_ID else None
+
+# Per-actor cache of retrievals, invalidated by every write for that actor
+read_cache = create_read_cache()
+embed_query = BedrockEmbedder(AWS_REGION)
+
+
+def save_turn(user_input: str, agent_response: str) -> None:
+    """Save a conversation turn to AgentCore Memory (blocking)"""
+    with phase(REMOTE_EXECUTION):
+        memory_client.save_turn(
+            memory_id=MEMORY_ID,
+            actor_id=ACTOR_ID,
+            session_id=SESSION_ID,
+            user_input=user_input,
+            agent_response=agent_response
+        )
+    read_cache.invalidate(MEMORY_ID, ACTOR_ID)
+
+
+def retrieve_memories(query: str, max_results: int = 5):
+    """Retrieve memories matching a query from AgentCore Memory (blocking)"""
+    with phase(REMOTE_EXECUTION):
+        return memory_client.retrieve_memories(
+            memory_id=MEMORY_ID,
+            query=query,
+            max_results=max_results
+        )
+
+
+def embed(query: str):
+    with phase(LLM):
+        return embed_query(query)
+
+
+async def cached_retrieve(query: str):
+    """Retrieve memories through the read cache (exact match, then embedding similarity)"""
+    response = read_cache.get(MEMORY_ID, ACTOR_ID, query)
+    if response is not None:
+        return response
+
+    embedding = None
+    if read_cache.similarity_enabled:
+        embedding = await run_blocking(embed, query)
+        response = read_cache.get_similar(MEMORY_ID, ACTOR_ID, embedding)
+        if response is not None:
+            return response
+
+    read_cache.record_miss()
+    generation = read_cache.generation(MEMORY_ID, ACTOR_ID)
+    response = await run_blocking(retrieve_memories, query)
+    read_cache.put(MEMORY_ID, ACTOR_ID, query, response, generation, embedding)
+    return response
+
+
+def read_generation() -> int:
+    """Write generation of the actor's memory; reads only coalesce with reads started since the last write"""
+    return read_cache.generation(MEMORY_ID, ACTOR_ID)
+
+
+def save_pending(write: PendingWrite) -> None:
+    save_turn(write.user_input, write.agent_response)
+
+
+# Optional write-behind queue: store tools return as soon as the write is queued
+write_behind = WriteBehindQueue(save_pending) if MEMORY_ID and MEMORY_WRITE_BEHIND else None
+if write_behind:
+    atexit.register(write_behind.shutdown)
+
+
+async def store_turn(kind: str, user_input: str, agent_response: str) -> None:
+    """Save a turn, through the write-behind queue when enabled.
+
+    A full queue falls back to a synchronous write rather than losing the turn.
+    """
+    if write_behind and write_behind.submit(PendingWrite(kind, ACTOR_ID, user_input, agent_response)):
+        # Pending writes are overlaid on reads; save_turn invalidates again once flushed
+        read_cache.invalidate(MEMORY_ID, ACTOR_ID)
+        return
+    await run_blocking(save_turn, user_input, agent_response)
+
+
+def with_pending(response, kind: Optional[str] = None) -> list:
+    """Put writes still waiting in the write-behind queue ahead of retrieved records"""
+    records = list(response or [])
+    if write_behind:
+        records = [w.as_record() for w in write_behind.pending(ACTOR_ID, kind)] + records
+    return records
+
+
 # Health check endpoint
 @mcp.custom_route("/health", methods=["GET"])
 async def health_check(request):
-    return JSONResponse({"status": "healthy"})
+    return JSONResponse({
+        "status": "healthy",
+        "tool_executor": executor_stats(),
+        "coalescing": coalesce_stats(),
+        "write_behind": write_behind.stats() if write_behind else {"enabled": False},
+        "read_cache": read_cache.stats(),
+    })
 
-# Get capability IDs from environment
-MEMORY_ID = os.environ.get("MEMORY_ID")
-AWS_REGION = os.environ.get("AWS_REGION", "us-west-2")
+
+# Prometheus scrape endpoint: per-tool calls, errors, latency and phase histograms
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request):
+    return metrics_response()
 
 
 @mcp.tool()
 @observe(name="mcp_store_user_preferences")
-def store_user_preferences(preferences: str) -> Dict[str, Any]:
+@instrument()
+@enforce_deadline()
+async def store_user_preferences(preferences: str) -> Dict[str, Any]:
     """Store user activity preferences in memory.
     
     Args:
@@ -59,14 +173,7 @@ def store_user_preferences(preferences: str) -> Dict[str, Any]:
         return {"status": "success", "content": [{"text": "Memory not configured. Preferences not stored."}]}
     
     try:
-        client = MemoryClient(region_name=AWS_REGION)
-        client.save_turn(
-            memory_id=MEMORY_ID,
-            actor_id="user123",
-            session_id="session456",
-            user_input=f"My preferences: {preferences}",
-            agent_response="Preferences saved"
-        )
+        await store_turn("preferences", f"My preferences: {preferences}", "Preferences saved")
         return {"status": "success", "content": [{"text": f"Preferences stored: {preferences}"}]}
     except Exception as e:
         return {"status": "error", "content": [{"text": f"Error storing preferences: {str(e)}"}]}
@@ -74,7 +181,10 @@ def store_user_preferences(preferences: str) -> Dict[str, Any]:
 
 @mcp.tool()
 @observe(name="mcp_get_activity_preferences")
-def get_activity_preferences() -> Dict[str, Any]:
+@instrument()
+@enforce_deadline()
+@coalesce(generation=read_generation)
+async def get_activity_preferences() -> Dict[str, Any]:
     """Get user activity preferences from memory.
     
     Returns:
@@ -84,11 +194,9 @@ def get_activity_preferences() -> Dict[str, Any]:
         return {"status": "success", "content": [{"text": "Memory not configured. Default: outdoor activities, hiking, beaches, museums."}]}
     
     try:
-        client = MemoryClient(region_name=AWS_REGION)
-        response = client.retrieve_memories(
-            memory_id=MEMORY_ID,
-            query="What are the user's activity preferences and interests?",
-            max_results=5
+        response = with_pending(
+            await cached_retrieve("What are the user's activity preferences and interests?"),
+            kind="preferences",
         )
         
         if response and len(response) > 0:
@@ -102,7 +210,9 @@ def get_activity_preferences() -> Dict[str, Any]:
 
 @mcp.tool()
 @observe(name="mcp_store_activity_plan")
-def store_activity_plan(city: str, plan: str) -> Dict[str, Any]:
+@instrument()
+@enforce_deadline()
+async def store_activity_plan(city: str, plan: str) -> Dict[str, Any]:
     """Store the activity plan in memory for future reference.
     
     Args:
@@ -116,14 +226,7 @@ def store_activity_plan(city: str, plan: str) -> Dict[str, Any]:
         return {"status": "success", "content": [{"text": "Memory not configured. Plan not stored."}]}
     
     try:
-        client = MemoryClient(region_name=AWS_REGION)
-        client.save_turn(
-            memory_id=MEMORY_ID,
-            actor_id="user123",
-            session_id="session456",
-            user_input=f"Plan for {city}",
-            agent_response=plan
-        )
+        await store_turn("plan", f"Plan for {city}", plan)
         return {"status": "success", "content": [{"text": f"Activity plan stored in memory for {city}"}]}
     except Exception as e:
         return {"status": "error", "content": [{"text": f"Error storing plan: {str(e)}"}]}
@@ -131,7 +234,9 @@ def store_activity_plan(city: str, plan: str) -> Dict[str, Any]:
 
 @mcp.tool()
 @observe(name="mcp_store_memory")
-def store_memory(key: str, value: str) -> Dict[str, Any]:
+@instrument()
+@enforce_deadline()
+async def store_memory(key: str, value: str) -> Dict[str, Any]:
     """Store a key-value pair in memory.
     
     Args:
@@ -145,14 +250,7 @@ def store_memory(key: str, value: str) -> Dict[str, Any]:
         return {"status": "success", "content": [{"text": "Memory not configured."}]}
     
     try:
-        client = MemoryClient(region_name=AWS_REGION)
-        client.save_turn(
-            memory_id=MEMORY_ID,
-            actor_id="user123",
-            session_id="session456",
-            user_input=key,
-            agent_response=value
-        )
+        await store_turn("memory", key, value)
         return {"status": "success", "content": [{"text": f"Stored: {key}"}]}
     except Exception as e:
         return {"status": "error", "content": [{"text": f"Error: {str(e)}"}]}
@@ -160,7 +258,10 @@ def store_memory(key: str, value: str) -> Dict[str, Any]:
 
 @mcp.tool()
 @observe(name="mcp_retrieve_memory")
-def retrieve_memory(query: str) -> Dict[str, Any]:
+@instrument()
+@enforce_deadline()
+@coalesce(generation=read_generation)
+async def retrieve_memory(query: str) -> Dict[str, Any]:
     """Retrieve memories matching a query.
     
     Args:
@@ -173,12 +274,7 @@ def retrieve_memory(query: str) -> Dict[str, Any]:
         return {"status": "success", "content": [{"text": "Memory not configured."}]}
     
     try:
-        client = MemoryClient(region_name=AWS_REGION)
-        response = client.retrieve_memories(
-            memory_id=MEMORY_ID,
-            query=query,
-            max_results=5
-        )
+        response = with_pending(await cached_retrieve(query))
         
         if response and len(response) > 0:
             memories = "\n".join([str(item) for item in response])
@@ -0,0 +1,112 @@
+"""
+Prometheus metrics for MCP tools
+
+``@instrument()`` counts calls and errors and times each tool call;
+``phase(name)`` times a stage inside one (session start, LLM, remote
+execution, teardown) and is labelled with the tool that is running, which a
+context variable carries across awaits and into tool_executor threads. Work
+done outside a tool call, such as write-behind flushes, is labelled
+"background". Each server exports them on ``/metrics`` via metrics_response().
+"""
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.responses import Response
+
+SESSION_START = "session_start"
+LLM = "llm"
+REMOTE_EXECUTION = "remote_execution"
+TEARDOWN = "teardown"
+
+# Browser tools run for tens of seconds, memory calls for tens of milliseconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120, 300)
+
+TOOL_CALLS = Counter("mcp_tool_calls_total", "MCP tool calls", ["tool", "status"])
+TOOL_DURATION = Histogram("mcp_tool_duration_seconds", "MCP tool call latency", ["tool"], buckets=LATENCY_BUCKETS)
+TOOL_IN_FLIGHT = Gauge("mcp_tool_in_flight", "MCP tool calls in progress", ["tool"])
+PHASE_DURATION = Histogram(
+    "mcp_tool_phase_duration_seconds", "Latency of a phase within an MCP tool call", ["tool", "phase"],
+    buckets=LATENCY_BUCKETS,
+)
+PHASE_ERRORS = Counter("mcp_tool_phase_errors_total", "Phases that raised", ["tool", "phase"])
+DEADLINE_EXCEEDED = Counter(
+    "mcp_tool_deadline_exceeded_total", "Tool calls stopped or skipped because the caller's deadline passed", ["tool"]
+)
+CONCURRENCY_LIMIT = Gauge("mcp_concurrency_limit", "Current adaptive concurrency limit", ["limiter"])
+CONCURRENCY_IN_FLIGHT = Gauge("mcp_concurrency_in_flight", "Calls holding a concurrency slot", ["limiter"])
+CONCURRENCY_QUEUED = Gauge("mcp_concurrency_queued", "Calls waiting for a concurrency slot", ["limiter"])
+CALLS_SHED = Counter("mcp_calls_shed_total", "Calls rejected by a concurrency limiter", ["limiter", "reason"])
+
+current_tool: ContextVar[str] = ContextVar("current_tool", default="background")
+
+
+def is_error_result(result: Any) -> bool:
+    return isinstance(result, dict) and result.get("status") == "error"
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a phase of the current tool call"""
+    tool = current_tool.get()
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        PHASE_ERRORS.labels(tool, name).inc()
+        raise
+    finally:
+        PHASE_DURATION.labels(tool, name).observe(time.perf_counter() - started)
+
+
+@contextmanager
+def _tool_call(tool: str) -> Iterator[dict]:
+    token = current_tool.set(tool)
+    in_flight = TOOL_IN_FLIGHT.labels(tool)
+    in_flight.inc()
+    outcome = {"status": "error"}
+    started = time.perf_counter()
+    try:
+        yield outcome
+    finally:
+        TOOL_DURATION.labels(tool).observe(time.perf_counter() - started)
+        TOOL_CALLS.labels(tool, outcome["status"]).inc()
+        in_flight.dec()
+        current_tool.reset(token)
+
+
+def instrument(name: Optional[str] = None) -> Callable:
+    """Record calls, errors and latency of a tool (sync or async).
+
+    A call counts as an error when it raises or returns {"status": "error"}.
+    """
+    def decorator(fn: Callable) -> Callable:
+        tool = name or fn.__name__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with _tool_call(tool) as outcome:
+                    result = await fn(*args, **kwargs)
+                    outcome["status"] = "error" if is_error_result(result) else "success"
+                    return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _tool_call(tool) as outcome:
+                result = fn(*args, **kwargs)
+                outcome["status"] = "error" if is_error_result(result) else "success"
+                return result
+        return wrapper
+
+    return decorator
+
+
+def metrics_response() -> Response:
+    """Prometheus text exposition of this process's metrics"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,179 @@
+"""
+Per-request phase profiler for browser tools
+
+``profile_request()`` opens a profile for one tool run, and ``stage(name)``
+appends the wall time of a stage to it (BrowserClient.start,
+generate_ws_headers, BrowserSession.start, the browser agent run, close...).
+Browser agent runs also record their step count, per-step durations and LLM
+token usage. Finished profiles go into a rolling log that keeps the slowest N
+requests of the last window, served as JSON from a debug route.
+
+Stages outside an open profile (the pool's background refills) are ignored,
+so warm-pool starts do not show up in request profiles.
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager, suppress
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from langchain_core.callbacks import get_usage_metadata_callback
+except ImportError:  # langchain-core < 0.3.49
+    get_usage_metadata_callback = None
+
+PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "true").lower() == "true"
+PROFILER_SLOWEST_N = int(os.environ.get("PROFILER_SLOWEST_N", "20"))
+PROFILER_WINDOW_SECONDS = float(os.environ.get("PROFILER_WINDOW_SECONDS", "3600"))
+
+
+class RequestProfile:
+    """Stage timings and agent usage of one tool run"""
+
+    def __init__(self, tool: str, detail: Dict[str, Any]):
+        self.id = uuid.uuid4().hex[:12]
+        self.tool = tool
+        self.detail = detail
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+        self.status = "success"
+        self.total_seconds: Optional[float] = None
+        self.agent_steps: Optional[int] = None
+        self.step_seconds: List[float] = []
+        self.input_tokens: Optional[int] = None
+        self.output_tokens: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.total_seconds is not None
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            if not self.finished:
+                self.stages.append((name, seconds))
+
+    def finish(self) -> None:
+        self.total_seconds = time.perf_counter() - self._started
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = list(self.stages)
+        accounted = sum(seconds for _, seconds in stages)
+        return {
+            "id": self.id,
+            "tool": self.tool,
+            "detail": self.detail,
+            "started_at": self.started_at,
+            "status": self.status,
+            "total_ms": round((self.total_seconds or 0) * 1000, 1),
+            "stages": [{"name": name, "ms": round(seconds * 1000, 1)} for name, seconds in stages],
+            # Stages can nest (a lease may start a session), so this is a rough remainder
+            "unaccounted_ms": round(max((self.total_seconds or 0) - accounted, 0) * 1000, 1),
+            "agent_steps": self.agent_steps,
+            "step_ms": [round(s * 1000, 1) for s in self.step_seconds],
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+class SlowestRequests:
+    """The slowest N finished profiles of the last ``window_seconds``"""
+
+    def __init__(self, size: int = PROFILER_SLOWEST_N, window_seconds: float = PROFILER_WINDOW_SECONDS):
+        self.size = max(size, 1)
+        self.window_seconds = window_seconds
+        self._heap: List[Tuple[float, int, RequestProfile]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.window_seconds
+        if any(p.started_at < cutoff for _, _, p in self._heap):
+            self._heap = [entry for entry in self._heap if entry[2].started_at >= cutoff]
+            heapq.heapify(self._heap)
+
+    def record(self, profile: RequestProfile) -> None:
+        entry = (profile.total_seconds or 0.0, next(self._seq), profile)
+        with self._lock:
+            self.recorded += 1
+            self._prune()
+            if len(self._heap) < self.size:
+                heapq.heappush(self._heap, entry)
+            elif entry[0] > self._heap[0][0]:
+                heapq.heapreplace(self._heap, entry)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._prune()
+            entries = sorted(self._heap, key=lambda e: e[0], reverse=True)
+        return [profile.as_dict() for _, _, profile in entries]
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+slowest_requests = SlowestRequests()
+
+
+@asynccontextmanager
+async def profile_request(tool: str, **detail):
+    """Profile the enclosed tool run; yields the profile (None when disabled)"""
+    if not PROFILER_ENABLED:
+        yield None
+        return
+    profile = RequestProfile(tool, detail)
+    token = current_profile.set(profile)
+    try:
+        yield profile
+    except BaseException:
+        profile.status = "error"
+        raise
+    finally:
+        profile.finish()
+        current_profile.reset(token)
+        slowest_requests.record(profile)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a stage of the current profile, if any"""
+    profile = current_profile.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.add_stage(name, time.perf_counter() - started)
+
+
+@contextmanager
+def track_llm_usage() -> Iterator[Optional[Any]]:
+    """Collect LangChain token usage for the block when langchain-core supports it"""
+    if get_usage_metadata_callback is None or current_profile.get() is None:
+        yield None
+        return
+    with get_usage_metadata_callback() as usage:
+        yield usage
+
+
+def record_agent_run(history: Any, usage: Optional[Any] = None) -> None:
+    """Attach browser_use run statistics and token usage to the current profile"""
+    profile = current_profile.get()
+    if profile is None:
+        return
+    with suppress(Exception):
+        profile.agent_steps = history.number_of_steps()
+    with suppress(Exception):
+        profile.step_seconds = [h.metadata.duration_seconds for h in history.history if h.metadata]
+    if usage is not None and usage.usage_metadata:
+        profile.input_tokens = sum(u.get("input_tokens", 0) for u in usage.usage_metadata.values())
+        profile.output_tokens = sum(u.get("output_tokens", 0) for u in usage.usage_metadata.values())
+    else:
+        # browser_use's own count covers input tokens only
+        with suppress(Exception):
+            profile.input_tokens = history.total_input_tokens()
@@ -0,0 +1,201 @@
+"""
+Read cache for AgentCore Memory retrievals
+
+Results are cached per (memory_id, actor_id) scope with a TTL and a global LRU
+bound. Lookups match the normalized query exactly; with a similarity threshold
+configured, a miss falls back to comparing query embeddings against the cached
+queries in the same scope. Any write for a scope invalidates it, and a
+generation counter keeps a retrieval that raced with a write from caching
+stale records.
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+
+MEMORY_READ_CACHE_ENABLED = os.environ.get("MEMORY_READ_CACHE_ENABLED", "true").lower() == "true"
+MEMORY_READ_CACHE_TTL_SECONDS = float(os.environ.get("MEMORY_READ_CACHE_TTL_SECONDS", "300"))
+MEMORY_READ_CACHE_MAX_ENTRIES = int(os.environ.get("MEMORY_READ_CACHE_MAX_ENTRIES", "512"))
+# Unset disables the embedding lookup; 0.95 is a reasonable starting point
+MEMORY_READ_CACHE_SIMILARITY_THRESHOLD = os.environ.get("MEMORY_READ_CACHE_SIMILARITY_THRESHOLD")
+MEMORY_READ_CACHE_EMBEDDING_MODEL_ID = os.environ.get(
+    "MEMORY_READ_CACHE_EMBEDDING_MODEL_ID", "amazon.titan-embed-text-v2:0"
+)
+
+Scope = Tuple[str, str]
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def cosine_similarity(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class BedrockEmbedder:
+    """Embeds queries with a Bedrock text embedding model (blocking)"""
+
+    def __init__(self, region: str, model_id: str = MEMORY_READ_CACHE_EMBEDDING_MODEL_ID):
+        self.region = region
+        self.model_id = model_id
+        self._client = None
+
+    def __call__(self, text: str) -> List[float]:
+        if self._client is None:
+            self._client = boto3.client("bedrock-runtime", region_name=self.region)
+        response = self._client.invoke_model(
+            modelId=self.model_id,
+            body=json.dumps({"inputText": text, "normalize": True}),
+        )
+        return json.loads(response["body"].read())["embedding"]
+
+
+class CacheEntry:
+    def __init__(self, records: Any, expires_at: float, embedding: Optional[List[float]]):
+        self.records = records
+        self.expires_at = expires_at
+        self.embedding = embedding
+
+
+class MemoryReadCache:
+    """Thread-safe TTL + LRU cache of retrieve_memories results"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = MEMORY_READ_CACHE_TTL_SECONDS,
+        max_entries: int = MEMORY_READ_CACHE_MAX_ENTRIES,
+        similarity_threshold: Optional[float] = None,
+        enabled: bool = True,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, str], CacheEntry]" = OrderedDict()
+        self._generations: Dict[Scope, int] = {}
+
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @property
+    def similarity_enabled(self) -> bool:
+        return self.enabled and self.similarity_threshold is not None
+
+    def generation(self, memory_id: str, actor_id: str) -> int:
+        """Current write generation of a scope; pass it back to put()"""
+        with self._lock:
+            return self._generations.get((memory_id, actor_id), 0)
+
+    def _live(self, key: Tuple[str, str, str], now: float) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, memory_id: str, actor_id: str, query: str) -> Optional[Any]:
+        """Exact-match lookup on the normalized query"""
+        if not self.enabled:
+            return None
+        key = (memory_id, actor_id, normalize_query(query))
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.records
+
+    def get_similar(self, memory_id: str, actor_id: str, embedding: List[float]) -> Optional[Any]:
+        """Best cached result in the scope whose query embedding clears the threshold"""
+        if not self.similarity_enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            best_key, best_score = None, self.similarity_threshold
+            for key in list(self._entries):
+                if key[:2] != (memory_id, actor_id):
+                    continue
+                entry = self._live(key, now)
+                if entry is None or entry.embedding is None:
+                    continue
+                score = cosine_similarity(embedding, entry.embedding)
+                if score >= best_score:
+                    best_key, best_score = key, score
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            self.similar_hits += 1
+            return self._entries[best_key].records
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def put(
+        self,
+        memory_id: str,
+        actor_id: str,
+        query: str,
+        records: Any,
+        generation: int,
+        embedding: Optional[List[float]] = None,
+    ) -> None:
+        """Cache records unless the scope was written since ``generation`` was read"""
+        if not self.enabled:
+            return
+        key = (memory_id, actor_id, normalize_query(query))
+        with self._lock:
+            if self._generations.get((memory_id, actor_id), 0) != generation:
+                return
+            self._entries[key] = CacheEntry(records, time.monotonic() + self.ttl_seconds, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, memory_id: str, actor_id: str) -> None:
+        """Drop every cached result for a scope after a write"""
+        scope = (memory_id, actor_id)
+        with self._lock:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+            for key in [k for k in self._entries if k[:2] == scope]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.similar_hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.similar_hits) / lookups, 3) if lookups else None,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+
+def create_read_cache() -> MemoryReadCache:
+    threshold = MEMORY_READ_CACHE_SIMILARITY_THRESHOLD
+    return MemoryReadCache(
+        similarity_threshold=float(threshold) if threshold else None,
+        enabled=MEMORY_READ_CACHE_ENABLED,
+    )
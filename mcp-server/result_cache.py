@@ -0,0 +1,190 @@
+"""
+TTL result cache for expensive tool calls
+
+Backends are pluggable: an in-process LRU for a single pod, or any
+Redis-compatible server (WEATHER_CACHE_URL=redis://...) shared by the fleet.
+Concurrent misses for the same key are collapsed into one computation.
+"""
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from coalesce import SingleFlight, shared_context
+
+logger = logging.getLogger("result-cache")
+
+WEATHER_CACHE_ENABLED = os.environ.get("WEATHER_CACHE_ENABLED", "true").lower() == "true"
+WEATHER_CACHE_URL = os.environ.get("WEATHER_CACHE_URL")
+WEATHER_CACHE_TTL_SECONDS = int(os.environ.get("WEATHER_CACHE_TTL_SECONDS", "10800"))
+WEATHER_CACHE_MAX_ENTRIES = int(os.environ.get("WEATHER_CACHE_MAX_ENTRIES", "1024"))
+# weather.gov forecasts are reissued a few times a day; keys roll over with each window
+WEATHER_CACHE_WINDOW_HOURS = int(os.environ.get("WEATHER_CACHE_WINDOW_HOURS", "6"))
+
+
+class CacheBackend:
+    """Minimal async key/value interface shared by all backends"""
+
+    name = "base"
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class InProcessBackend(CacheBackend):
+    """LRU dictionary with per-entry expiry, bounded to max_entries"""
+
+    name = "in-process"
+
+    def __init__(self, max_entries: int = WEATHER_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "entries": len(self._entries), "evictions": self.evictions}
+
+
+class RedisBackend(CacheBackend):
+    """Backend for any client exposing async get(key) and set(key, value, ex=ttl).
+
+    The server's own maxmemory-policy (e.g. allkeys-lru) bounds memory.
+    """
+
+    name = "redis"
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("WEATHER_CACHE_URL requires the 'redis' package") from e
+        return cls(redis.from_url(url, decode_responses=True))
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.client.get(key)
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value
+
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        await self.client.set(key, value, ex=ttl_seconds)
+
+
+class ResultCache:
+    """JSON-serialising TTL cache with single-flight misses"""
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int = WEATHER_CACHE_TTL_SECONDS, enabled: bool = True):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.single_flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """Return the cached value for key, computing and storing it on a miss.
+
+        Backend failures are logged and treated as misses so the cache can never
+        take the tool down.
+        """
+        if not self.enabled:
+            return await compute()
+
+        try:
+            cached = await self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache get failed for {key}: {e}")
+            cached = None
+
+        if cached is not None:
+            self.hits += 1
+            return json.loads(cached)
+
+        self.misses += 1
+
+        async def compute_and_store():
+            value = await compute()
+            if cacheable(value):
+                try:
+                    await self.backend.set(key, json.dumps(value), self.ttl_seconds)
+                except Exception as e:
+                    self.errors += 1
+                    logger.warning(f"Cache set failed for {key}: {e}")
+            return value
+
+        return await self.single_flight.do(key, compute_and_store, context=shared_context())
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "coalesced": self.single_flight.coalesced,
+            "errors": self.errors,
+            **self.backend.stats(),
+        }
+
+
+def create_backend(url: Optional[str] = WEATHER_CACHE_URL) -> CacheBackend:
+    """Redis backend when a URL is configured, in-process LRU otherwise"""
+    if url:
+        return RedisBackend.from_url(url)
+    return InProcessBackend()
+
+
+def normalize_city(city: str) -> str:
+    """Canonical cache form of a city name: 'Richmond, VA ' -> 'richmond va'"""
+    return " ".join(re.sub(r"[^\w\s]", " ", city.lower()).split())
+
+
+def weather_cache_key(city: str, now: Optional[datetime] = None) -> str:
+    """Cache key for a city's forecast within the current forecast window"""
+    now = now or datetime.now(timezone.utc)
+    window = now.hour // WEATHER_CACHE_WINDOW_HOURS
+    return f"weather:{normalize_city(city)}:{now:%Y-%m-%d}:{window}"
+
+
+def is_success(result: Any) -> bool:
+    return isinstance(result, dict) and result.get("status") == "success"
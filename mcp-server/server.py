@@ -1,6 +1,6 @@
 """
 MCP Server exposing Agent Core capabilities as MCP Tools
-Exposes the same 6 tools from the original Strands agent
+Exposes the tools from the original Strands agent plus a local weather classifier
 """
 import os
 import json
@@ -13,10 +13,13 @@ from bedrock_agentcore.tools.browser_client import BrowserClient
 from browser_use import Agent as BrowserAgent
 from browser_use.browser.session import BrowserSession
 from browser_use.browser import BrowserProfile
-from langchain_aws import ChatBedrockConverse
 from bedrock_agentcore.tools.code_interpreter_client import CodeInterpreter
 from bedrock_agentcore.memory import MemoryClient
 
+from analysis_code_cache import ANALYSIS_CODE_CACHE_ENABLED, CLASSIFICATION_RULES, AnalysisCodeCache, extract_code
+from llm_clients import get_chat_model
+from weather_classifier import ForecastParseError, classify_weather_data, parse_forecast
+
 # Initialize MCP server
 mcp = FastMCP("Agent Core Tools")
 
@@ -26,6 +29,9 @@ BROWSER_ID = os.environ.get("BROWSER_ID")
 CODE_INTERPRETER_ID = os.environ.get("CODE_INTERPRETER_ID")
 AWS_REGION = os.environ.get("AWS_REGION", "us-west-2")
 
+# Classifier code generated once per forecast schema and reused
+analysis_code_cache = AnalysisCodeCache()
+
 
 async def run_browser_task(browser_session, bedrock_chat, task: str) -> str:
     """Run a browser automation task"""
@@ -49,10 +55,7 @@ async def initialize_browser_session():
     
     await browser_session.start()
     
-    bedrock_chat = ChatBedrockConverse(
-        model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-        region_name=AWS_REGION
-    )
+    bedrock_chat = get_chat_model(region=AWS_REGION)
     
     return browser_session, bedrock_chat, client
 
@@ -95,32 +98,52 @@ def generate_analysis_code(weather_data: str) -> Dict[str, Any]:
     """Generate Python code for weather classification"""
     try:
         # Use Claude to generate classification code
-        from langchain_aws import ChatBedrockConverse
-        
-        llm = ChatBedrockConverse(
-            model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-            region_name=AWS_REGION
-        )
+        llm = get_chat_model(region=AWS_REGION)
+
+        if ANALYSIS_CODE_CACHE_ENABLED:
+            try:
+                days = parse_forecast(weather_data)
+            except ForecastParseError:
+                days = None
+            if days:
+                python_code = analysis_code_cache.program_for(days, lambda prompt: llm.invoke(prompt).content)
+                return {"status": "success", "content": [{"text": python_code}]}
         
         query = f"""Create Python code to classify weather days as GOOD/OK/POOR:
-        Rules: GOOD: 65-80°F clear, OK: 55-85°F partly cloudy, POOR: <55°F or >85°F
+        Rules: {CLASSIFICATION_RULES}
         Weather data: {weather_data}
         Return code that outputs list of tuples: [('2025-09-16', 'GOOD'), ...]"""
         
         result = llm.invoke(query)
-        python_code = result.content
-        
-        # Extract code from markdown
-        import re
-        pattern = r'```(?:json|python)\n(.*?)\n```'
-        match = re.search(pattern, python_code, re.DOTALL)
-        python_code = match.group(1).strip() if match else python_code
+        python_code = extract_code(result.content)
         
         return {"status": "success", "content": [{"text": python_code}]}
     except Exception as e:
         return {"status": "error", "content": [{"text": f"Error: {str(e)}"}]}
 
 
+@mcp.tool()
+def classify_weather(weather_data: str) -> Dict[str, Any]:
+    """Classify forecast days as GOOD/OK/POOR with the standard rules, locally.
+
+    Use this instead of generate_analysis_code + execute_code unless the user
+    asks for custom rules.
+
+    Args:
+        weather_data: Forecast JSON from get_weather_data, or a JSON object
+            mapping city names to forecasts to classify several cities at once
+
+    Returns:
+        Dictionary with status and a JSON list of [date, label] pairs
+        (or an object of such lists keyed by city)
+    """
+    try:
+        classification = classify_weather_data(weather_data)
+        return {"status": "success", "content": [{"text": json.dumps(classification)}]}
+    except ForecastParseError as e:
+        return {"status": "error", "content": [{"text": f"Could not classify forecast ({e}); use generate_analysis_code and execute_code instead"}]}
+
+
 @mcp.tool()
 def execute_code(python_code: str) -> Dict[str, Any]:
     """Execute Python code using AgentCore Code Interpreter"""
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Server modules are flat files in mcp-server/, plus the modules shared with strands-agent
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, "..", "..", "shared"))
+sys.path.insert(0, os.path.join(TESTS_DIR, ".."))
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+import browser_pool
+from browser_pool import BrowserSessionPool
+from fakes import FakeBrowserClient, FakeBrowserSession
+
+
+@pytest.fixture(autouse=True)
+def fake_browsers(monkeypatch):
+    monkeypatch.setattr(browser_pool, "BrowserClient", FakeBrowserClient)
+    monkeypatch.setattr(browser_pool, "BrowserSession", FakeBrowserSession)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def dirty(browser):
+    """Leave the state a caller might: a logged-in site, a second tab, cookies"""
+    page = await browser.session.get_current_page()
+    await page.goto("https://forecast.weather.gov/MapClick.php?lat=47.6&lon=-122.3")
+    context = browser.session.browser_context
+    await (await context.new_page()).goto("https://example.com/account")
+    context.cookies.append({"name": "session", "value": "secret", "domain": "example.com"})
+    context.storage["https://example.com"] = {"token": "secret"}
+    context.storage["https://forecast.weather.gov"] = {"recent": "Seattle"}
+
+
+def test_released_session_is_reset_for_the_next_caller():
+    async def scenario():
+        pool = BrowserSessionPool("fake-browser", "us-west-2", size=1)
+        async with pool.lease() as first:
+            await dirty(first)
+        async with pool.lease() as second:
+            context = second.session.browser_context
+            state = second is first, [page.url for page in context.pages], context.cookies, context.storage
+        await pool.close()
+        return state
+
+    reused, urls, cookies, storage = run(scenario())
+    assert reused
+    assert urls == ["about:blank"]
+    assert cookies == []
+    assert storage == {}
+
+
+def test_session_that_cannot_be_reset_is_retired():
+    async def scenario():
+        pool = BrowserSessionPool("fake-browser", "us-west-2", size=1)
+        async with pool.lease() as first:
+            async def broken():
+                raise RuntimeError("target closed")
+            first.session.browser_context.clear_cookies = broken
+        async with pool.lease() as second:
+            pass
+        stats = pool.stats()
+        await pool.close()
+        return second is first, first.client.session_id, stats
+
+    reused, first_session_id, stats = run(scenario())
+    assert not reused
+    assert first_session_id is None
+    assert stats["failed_resets"] == 1
+
+
+def test_close_stops_idle_sessions():
+    async def scenario():
+        pool = BrowserSessionPool("fake-browser", "us-west-2", size=2)
+        async with pool.lease() as browser:
+            pass
+        await pool.close()
+        return browser, pool.stats()
+
+    browser, stats = run(scenario())
+    assert browser.client.session_id is None
+    assert not browser.session.connected
+    assert stats["total"] == 0
+
+
+def test_server_shutdown_closes_the_pool(monkeypatch):
+    import browser_server
+
+    async def scenario():
+        pool = BrowserSessionPool("fake-browser", "us-west-2", size=1)
+        monkeypatch.setattr(browser_server, "browser_pool", pool)
+        async with pool.lease() as browser:
+            pass
+        async with browser_server.lifespan(browser_server.mcp):
+            pass
+        return browser, pool.stats()
+
+    browser, stats = run(scenario())
+    assert browser.client.session_id is None
+    assert stats["total"] == 0
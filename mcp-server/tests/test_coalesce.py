@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+import pytest
+
+from coalesce import SingleFlight, coalesce
+from deadline import remaining_seconds, request_deadline
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        executions = 0
+
+        async def compute():
+            nonlocal executions
+            executions += 1
+            await asyncio.sleep(0.05)
+            return "forecast"
+
+        results = await asyncio.gather(*(flight.do("seattle", compute) for _ in range(5)))
+        return results, executions, flight.stats()
+
+    results, executions, stats = run(scenario())
+    assert results == ["forecast"] * 5
+    assert executions == 1
+    assert stats == {"calls": 5, "executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.3)
+            return "forecast"
+
+        leader = asyncio.wait_for(flight.do("seattle", compute), timeout=0.1)
+        follower = flight.do("seattle", compute)
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    leader, follower = run(scenario())
+    assert isinstance(leader, asyncio.TimeoutError)
+    assert follower == "forecast"
+
+
+def test_execution_is_cancelled_when_every_waiter_leaves():
+    async def scenario():
+        flight = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def compute():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiters = [asyncio.ensure_future(flight.do("seattle", compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        return flight.in_flight
+
+    assert run(scenario()) == 0
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            if calls == 1:
+                raise RuntimeError("browser crashed")
+            return "forecast"
+
+        first = await asyncio.gather(flight.do("seattle", compute), flight.do("seattle", compute), return_exceptions=True)
+        second = await flight.do("seattle", compute)
+        return first, second
+
+    first, second = run(scenario())
+    assert [type(r) for r in first] == [RuntimeError, RuntimeError]
+    assert second == "forecast"
+
+
+def test_shared_execution_is_not_bound_by_the_first_callers_deadline():
+    seen = []
+
+    @coalesce(name="test_deadline")
+    async def lookup(city: str):
+        seen.append(remaining_seconds())
+        await asyncio.sleep(0.05)
+        return city
+
+    async def scenario():
+        request_deadline.set(time.monotonic() + 0.01)
+        return await lookup("seattle")
+
+    assert run(scenario()) == "seattle"
+    assert seen == [None]
+
+
+def test_calls_after_a_write_do_not_join_an_older_read():
+    generation = 0
+    executions = 0
+
+    @coalesce(name="test_generation", generation=lambda: generation)
+    async def retrieve(query: str):
+        nonlocal executions
+        executions += 1
+        result = f"memories #{executions}"
+        await asyncio.sleep(0.05)
+        return result
+
+    async def scenario():
+        nonlocal generation
+        before = [asyncio.ensure_future(retrieve("preferences")) for _ in range(2)]
+        await asyncio.sleep(0)
+        generation += 1
+        after = asyncio.ensure_future(retrieve("preferences"))
+        return await asyncio.gather(*before, after)
+
+    first, joined, after = run(scenario())
+    assert executions == 2
+    assert first == joined
+    assert after != first
+
+
+def test_streaming_tools_cannot_be_coalesced():
+    with pytest.raises(TypeError):
+        @coalesce()
+        async def execute_code(python_code: str, ctx=None):
+            return python_code
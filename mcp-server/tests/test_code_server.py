@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+import code_server
+from code_sessions import InterpreterSessionManager
+from fakes import FakeCodeInterpreter
+
+
+class ScriptedInterpreter(FakeCodeInterpreter):
+    """Streams the output of a program in two events, like a long-running execution"""
+
+    is_error = False
+
+    def invoke(self, method, params=None):
+        super().invoke(method, params)
+        return {"stream": [
+            {"result": {"content": [{"type": "text", "text": "[('2025-09-16', 'GOOD'), "}], "isError": False}},
+            {"result": {
+                "content": [{"type": "text", "text": "('2025-09-17', 'POOR')]"}],
+                "structuredContent": {"stdout": "...", "stderr": "", "exitCode": 1 if self.is_error else 0},
+                "isError": self.is_error,
+            }},
+        ]}
+
+
+@pytest.fixture
+def interpreter(monkeypatch):
+    manager = InterpreterSessionManager("fake-ci", "us-west-2", factory=ScriptedInterpreter)
+    monkeypatch.setattr(code_server, "CODE_INTERPRETER_ID", "fake-ci")
+    monkeypatch.setattr(code_server, "session_manager", manager)
+    yield ScriptedInterpreter
+    manager.shutdown()
+
+
+def execute(code: str):
+    return asyncio.run(getattr(code_server.execute_code, "fn", code_server.execute_code)(code))
+
+
+def test_execute_code_returns_the_program_output(interpreter):
+    result = execute("print(classify(days))")
+    assert result == {"status": "success", "content": [{"text": "[('2025-09-16', 'GOOD'), ('2025-09-17', 'POOR')]"}]}
+
+
+def test_execute_code_reports_a_failed_program_as_an_error(interpreter, monkeypatch):
+    monkeypatch.setattr(interpreter, "is_error", True)
+    assert execute("raise ValueError")["status"] == "error"
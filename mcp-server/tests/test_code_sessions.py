@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from code_sessions import InterpreterSessionManager
+from fakes import FakeCodeInterpreter
+
+
+@pytest.fixture
+def manager():
+    FakeCodeInterpreter.reset()
+    manager = InterpreterSessionManager(
+        "fake-ci", "us-west-2", max_sessions=2, idle_timeout_seconds=300, lease_timeout_seconds=0.1,
+        factory=FakeCodeInterpreter,
+    )
+    yield manager
+    manager.shutdown()
+
+
+def test_lease_reuses_started_session(manager):
+    with manager.lease() as first:
+        first.client.invoke("executeCode", {"code": "print(1)", "clearContext": True})
+    with manager.lease() as second:
+        second.client.invoke("executeCode", {"code": "print(2)", "clearContext": True})
+
+    assert second is first
+    assert second.uses == 2
+    assert len(FakeCodeInterpreter.started) == 1
+    assert not FakeCodeInterpreter.stopped
+    assert manager.stats()["reused"] == 1
+
+
+def test_concurrent_leases_start_separate_sessions_up_to_max(manager):
+    first = manager.acquire()
+    second = manager.acquire()
+    assert first.client.session_id != second.client.session_id
+
+    with pytest.raises(TimeoutError):
+        manager.acquire()
+
+    manager.release(first)
+    assert manager.acquire() is first
+    assert len(FakeCodeInterpreter.started) == 2
+
+
+def test_broken_session_is_replaced(manager):
+    with pytest.raises(RuntimeError):
+        with manager.lease() as broken:
+            raise RuntimeError("stream reset")
+
+    assert broken.client in FakeCodeInterpreter.stopped.values()
+    with manager.lease() as replacement:
+        assert replacement is not broken
+    assert manager.stats()["total"] == 1
+
+
+def test_stopped_session_is_replaced(manager):
+    with manager.lease() as stopped:
+        stopped.stop()
+
+    with manager.lease() as replacement:
+        assert replacement is not stopped
+        replacement.client.invoke("executeCode", {"code": "print(1)"})
+    assert len(FakeCodeInterpreter.started) == 2
+
+
+def test_idle_sessions_are_evicted(manager):
+    with manager.lease() as session:
+        pass
+
+    assert manager.evict_idle(now=time.monotonic() + 1) == 0
+    assert manager.evict_idle(now=session.last_used + manager.idle_timeout_seconds + 1) == 1
+    assert session.client in FakeCodeInterpreter.stopped.values()
+
+    with manager.lease() as fresh:
+        assert fresh is not session
+    assert manager.stats()["evicted_idle"] == 1
+
+
+def test_shutdown_stops_idle_sessions_and_refuses_leases(manager):
+    with manager.lease():
+        pass
+    manager.shutdown()
+
+    assert len(FakeCodeInterpreter.stopped) == 1
+    with pytest.raises(RuntimeError):
+        manager.acquire()
@@ -0,0 +1,57 @@
+import os
+from datetime import date
+
+import pytest
+
+from fakes import forecast_days, forecast_page_html
+from forecast_parser import ForecastPageError, extract_periods, issued_date, parse_forecast_html
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_printable_page():
+    days = parse_forecast_html(fixture("printable_labor_day.html"))
+    assert [day["date"] for day in days] == ["2025-09-01", "2025-09-02", "2025-09-03"]
+    assert days[1] == {
+        "date": "2025-09-02",
+        "high": 87,
+        "low": 70,
+        "conditions": "A chance of showers and thunderstorms after 2pm",
+        "wind": "South wind 5 to 10 mph.",
+        "precip": 60,
+    }
+
+
+def test_periods_are_dated_from_the_page_not_the_server_clock():
+    html = fixture("printable_labor_day.html")
+    assert issued_date(html) == date(2025, 9, 1)
+    assert parse_forecast_html(html)[0]["date"] == "2025-09-01"
+    assert parse_forecast_html(html, today=date(2025, 8, 31))[0]["date"] == "2025-08-31"
+
+
+def test_only_period_labels_start_periods():
+    labels = [label for label, _ in extract_periods(fixture("printable_labor_day.html"))]
+    assert labels == ["Overnight", "Labor Day", "Labor Day Night", "Tuesday", "Tuesday Night", "Wednesday"]
+
+
+def test_period_without_wind_keeps_earlier_wind():
+    # "Labor Day" has no wind sentence; the overnight period's wind stands
+    labor_day = parse_forecast_html(fixture("printable_labor_day.html"))[0]
+    assert labor_day["wind"] == "Calm wind."
+    assert labor_day["conditions"] == "Sunny and hot"
+    assert labor_day["high"] == 91
+
+
+def test_fake_page_round_trips():
+    today = date(2025, 9, 16)
+    assert parse_forecast_html(forecast_page_html(today=today)) == forecast_days(today=today)
+
+
+def test_page_without_periods():
+    with pytest.raises(ForecastPageError):
+        parse_forecast_html("<html><body><b>Search results</b> for Springfield</body></html>")
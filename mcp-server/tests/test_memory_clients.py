@@ -0,0 +1,15 @@
+from bedrock_agentcore.memory import MemoryClient
+
+from memory_clients import create_memory_client
+
+
+def test_data_plane_client_keeps_the_sdk_config_and_gets_the_pool_size():
+    sdk = MemoryClient(region_name="us-west-2").gmdp_client.meta
+    client = create_memory_client("us-west-2", max_pool_connections=32)
+
+    meta = client.gmdp_client.meta
+    assert meta.config.max_pool_connections == 32
+    assert meta.config.tcp_keepalive
+    assert meta.config.user_agent_extra == sdk.config.user_agent_extra
+    assert meta.endpoint_url == sdk.endpoint_url
+    assert meta.region_name == "us-west-2"
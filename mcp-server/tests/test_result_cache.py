@@ -0,0 +1,167 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import fakes
+import result_cache
+from fakes import FakeRedis
+from result_cache import InProcessBackend, RedisBackend, ResultCache, is_success, normalize_city, weather_cache_key
+
+FORECAST = {"status": "success", "content": [{"text": "[]"}]}
+ERROR = {"status": "error", "content": [{"text": "Error: browser session failed"}]}
+
+
+class Clock:
+    """Monotonic clock the test moves by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    # Only the cache modules see the fake clock; the event loop keeps the real one
+    monkeypatch.setattr(result_cache, "time", SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(fakes, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def counting(value):
+    """compute() returning value and counting its calls in .calls"""
+    async def compute():
+        compute.calls += 1
+        return value
+    compute.calls = 0
+    return compute
+
+
+@pytest.mark.parametrize("backend", [InProcessBackend, lambda: RedisBackend(FakeRedis())], ids=["in-process", "redis"])
+def test_entries_expire_after_the_ttl(clock, backend):
+    async def scenario():
+        cache = ResultCache(backend(), ttl_seconds=60)
+        compute = counting(FORECAST)
+        await cache.get_or_compute("weather:seattle", compute, is_success)
+        clock.now += 59
+        await cache.get_or_compute("weather:seattle", compute, is_success)
+        clock.now += 1
+        await cache.get_or_compute("weather:seattle", compute, is_success)
+        return compute.calls, cache.stats()
+
+    calls, stats = run(scenario())
+    assert calls == 2
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_in_process_backend_evicts_least_recently_used(clock):
+    async def scenario():
+        backend = InProcessBackend(max_entries=2)
+        await backend.set("a", "1", 60)
+        await backend.set("b", "2", 60)
+        await backend.get("a")
+        await backend.set("c", "3", 60)
+        return [await backend.get(key) for key in ("a", "b", "c")], backend.stats()
+
+    values, stats = run(scenario())
+    assert values == ["1", None, "3"]
+    assert stats == {"backend": "in-process", "entries": 2, "evictions": 1}
+
+
+def test_errors_are_not_cached():
+    async def scenario():
+        cache = ResultCache(InProcessBackend())
+        failing = counting(ERROR)
+        first = await cache.get_or_compute("weather:seattle", failing, is_success)
+        second = await cache.get_or_compute("weather:seattle", failing, is_success)
+        return first, second, failing.calls, cache.stats()
+
+    first, second, calls, stats = run(scenario())
+    assert first == second == ERROR
+    assert calls == 2
+    assert stats["hits"] == 0
+    assert stats["entries"] == 0
+
+
+def test_redis_backend_round_trips_json_with_the_ttl(clock):
+    async def scenario():
+        client = FakeRedis()
+        cache = ResultCache(RedisBackend(client), ttl_seconds=60)
+        await cache.get_or_compute("weather:seattle", counting(FORECAST), is_success)
+        cached = await cache.get_or_compute("weather:seattle", counting(ERROR), is_success)
+        return client.store, cached, cache.stats()
+
+    store, cached, stats = run(scenario())
+    assert store == {"weather:seattle": ('{"status": "success", "content": [{"text": "[]"}]}', 1060.0)}
+    assert cached == FORECAST
+    assert stats["backend"] == "redis"
+    assert stats["hits"] == 1
+
+
+def test_redis_failures_are_treated_as_misses():
+    class BrokenRedis:
+        async def get(self, key):
+            raise ConnectionError("connection refused")
+
+        async def set(self, key, value, ex=None):
+            raise ConnectionError("connection refused")
+
+    async def scenario():
+        cache = ResultCache(RedisBackend(BrokenRedis()))
+        return await cache.get_or_compute("weather:seattle", counting(FORECAST), is_success), cache.stats()
+
+    result, stats = run(scenario())
+    assert result == FORECAST
+    assert stats["errors"] == 2
+
+
+@pytest.mark.parametrize("city", ["Richmond, VA", "  richmond   va ", "RICHMOND-VA", "Richmond, VA."])
+def test_normalize_city(city):
+    assert normalize_city(city) == "richmond va"
+
+
+def test_weather_cache_key_rolls_over_every_six_hours(monkeypatch):
+    monkeypatch.setattr(result_cache, "WEATHER_CACHE_WINDOW_HOURS", 6)
+
+    def key(hour: int, minute: int = 0, day: int = 16) -> str:
+        return weather_cache_key("Seattle, WA", datetime(2025, 9, day, hour, minute, tzinfo=timezone.utc))
+
+    assert key(0) == key(5, 59) == "weather:seattle wa:2025-09-16:0"
+    assert key(6) == "weather:seattle wa:2025-09-16:1"
+    assert key(23, 59) == "weather:seattle wa:2025-09-16:3"
+    assert key(0, day=17) == "weather:seattle wa:2025-09-17:0"
+    assert weather_cache_key("seattle wa", datetime(2025, 9, 16, 7, tzinfo=timezone.utc)) == key(6)
+
+
+def test_cancelled_owner_does_not_fail_waiters():
+    async def scenario():
+        cache = ResultCache(InProcessBackend())
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.1)
+            return FORECAST
+
+        owner = asyncio.ensure_future(
+            asyncio.wait_for(cache.get_or_compute("weather:seattle", compute, is_success), timeout=0.02)
+        )
+        await asyncio.sleep(0.01)
+        waiter = cache.get_or_compute("weather:seattle", compute, is_success)
+        results = await asyncio.gather(owner, waiter, return_exceptions=True)
+        return results, calls, await cache.get_or_compute("weather:seattle", compute, is_success)
+
+    (owner, waiter), calls, cached = asyncio.run(scenario())
+    assert isinstance(owner, asyncio.TimeoutError)
+    assert waiter == FORECAST
+    assert calls == 1
+    assert cached == FORECAST
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from weather_classifier import ForecastParseError, classify_weather_data, sky
+
+
+def labels(days):
+    return [label for _, label in classify_weather_data(days)]
+
+
+@pytest.mark.parametrize("high, expected", [
+    (54, "POOR"), (55, "OK"), (64, "OK"), (65, "GOOD"), (80, "GOOD"), (81, "OK"), (85, "OK"), (86, "POOR"),
+])
+def test_temperature_ranges_are_inclusive(high, expected):
+    assert labels([{"date": "2025-09-16", "high": high, "conditions": "Sunny"}]) == [expected]
+
+
+@pytest.mark.parametrize("conditions, expected", [
+    ("Sunny", "GOOD"),
+    ("Mostly Sunny", "OK"),
+    ("Partly Cloudy", "OK"),
+    ("Cloudy", "POOR"),
+    ("Overcast", "POOR"),
+    ("Chance Rain Showers", "POOR"),
+    ("Sunny then Slight Chance T-storms", "POOR"),
+])
+def test_skies(conditions, expected):
+    assert labels([{"date": "2025-09-16", "high": 72, "conditions": conditions}]) == [expected]
+
+
+def test_wet_words_match_whole_words_only():
+    assert sky("Nice and sunny", None) == "clear"
+    assert sky("Sunny, a slice of haze", None) == "clear"
+    assert sky("Patchy ice early, then sunny", None) == "wet"
+    assert sky("Snow flurries", None) == "wet"
+
+
+def test_precipitation_chance_makes_a_day_wet():
+    days = [
+        {"date": "2025-09-16", "high": 72, "conditions": "Sunny", "precip": "59%"},
+        {"date": "2025-09-17", "high": 72, "conditions": "Sunny", "precip": "60%"},
+    ]
+    assert labels(days) == ["GOOD", "POOR"]
+
+
+def test_units_and_field_names_are_normalized():
+    payload = json.dumps({"forecast": [
+        {"Day": "Tuesday", "High Temp": "78°F", "Low": "60°F", "Short Forecast": "Clear"},
+        {"name": "Tuesday Night", "low_temp": "58 F", "weather": "Clear"},
+        {"period": "Wednesday", "temperature": 90.5, "description": "Sunny"},
+    ]})
+    assert classify_weather_data(f"Here is the forecast:\n```json\n{payload}\n```") == [
+        ("Tuesday", "GOOD"), ("Tuesday Night", "OK"), ("Wednesday", "POOR"),
+    ]
+
+
+def test_day_without_a_temperature_is_poor():
+    assert classify_weather_data([{"conditions": "Sunny"}]) == [("day 1", "POOR")]
+
+
+def test_batch_classifies_each_city():
+    batch = {
+        "Seattle": [{"date": "2025-09-16", "high": 70, "conditions": "Sunny"}],
+        "Phoenix": json.dumps([{"date": "2025-09-16", "high": 104, "conditions": "Sunny"}]),
+        "Nowhere": "no forecast available",
+    }
+    result = classify_weather_data(json.dumps(batch))
+    assert result["Seattle"] == [("2025-09-16", "GOOD")]
+    assert result["Phoenix"] == [("2025-09-16", "POOR")]
+    assert "error" in result["Nowhere"]
+
+
+@pytest.mark.parametrize("weather_data", [
+    "The forecast is unavailable",
+    "[]",
+    '{"forecast": "sunny all week"}',
+    "[1, 2, 3]",
+])
+def test_unreadable_forecast_raises(weather_data):
+    with pytest.raises(ForecastParseError):
+        classify_weather_data(weather_data)
@@ -0,0 +1,61 @@
+"""
+Bounded thread pool for blocking AgentCore calls
+
+The MCP servers serve the SSE transport and run tools on the same event loop,
+so blocking boto3 calls are pushed onto a shared, bounded executor. The pool
+size is the per-pod tool concurrency limit; calls beyond it queue for a worker.
+Calls whose request deadline passed while they were queued are not started.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+from deadline import check_deadline
+
+T = TypeVar("T")
+
+TOOL_MAX_CONCURRENCY = int(os.environ.get("TOOL_MAX_CONCURRENCY", "16"))
+
+_executor = ThreadPoolExecutor(max_workers=TOOL_MAX_CONCURRENCY, thread_name_prefix="mcp-tool")
+_lock = threading.Lock()
+_in_flight = 0
+_queued = 0
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking call on the tool executor without stalling the event loop.
+
+    The caller's context (tracing spans etc.) is copied into the worker thread.
+    """
+    global _queued
+
+    ctx = contextvars.copy_context()
+
+    def call() -> T:
+        global _in_flight, _queued
+        with _lock:
+            _queued -= 1
+            _in_flight += 1
+        try:
+            ctx.run(check_deadline, f"{getattr(fn, '__name__', 'call')} left the executor queue")
+            return ctx.run(functools.partial(fn, *args, **kwargs))
+        finally:
+            with _lock:
+                _in_flight -= 1
+
+    with _lock:
+        _queued += 1
+    return await asyncio.get_running_loop().run_in_executor(_executor, call)
+
+
+def executor_stats() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "max_concurrency": TOOL_MAX_CONCURRENCY,
+            "in_flight": _in_flight,
+            "queued": _queued,
+        }
@@ -0,0 +1,186 @@
+"""
+Write-behind queue for AgentCore Memory writes
+
+Store tools hand their turn to a bounded in-process queue and return at once;
+a background thread flushes queued writes in batches with retry and
+exponential backoff. Pending writes stay visible to readers until they are
+flushed, and the queue is drained on shutdown. Entries live in process memory,
+so a crash (as opposed to a graceful shutdown) loses whatever is still queued.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("memory-mcp-server")
+
+MEMORY_WRITE_BEHIND = os.environ.get("MEMORY_WRITE_BEHIND", "false").lower() == "true"
+MEMORY_WRITE_QUEUE_SIZE = int(os.environ.get("MEMORY_WRITE_QUEUE_SIZE", "1000"))
+MEMORY_WRITE_BATCH_SIZE = int(os.environ.get("MEMORY_WRITE_BATCH_SIZE", "25"))
+MEMORY_WRITE_FLUSH_INTERVAL_SECONDS = float(os.environ.get("MEMORY_WRITE_FLUSH_INTERVAL_SECONDS", "0.5"))
+MEMORY_WRITE_MAX_RETRIES = int(os.environ.get("MEMORY_WRITE_MAX_RETRIES", "5"))
+MEMORY_WRITE_SHUTDOWN_TIMEOUT_SECONDS = 20.0
+MEMORY_WRITE_MAX_BACKOFF_SECONDS = 10.0
+
+
+class PendingWrite:
+    """A conversation turn waiting to be saved"""
+
+    def __init__(self, kind: str, actor_id: str, user_input: str, agent_response: str):
+        self.kind = kind
+        self.actor_id = actor_id
+        self.user_input = user_input
+        self.agent_response = agent_response
+        self.enqueued_at = time.time()
+
+    def as_record(self) -> Dict[str, Any]:
+        """Shape a pending write like a retrieved memory record"""
+        return {
+            "content": {"text": f"{self.user_input}: {self.agent_response}"},
+            "pending": True,
+        }
+
+
+class WriteBehindQueue:
+    """Bounded queue flushed by a background thread.
+
+    ``write`` performs one blocking save for a PendingWrite; it is retried with
+    exponential backoff up to ``max_retries`` times before the write is dropped.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[PendingWrite], None],
+        max_size: int = MEMORY_WRITE_QUEUE_SIZE,
+        batch_size: int = MEMORY_WRITE_BATCH_SIZE,
+        flush_interval_seconds: float = MEMORY_WRITE_FLUSH_INTERVAL_SECONDS,
+        max_retries: int = MEMORY_WRITE_MAX_RETRIES,
+        backoff_base_seconds: float = 0.2,
+    ):
+        self.write = write
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+
+        self._queue: "queue.Queue[PendingWrite]" = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._pending: List[PendingWrite] = []
+        self._stopping = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+        self._queued = 0
+        self._rejected = 0
+        self._flushed = 0
+        self._dropped = 0
+        self._retries = 0
+        self._batches = 0
+        self._last_flush_seconds = 0.0
+        self._max_flush_seconds = 0.0
+        self._flush_seconds_total = 0.0
+
+    def start(self) -> None:
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="memory-write-behind", daemon=True)
+            self._worker.start()
+
+    def submit(self, write: PendingWrite) -> bool:
+        """Queue a write; returns False when the queue is full or shutting down"""
+        if self._stopping.is_set():
+            return False
+        with self._lock:
+            try:
+                self._queue.put_nowait(write)
+            except queue.Full:
+                self._rejected += 1
+                return False
+            self._pending.append(write)
+            self._queued += 1
+        self.start()
+        return True
+
+    def pending(self, actor_id: str, kind: Optional[str] = None) -> List[PendingWrite]:
+        """Writes for an actor that are queued or being flushed, newest first"""
+        with self._lock:
+            return [
+                w for w in reversed(self._pending)
+                if w.actor_id == actor_id and (kind is None or w.kind == kind)
+            ]
+
+    def _next_batch(self) -> List[PendingWrite]:
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval_seconds)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_with_retry(self, write: PendingWrite) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.write(write)
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Dropping memory write after {attempt + 1} attempts: {e}")
+                    return False
+                self._retries += 1
+                delay = min(self.backoff_base_seconds * (2 ** attempt), MEMORY_WRITE_MAX_BACKOFF_SECONDS)
+                logger.warning(f"Memory write failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+        return False
+
+    def _flush(self, batch: List[PendingWrite]) -> None:
+        started = time.perf_counter()
+        for write in batch:
+            ok = self._write_with_retry(write)
+            with self._lock:
+                self._pending.remove(write)
+                if ok:
+                    self._flushed += 1
+                else:
+                    self._dropped += 1
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._batches += 1
+            self._last_flush_seconds = elapsed
+            self._max_flush_seconds = max(self._max_flush_seconds, elapsed)
+            self._flush_seconds_total += elapsed
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+
+    def shutdown(self, timeout: float = MEMORY_WRITE_SHUTDOWN_TIMEOUT_SECONDS) -> None:
+        """Stop accepting writes and flush what is queued"""
+        self._stopping.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+        remaining = self._queue.qsize()
+        if remaining:
+            logger.error(f"{remaining} memory write(s) still queued at shutdown")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "pending": len(self._pending),
+                "queued": self._queued,
+                "rejected": self._rejected,
+                "flushed": self._flushed,
+                "dropped": self._dropped,
+                "retries": self._retries,
+                "batches": self._batches,
+                "last_flush_ms": round(self._last_flush_seconds * 1000, 1),
+                "max_flush_ms": round(self._max_flush_seconds * 1000, 1),
+                "avg_flush_ms": round(1000 * self._flush_seconds_total / self._batches, 1) if self._batches else None,
+            }
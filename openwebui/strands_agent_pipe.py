@@ -1,7 +1,7 @@
 """
 title: Strands Agent Pipe with OAuth Token Forwarding
 author: Agent Core Team
-version: 1.1.0
+version: 1.3.0
 
 This Pipe function retrieves the OAuth token from OpenWebUI's server-side session
 and forwards it to the Strands Agent API for MCP tool authorization via AgentGateway.
@@ -37,30 +37,87 @@ class Pipe:
         )
         timeout_seconds: float = Field(
             default=120.0,
-            description="Timeout for API requests in seconds"
+            description="Read timeout in seconds: the longest wait for the response, or between chunks when streaming"
+        )
+        request_deadline_seconds: float = Field(
+            default=300.0,
+            description="Total time allowed for a message in seconds, 0 for none. Sent as X-Request-Deadline so the agent and its tools stop once it passes"
+        )
+        stream: bool = Field(
+            default=True,
+            description="Stream tokens from the agent as they are generated"
         )
         debug_mode: bool = Field(
             default=False,
             description="Enable debug mode for additional logging (logs to server, not UI)"
         )
+        max_connections: int = Field(
+            default=100,
+            description="Maximum concurrent connections to the Strands Agent"
+        )
+        max_keepalive_connections: int = Field(
+            default=20,
+            description="Idle connections kept open for reuse"
+        )
+        keepalive_expiry_seconds: float = Field(
+            default=30.0,
+            description="How long an idle connection is kept open"
+        )
+        http2: bool = Field(
+            default=False,
+            description="Use HTTP/2 to the Strands Agent (requires the h2 package)"
+        )
 
     def __init__(self) -> None:
         self.type: str = "pipe"
         self.id: str = "strands_agent_oauth"
         self.valves = self.Valves()
         self.name: str = self.valves.model_name_prefix
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_url: Optional[str] = None
 
     async def on_startup(self) -> None:
         """Called when the server starts."""
         logger.info(f"Strands Agent Pipe starting up, connecting to: {self.valves.STRANDS_AGENT_URL}")
+        self._get_client()
 
     async def on_shutdown(self) -> None:
         """Called when the server stops."""
         logger.info("Strands Agent Pipe shutting down")
+        await self._close_client()
 
     async def on_valves_updated(self) -> None:
         """Called when valves are updated."""
         logger.info(f"Valves updated, new URL: {self.valves.STRANDS_AGENT_URL}")
+        if self._client is not None and self._client_url != self.valves.STRANDS_AGENT_URL:
+            await self._close_client()
+            self._get_client()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the long-lived HTTP client, creating it on first use.
+
+        Reusing one client keeps connections to the agent alive across chat
+        messages instead of paying a TCP/TLS handshake per message.
+        """
+        if self._client is None or self._client.is_closed:
+            limits = httpx.Limits(
+                max_connections=self.valves.max_connections,
+                max_keepalive_connections=self.valves.max_keepalive_connections,
+                keepalive_expiry=self.valves.keepalive_expiry_seconds,
+            )
+            try:
+                self._client = httpx.AsyncClient(limits=limits, http2=self.valves.http2)
+            except ImportError:
+                logger.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+                self._client = httpx.AsyncClient(limits=limits)
+            self._client_url = self.valves.STRANDS_AGENT_URL
+        return self._client
+
+    async def _close_client(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_url = None
 
     def pipes(self) -> List[Dict[str, str]]:
         """Return available models/pipes."""
@@ -68,6 +125,10 @@ class Pipe:
             {
                 "id": "strands-weather-agent",
                 "name": "Weather Activity Planner"
+            },
+            {
+                "id": "strands-weather-agent-fast",
+                "name": "Weather Activity Planner (fast path)"
             }
         ]
 
@@ -111,16 +172,21 @@ class Pipe:
             )
             return
 
+        # Absolute Unix time, so every hop down to the MCP tools shares the same deadline
+        deadline = None
+        if self.valves.request_deadline_seconds > 0:
+            deadline = time.time() + self.valves.request_deadline_seconds
+
         # Build headers with OAuth token
-        headers = self._build_headers(__request__, __user__, oauth_token)
+        headers = self._build_headers(__request__, __user__, oauth_token, deadline)
 
         # Extract model ID from body
         model_id = body.get("model", "strands-weather-agent")
         if "." in model_id:
             model_id = model_id.split(".")[-1]
 
-        # Prepare payload - request non-streaming for simpler handling
-        payload = {**body, "model": model_id, "stream": False}
+        # Servers that cannot stream answer with a plain JSON completion, which is handled below
+        payload = {**body, "model": model_id, "stream": self.valves.stream}
 
         url = f"{self.valves.STRANDS_AGENT_URL}/v1/chat/completions"
         
@@ -128,14 +194,15 @@ class Pipe:
             logger.info(f"Calling {url}")
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url=url,
-                    json=payload,
-                    headers=headers,
-                    timeout=self.valves.timeout_seconds,
-                    follow_redirects=True,
-                )
+            client = self._get_client()
+            async with client.stream(
+                "POST",
+                url,
+                json=payload,
+                headers=headers,
+                timeout=self._read_timeout(deadline),
+                follow_redirects=True,
+            ) as response:
 
                 if response.status_code == 401:
                     yield (
@@ -153,9 +220,18 @@ class Pipe:
                     )
                     return
 
-                response.raise_for_status()
+                if response.is_error:
+                    # Read the body so the error handler below can include it
+                    await response.aread()
+                    response.raise_for_status()
 
-                # Parse JSON response
+                if response.headers.get("content-type", "").startswith("text/event-stream"):
+                    async for delta in self._stream_deltas(response, __event_emitter__, deadline):
+                        yield delta
+                    return
+
+                # Buffered fallback for servers that ignore "stream"
+                await response.aread()
                 response_json = response.json()
                 
                 if "choices" in response_json and len(response_json["choices"]) > 0:
@@ -180,6 +256,73 @@ class Pipe:
             error_msg = str(e) if self.valves.debug_mode else "An unexpected error occurred"
             yield f"❌ **Error**: {error_msg}"
 
+    async def _stream_deltas(
+        self,
+        response: httpx.Response,
+        event_emitter: Optional[Callable[[Dict[str, Any]], Awaitable[None]]],
+        deadline: Optional[float] = None,
+    ) -> AsyncGenerator[str, None]:
+        """Yield content deltas from an OpenAI-style SSE stream.
+
+        Tool calls announced in the stream are forwarded to the UI as status events.
+        Raises httpx.ReadTimeout once ``deadline`` (Unix time) has passed.
+        """
+        received_content = False
+        emitted_status = False
+
+        async for line in response.aiter_lines():
+            if deadline is not None and time.time() > deadline:
+                raise httpx.ReadTimeout("Request deadline passed")
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+
+            try:
+                chunk = json.loads(data)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed stream chunk: {data[:200]}")
+                continue
+
+            for choice in chunk.get("choices", []):
+                delta = choice.get("delta") or {}
+
+                for tool_call in delta.get("tool_calls") or []:
+                    tool_name = (tool_call.get("function") or {}).get("name")
+                    if tool_name:
+                        await self._emit_status(event_emitter, f"Running {tool_name}...", done=False)
+                        emitted_status = True
+
+                if delta.get("content"):
+                    received_content = True
+                    yield delta["content"]
+
+        if emitted_status:
+            await self._emit_status(event_emitter, "Done", done=True)
+        if not received_content:
+            yield "No response received from the agent."
+
+    def _read_timeout(self, deadline: Optional[float]) -> float:
+        """The read timeout, capped at the time left until ``deadline``"""
+        if deadline is None:
+            return self.valves.timeout_seconds
+        return max(min(self.valves.timeout_seconds, deadline - time.time()), 0.0)
+
+    async def _emit_status(
+        self,
+        event_emitter: Optional[Callable[[Dict[str, Any]], Awaitable[None]]],
+        description: str,
+        done: bool,
+    ) -> None:
+        """Send a status event to the OpenWebUI chat, if an emitter is available."""
+        if event_emitter is None:
+            return
+        try:
+            await event_emitter({"type": "status", "data": {"description": description, "done": done}})
+        except Exception as e:
+            logger.warning(f"Failed to emit status event: {e}")
+
     def _extract_oauth_token(self, request: Request, user: Optional[Dict[str, Any]]) -> Optional[str]:
         """Extract OAuth token from various sources."""
         
@@ -237,7 +380,8 @@ class Pipe:
         self, 
         request: Request, 
         user: Optional[Dict[str, Any]], 
-        oauth_token: str
+        oauth_token: str,
+        deadline: Optional[float] = None,
     ) -> Dict[str, str]:
         """Build headers for the downstream request."""
         headers = {
@@ -261,6 +405,9 @@ class Pipe:
             if header in request.headers:
                 headers[header] = request.headers[header]
 
+        if deadline is not None:
+            headers["X-Request-Deadline"] = f"{deadline:.3f}"
+
         return headers
 
     def _sanitize_headers(self, headers: Dict[str, str]) -> Dict[str, str]:
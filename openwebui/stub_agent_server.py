@@ -0,0 +1,133 @@
+"""
+Local stub of the Strands Agent chat completions API for exercising the pipe
+
+Serves POST /v1/chat/completions. With "stream": true it answers with an
+OpenAI-style SSE stream (a tool call chunk, then content deltas with a delay
+between them, then [DONE]); otherwise it returns a single JSON completion.
+Run ``--buffered-only`` to mimic a server that ignores "stream".
+
+Usage:
+    python stub_agent_server.py --port 8000          # serve until Ctrl+C
+    python stub_agent_server.py --check              # drive Pipe.pipe against it and verify streaming
+"""
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DELTAS = ["Saturday looks ", "sunny, ", "great for ", "hiking."]
+TOOL_CALLS = ["get_weather_data"]
+CHUNK_DELAY_SECONDS = 0.2
+
+
+def make_handler(buffered_only: bool):
+    class StubAgentHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if body.get("stream") and not buffered_only:
+                self._stream()
+            else:
+                self._buffered()
+
+        def _stream(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+
+            for name in TOOL_CALLS:
+                self._send_chunk({"tool_calls": [{"index": 0, "type": "function", "function": {"name": name, "arguments": ""}}]})
+            for delta in DELTAS:
+                time.sleep(CHUNK_DELAY_SECONDS)
+                self._send_chunk({"content": delta})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def _send_chunk(self, delta):
+            chunk = {"object": "chat.completion.chunk", "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+
+        def _buffered(self):
+            payload = json.dumps({
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(DELTAS)}, "finish_reason": "stop"}],
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubAgentHandler
+
+
+class FakeRequest:
+    """Just enough of a Starlette request for the pipe"""
+
+    cookies = {}
+    headers = {"x-request-id": "stub-check"}
+
+
+async def check(port: int, buffered_only: bool) -> int:
+    from strands_agent_pipe import Pipe
+
+    pipe = Pipe()
+    pipe.valves.STRANDS_AGENT_URL = f"http://127.0.0.1:{port}"
+    statuses = []
+
+    async def emitter(event):
+        statuses.append(event["data"]["description"])
+
+    started = time.perf_counter()
+    deltas = []
+    async for delta in pipe.pipe(
+        {"model": "strands-weather-agent", "messages": [{"role": "user", "content": "hi"}]},
+        __request__=FakeRequest(),
+        __user__={"oauth_id_token": "a.b.c"},
+        __event_emitter__=emitter,
+    ):
+        deltas.append(delta)
+        print(f"{time.perf_counter() - started:6.2f}s  {delta!r}")
+    await pipe.on_shutdown()
+
+    print(f"status events: {statuses}")
+    expected = ["".join(DELTAS)] if buffered_only else DELTAS
+    if deltas != expected:
+        print(f"FAIL: expected {expected}, got {deltas}")
+        return 1
+    if not buffered_only and not statuses:
+        print("FAIL: no status events for tool calls")
+        return 1
+    print("OK")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--buffered-only", action="store_true", help="Ignore stream=true, like a non-streaming server")
+    parser.add_argument("--check", action="store_true", help="Run the pipe against the stub and verify the output")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0 if args.check else args.port), make_handler(args.buffered_only))
+    if not args.check:
+        print(f"Stub agent listening on http://127.0.0.1:{args.port}")
+        server.serve_forever()
+        return
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        sys.exit(asyncio.run(check(server.server_address[1], args.buffered_only)))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
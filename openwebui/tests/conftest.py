@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The pipe and the stub agent server are flat files in openwebui/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
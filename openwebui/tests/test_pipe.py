@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import stub_agent_server
+from strands_agent_pipe import Pipe
+from stub_agent_server import DELTAS, FakeRequest, make_handler
+
+
+@pytest.fixture(autouse=True)
+def fast_stream(monkeypatch):
+    monkeypatch.setattr(stub_agent_server, "CHUNK_DELAY_SECONDS", 0.01)
+
+
+def serve(buffered_only: bool):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(buffered_only))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def streaming_agent():
+    server = serve(buffered_only=False)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def buffered_agent():
+    server = serve(buffered_only=True)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def run_pipe(url: str, stream: bool = True):
+    async def scenario():
+        pipe = Pipe()
+        pipe.valves.STRANDS_AGENT_URL = url
+        pipe.valves.stream = stream
+        statuses = []
+
+        async def emitter(event):
+            statuses.append((event["data"]["description"], event["data"]["done"]))
+
+        try:
+            deltas = [delta async for delta in pipe.pipe(
+                {"model": "strands-weather-agent", "messages": [{"role": "user", "content": "hi"}]},
+                __request__=FakeRequest(),
+                __user__={"oauth_id_token": "a.b.c"},
+                __event_emitter__=emitter,
+            )]
+        finally:
+            await pipe.on_shutdown()
+        return deltas, statuses
+
+    return asyncio.run(scenario())
+
+
+def test_streamed_answer_is_yielded_delta_by_delta(streaming_agent):
+    deltas, statuses = run_pipe(streaming_agent)
+    assert deltas == DELTAS
+    assert statuses == [("Running get_weather_data...", False), ("Done", True)]
+
+
+def test_server_that_ignores_stream_falls_back_to_the_buffered_answer(buffered_agent):
+    deltas, statuses = run_pipe(buffered_agent)
+    assert deltas == ["".join(DELTAS)]
+    assert statuses == []
+
+
+def test_streaming_can_be_turned_off(streaming_agent):
+    deltas, _ = run_pipe(streaming_agent, stream=False)
+    assert deltas == ["".join(DELTAS)]
@@ -0,0 +1,178 @@
+"""
+Cache of model-generated weather classifiers
+
+The classification rules never change, so instead of asking the model to write
+code around each forecast, it is asked once for a ``classify(days)`` function
+that works for any forecast with a given schema (field names and value types).
+The function is cached in memory and on disk under a hash of the rules and the
+schema; each call only appends the forecast and a call to it. Unparseable
+forecasts fall back to the old per-forecast prompt.
+"""
+import ast
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger("analysis-code-cache")
+
+ANALYSIS_CODE_CACHE_ENABLED = os.environ.get("ANALYSIS_CODE_CACHE_ENABLED", "true").lower() == "true"
+ANALYSIS_CODE_CACHE_DIR = os.environ.get(
+    "ANALYSIS_CODE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "analysis-code-cache")
+)
+
+CLASSIFICATION_RULES = (
+    "GOOD: 65-80°F clear, OK: 55-85°F clear or partly cloudy, "
+    "POOR: <55°F or >85°F, overcast, or wet (rain, snow, storms, ice or precipitation chance >= 60%)"
+)
+
+CODE_BLOCK_PATTERN = re.compile(r'```(?:json|python)\n(.*?)\n```', re.DOTALL)
+
+
+def extract_code(text: str) -> str:
+    """Code from the first fenced block of a model reply, or the whole reply"""
+    match = CODE_BLOCK_PATTERN.search(text)
+    return match.group(1).strip() if match else text
+
+
+def value_type(value: Any) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if value is None:
+        return "null"
+    return type(value).__name__
+
+
+def forecast_schema(days: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Field name -> value type(s) across all days, e.g. {"high": "str", "precip": "null|str"}"""
+    types: Dict[str, set] = {}
+    for day in days:
+        for key, value in day.items():
+            types.setdefault(str(key), set()).add(value_type(value))
+    return {key: "|".join(sorted(kinds)) for key, kinds in sorted(types.items())}
+
+
+def cache_key(rules: str, schema: Dict[str, str]) -> str:
+    payload = json.dumps({"rules": rules, "schema": schema}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def classifier_prompt(rules: str, schema: Dict[str, str], example: Dict[str, Any]) -> str:
+    return f"""Write a Python function `classify(days)` that classifies weather days as GOOD/OK/POOR.
+    Rules: {rules}
+    `days` is a list of dicts with these fields and JSON value types: {json.dumps(schema)}
+    Example day: {json.dumps(example)}
+    Values may be strings with units (e.g. "78°F", "40%"); parse them robustly.
+    Return a list of tuples: [('2025-09-16', 'GOOD'), ...]
+    Use only the standard library, do not read input or print. Reply with a single python code block."""
+
+
+def defines_classify(code: str) -> bool:
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return False
+    return any(isinstance(node, ast.FunctionDef) and node.name == "classify" for node in tree.body)
+
+
+def build_program(classifier_code: str, days: List[Dict[str, Any]]) -> str:
+    """Cached classifier plus the forecast and a call printing its result"""
+    return f"{classifier_code}\n\n\nimport json\ndays = json.loads({json.dumps(days)!r})\nprint(classify(days))\n"
+
+
+class AnalysisCodeCache:
+    """In-memory + on-disk cache of classifier functions keyed by rules and schema"""
+
+    def __init__(self, directory: Optional[str] = ANALYSIS_CODE_CACHE_DIR, rules: str = CLASSIFICATION_RULES):
+        self.directory = directory
+        self.rules = rules
+        self._memory: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+        if directory:
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"Analysis code cache directory unavailable ({e}); caching in memory only")
+                self.directory = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.py")
+
+    def _load(self, key: str) -> Optional[str]:
+        if key in self._memory:
+            self.hits += 1
+            return self._memory[key]
+        if self.directory and os.path.exists(self._path(key)):
+            with open(self._path(key), encoding="utf-8") as f:
+                code = f.read()
+            self._memory[key] = code
+            self.disk_hits += 1
+            return code
+        return None
+
+    def _store(self, key: str, code: str) -> None:
+        self._memory[key] = code
+        if not self.directory:
+            return
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(code)
+            os.replace(tmp, self._path(key))
+        except OSError as e:
+            logger.warning(f"Could not persist analysis code {key[:12]}: {e}")
+
+    def classifier_for(self, days: List[Dict[str, Any]], generate: Callable[[str], str]) -> str:
+        """Cached classifier for the days' schema, asking ``generate`` (prompt -> reply) on a miss"""
+        schema = forecast_schema(days)
+        key = cache_key(self.rules, schema)
+        with self._lock:
+            code = self._load(key)
+            if code is not None:
+                return code
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # One generation per schema; concurrent callers wait for it
+        with key_lock:
+            with self._lock:
+                code = self._load(key)
+                if code is not None:
+                    return code
+                self.misses += 1
+            code = extract_code(generate(classifier_prompt(self.rules, schema, days[0])))
+            if not defines_classify(code):
+                with self._lock:
+                    self.rejected += 1
+                raise ValueError("Generated code does not define classify(days)")
+            with self._lock:
+                self._store(key, code)
+            return code
+
+    def program_for(self, days: List[Dict[str, Any]], generate: Callable[[str], str]) -> str:
+        """Executable program classifying ``days``"""
+        return build_program(self.classifier_for(days, generate), days)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": ANALYSIS_CODE_CACHE_ENABLED,
+                "entries": len(self._memory),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "rejected": self.rejected,
+                "directory": self.directory,
+            }
@@ -0,0 +1,252 @@
+"""
+Deterministic parser for weather.gov point forecast pages
+
+Turns the MapClick detailed forecast (``forecast-label`` / ``forecast-text``
+rows) or its printable text version (``<b>Label</b>`` followed by the period
+text) into the same daily JSON the browser agent is asked for:
+
+    [{"date": "2025-09-16", "high": 78, "low": 61, "conditions": "Sunny",
+      "wind": "South wind 5 to 9 mph.", "precip": 20}, ...]
+
+Period labels ("Tonight", "Wednesday", "Labor Day") are dated from the page's
+"Last Update" / "Forecast Valid" line, which is in the forecast's local time,
+not from the server's clock. Only html.parser and regular expressions are used,
+so saved pages can be checked offline:
+
+    python shared/forecast_parser.py saved_page.html --today 2025-09-16
+"""
+import argparse
+import json
+import re
+import sys
+from datetime import date, timedelta
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote_plus, urlparse
+
+SEARCH_URL = "https://forecast.weather.gov/zipcity.php?inputstring={query}"
+PRINTABLE_URL = "https://forecast.weather.gov/MapClick.php?lat={lat}&lon={lon}&unit=0&lg=english&FcstType=text&TextType=1"
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+TODAY_LABELS = ("today", "this afternoon", "rest of today", "this morning")
+TONIGHT_LABELS = ("tonight", "overnight", "rest of tonight")
+# Holidays replace the weekday name, e.g. "Labor Day" / "Independence Day Night"
+HOLIDAYS = (
+    "new year's day", "new year's eve", "martin luther king jr. day", "martin luther king jr day", "mlk day",
+    "presidents day", "presidents' day", "washington's birthday", "memorial day", "juneteenth",
+    "independence day", "labor day", "columbus day", "indigenous peoples' day", "indigenous peoples day",
+    "veterans day", "thanksgiving day", "thanksgiving", "christmas eve", "christmas day", "christmas",
+)
+PERIOD_PATTERN = re.compile(
+    r"^(?:today|tonight|overnight|this afternoon|this morning|rest of today|rest of tonight|"
+    r"(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)(?: night)?|"
+    rf"(?:{'|'.join(re.escape(name) for name in HOLIDAYS)})(?: night)?)$"
+)
+# "Last Update: 2:28 pm PDT Sep 16, 2025" / "Forecast Valid: 3pm PDT Sep 16, 2025-6pm PDT Sep 23, 2025"
+ISSUED_PATTERN = re.compile(
+    r"(?:last update|forecast valid)\s*:?\s*(?:<[^>]*>\s*)*"
+    r"\d{1,2}(?::\d{2})?\s*[ap]m\s+[a-z]+\s+([a-z]{3})[a-z]*\.?\s+(\d{1,2}),\s*(\d{4})",
+    re.IGNORECASE,
+)
+
+TEMPERATURE_PATTERN = re.compile(r"\b(high|low)s? (?:near|around|of) (-?\d+)", re.IGNORECASE)
+PRECIP_PATTERN = re.compile(r"chance of precipitation is (\d+)%", re.IGNORECASE)
+SENTENCE_PATTERN = re.compile(r"[^.]+\.")
+
+BLOCK_TAGS = {"div", "td", "tr", "table", "p", "li", "hr"}
+
+
+class ForecastPageError(ValueError):
+    """The page does not contain a point forecast"""
+
+
+class PeriodCollector(HTMLParser):
+    """Flattens a page into label / text / break events"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.events: List[Tuple[str, str]] = []
+        self._label_depth: List[str] = []
+        self._label_text: List[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip += 1
+            return
+        classes = (dict(attrs).get("class") or "").split()
+        if tag == "b" or "forecast-label" in classes:
+            self._label_depth.append(tag)
+            return
+        if tag == "br":
+            self.events.append(("break", tag))
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            self._skip = max(self._skip - 1, 0)
+            return
+        if self._label_depth and self._label_depth[-1] == tag:
+            self._label_depth.pop()
+            if not self._label_depth:
+                label = " ".join("".join(self._label_text).split()).rstrip(":").strip()
+                self._label_text = []
+                if label:
+                    self.events.append(("label", label))
+            return
+        if tag in BLOCK_TAGS:
+            self.events.append(("break", tag))
+
+    def handle_data(self, data):
+        if self._skip:
+            return
+        if self._label_depth:
+            self._label_text.append(data)
+        elif data.strip():
+            self.events.append(("text", data))
+
+
+def extract_periods(html: str) -> List[Tuple[str, str]]:
+    """(label, text) for every forecast period on the page, in order"""
+    collector = PeriodCollector()
+    collector.feed(html)
+
+    periods: List[Tuple[str, str]] = []
+    label: Optional[str] = None
+    text: List[str] = []
+    for kind, value in collector.events + [("label", "")]:
+        if kind == "text" and label is not None:
+            text.append(value)
+            continue
+        # Block ends finish a period once it has text; labels always do
+        if kind == "label" or (kind == "break" and value != "br" and text):
+            if label is not None and text:
+                periods.append((label, " ".join(" ".join(text).split()).lstrip(": ")))
+            label, text = None, []
+            if kind == "label" and PERIOD_PATTERN.match(value.lower()):
+                label = value
+    return periods
+
+
+def period_dates(labels: List[str], today: date) -> List[Tuple[date, bool]]:
+    """(date, is_night) for each period label, counting forward from ``today``"""
+    results: List[Tuple[date, bool]] = []
+    cursor = today
+    day_seen = set()
+    for label in labels:
+        name = label.lower()
+        night = name.endswith(" night") or name in TONIGHT_LABELS
+        base = name[:-len(" night")] if name.endswith(" night") else name
+
+        if name in TODAY_LABELS or name in TONIGHT_LABELS:
+            day = today
+        elif base in WEEKDAYS:
+            day = cursor + timedelta(days=(WEEKDAYS.index(base) - cursor.weekday()) % 7)
+            if not night and day in day_seen:
+                day += timedelta(days=7)
+        elif night:
+            day = cursor
+        else:
+            # Holiday names: the day after the last daytime period
+            day = cursor + timedelta(days=1) if cursor in day_seen else cursor
+
+        if not night:
+            day_seen.add(day)
+        cursor = day
+        results.append((day, night))
+    return results
+
+
+def issued_date(html: str) -> Optional[date]:
+    """Local date of the forecast's "Last Update" or "Forecast Valid" line, None if the page has neither"""
+    match = ISSUED_PATTERN.search(html)
+    if not match:
+        return None
+    month, day, year = match.groups()
+    if month.lower() not in MONTHS:
+        return None
+    try:
+        return date(int(year), MONTHS.index(month.lower()) + 1, int(day))
+    except ValueError:
+        return None
+
+
+def conditions_from(text: str) -> str:
+    first = SENTENCE_PATTERN.match(text)
+    sentence = first.group(0) if first else text
+    return re.split(r",? (?:with|and) (?:a )?(?:high|low)s? ", sentence, maxsplit=1, flags=re.IGNORECASE)[0].rstrip(". ")
+
+
+def wind_from(text: str) -> Optional[str]:
+    for sentence in SENTENCE_PATTERN.findall(text):
+        if "wind" in sentence.lower():
+            return sentence.strip()
+    return None
+
+
+def parse_forecast_html(html: str, today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Daily forecasts from a weather.gov forecast page.
+
+    Periods are dated from ``today`` if given, else from the page's own
+    issuance date, else from the server's date. Raises ForecastPageError when
+    no forecast periods are found, e.g. on a search results page or an error
+    page.
+    """
+    periods = extract_periods(html)
+    if not periods:
+        raise ForecastPageError("No forecast periods found on page")
+
+    today = today or issued_date(html) or date.today()
+    days: Dict[date, Dict[str, Any]] = {}
+    for (label, text), (day, night) in zip(periods, period_dates([p[0] for p in periods], today)):
+        entry = days.setdefault(day, {
+            "date": day.isoformat(), "high": None, "low": None, "conditions": None, "wind": None, "precip": 0,
+        })
+        for kind, value in TEMPERATURE_PATTERN.findall(text):
+            entry[kind.lower()] = int(value)
+        precip = PRECIP_PATTERN.search(text)
+        if precip:
+            entry["precip"] = max(entry["precip"], int(precip.group(1)))
+        # Daytime wording describes the day; night only fills gaps. A period
+        # without a wind sentence keeps what an earlier one found.
+        conditions = conditions_from(text)
+        if conditions and (not night or entry["conditions"] is None):
+            entry["conditions"] = conditions
+        wind = wind_from(text)
+        if wind is not None and (not night or entry["wind"] is None):
+            entry["wind"] = wind
+    return list(days.values())
+
+
+def search_url(city: str) -> str:
+    return SEARCH_URL.format(query=quote_plus(city))
+
+
+def printable_url(forecast_url: str) -> Optional[str]:
+    """Printable forecast URL for a MapClick page URL with lat/lon, else None"""
+    query = parse_qs(urlparse(forecast_url).query)
+    if "lat" not in query or "lon" not in query:
+        return None
+    return PRINTABLE_URL.format(lat=query["lat"][0], lon=query["lon"][0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("html_files", nargs="+", help="Saved weather.gov forecast pages")
+    parser.add_argument("--today", type=date.fromisoformat, help="Date to count periods from (default: the page's update date)")
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.html_files:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            html = f.read()
+        try:
+            print(f"# {path}\n{json.dumps(parse_forecast_html(html, args.today), indent=2)}")
+        except ForecastPageError as e:
+            print(f"# {path}: {e}", file=sys.stderr)
+            failed += 1
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Request deadlines
+
+Callers send the time by which they need an answer in the ``X-Request-Deadline``
+header, as a Unix timestamp in seconds. It is absolute rather than a remaining
+budget so that a header set once per connection, as MCP clients do, stays right
+for every call made on it.
+
+Each service binds the parsed deadline to the request it is serving through
+``request_deadline``; the helpers here read it to bound timeouts and to stop
+work for a caller that has already timed out. How a deadline is bound and
+enforced is up to the service's own ``deadline`` module.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Optional
+
+DEADLINE_HEADER = "x-request-deadline"
+
+# Monotonic deadline of the request being served, None when the caller set none
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The caller's deadline passed before the work finished"""
+
+
+def parse_deadline(value: Optional[str]) -> Optional[float]:
+    """Monotonic deadline for an X-Request-Deadline header value, None if absent or malformed"""
+    if not value:
+        return None
+    try:
+        epoch = float(value)
+    except ValueError:
+        return None
+    return time.monotonic() + (epoch - time.time())
+
+
+def remaining_seconds() -> Optional[float]:
+    """Seconds left until the current deadline (negative once passed), None without one"""
+    deadline = request_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def bounded_timeout(default: float) -> float:
+    """``default`` capped at the time left until the current deadline"""
+    remaining = remaining_seconds()
+    return default if remaining is None else max(min(default, remaining), 0.0)
+
+
+def check_deadline(what: str) -> None:
+    """Raise DeadlineExceeded if the current deadline has passed"""
+    remaining = remaining_seconds()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+
+
+@contextmanager
+def stop_at_deadline(stop: Callable[[], None]) -> Iterator[None]:
+    """Call ``stop`` from a timer thread if the current deadline passes while the block runs.
+
+    For blocking work that cannot be cancelled from the inside, such as a
+    streamed interpreter execution or a synchronous agent run.
+    """
+    remaining = remaining_seconds()
+    if remaining is None:
+        yield
+        return
+    timer = threading.Timer(max(remaining, 0.0), stop)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield
+    finally:
+        timer.cancel()
@@ -0,0 +1,168 @@
+"""
+Local GOOD/OK/POOR classifier for daily forecasts
+
+Applies the fixed rules the agent used to ask a model to write code for:
+
+    GOOD: high of 65-80°F and clear skies
+    OK:   high of 55-85°F and clear or partly cloudy skies
+    POOR: anything else (high below 55°F or above 85°F, overcast, or wet)
+
+Skies are clear (sunny, clear, fair), partly cloudy (partly, mostly sunny,
+few or scattered clouds), wet, or otherwise overcast; only clear and partly
+cloudy days can be GOOD or OK. A day counts as wet when its conditions mention
+rain, showers, storms, snow, ice and the like as whole words, so "nice" or
+"slice" do not, or its chance of precipitation is at least 60%. Forecasts are
+the loosely structured JSON the browser task returns, so field names and
+values like "78°F" or "40%" are normalized before classification. Custom
+rules still go through generate_analysis_code + execute_code.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+GOOD_RANGE = (65.0, 80.0)
+OK_RANGE = (55.0, 85.0)
+WET_PRECIP_PERCENT = 60.0
+
+DATE_KEYS = ("date", "day", "name", "period")
+HIGH_KEYS = ("high", "high_temp", "high_f", "temp_high", "temperature_high", "max", "max_temp", "temperature", "temp")
+LOW_KEYS = ("low", "low_temp", "low_f", "temp_low", "temperature_low", "min", "min_temp")
+CONDITION_KEYS = ("conditions", "condition", "forecast", "short_forecast", "weather", "description", "summary")
+PRECIP_KEYS = ("precip", "precipitation", "precip_chance", "chance_of_precipitation", "pop")
+
+CLEAR_WORDS = ("sunny", "clear", "fair")
+PARTLY_WORDS = ("partly", "mostly sunny", "mostly clear", "few clouds", "scattered clouds")
+WET_WORDS = (
+    "rain", "rainy", "shower", "showers", "storm", "storms", "stormy", "thunderstorm", "thunderstorms", "thunder",
+    "snow", "snowy", "sleet", "drizzle", "hail", "flurry", "flurries", "ice", "icy", "freezing",
+)
+WET_PATTERN = re.compile(r"\b(?:" + "|".join(WET_WORDS) + r")\b")
+
+Classification = List[Tuple[str, str]]
+
+
+class ForecastParseError(ValueError):
+    """The weather data could not be read as a daily forecast"""
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        match = re.search(r"-?\d+(?:\.\d+)?", value)
+        if match:
+            return float(match.group())
+    return None
+
+
+def _field(day: Dict[str, Any], keys: Tuple[str, ...]) -> Any:
+    lowered = {str(k).lower().replace(" ", "_"): v for k, v in day.items()}
+    for key in keys:
+        if lowered.get(key) not in (None, ""):
+            return lowered[key]
+    return None
+
+
+def _load_json(weather_data: Union[str, list, dict]) -> Any:
+    if not isinstance(weather_data, str):
+        return weather_data
+    text = weather_data.strip()
+    fenced = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1).strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        # Tolerate prose around the payload
+        start = min((i for i in (text.find("["), text.find("{")) if i >= 0), default=-1)
+        end = max(text.rfind("]"), text.rfind("}"))
+        if start < 0 or end <= start:
+            raise ForecastParseError("No JSON forecast found in weather data")
+        try:
+            return json.loads(text[start:end + 1])
+        except json.JSONDecodeError as e:
+            raise ForecastParseError(f"Invalid forecast JSON: {e}")
+
+
+def _days(payload: Any) -> List[Dict[str, Any]]:
+    """Daily entries of a single forecast payload"""
+    if isinstance(payload, dict):
+        for key in ("forecast", "forecasts", "days", "daily", "periods"):
+            if isinstance(payload.get(key), list):
+                payload = payload[key]
+                break
+    if not isinstance(payload, list) or not payload or not all(isinstance(d, dict) for d in payload):
+        raise ForecastParseError("Forecast must be a non-empty list of daily objects")
+    return payload
+
+
+def parse_forecast(weather_data: Union[str, list, dict]) -> List[Dict[str, Any]]:
+    """Daily entries of a single forecast, raising ForecastParseError if unreadable"""
+    return _days(_load_json(weather_data))
+
+
+def sky(conditions: str, precip: Optional[float]) -> str:
+    """Bucket a day's conditions into clear, partly, overcast or wet"""
+    text = (conditions or "").lower()
+    if WET_PATTERN.search(text) or (precip is not None and precip >= WET_PRECIP_PERCENT):
+        return "wet"
+    if any(word in text for word in PARTLY_WORDS):
+        return "partly"
+    if any(word in text for word in CLEAR_WORDS):
+        return "clear"
+    return "overcast"
+
+
+def label(high: Optional[float], sky_bucket: str) -> str:
+    if high is None:
+        return "POOR"
+    if GOOD_RANGE[0] <= high <= GOOD_RANGE[1] and sky_bucket == "clear":
+        return "GOOD"
+    if OK_RANGE[0] <= high <= OK_RANGE[1] and sky_bucket in ("clear", "partly"):
+        return "OK"
+    return "POOR"
+
+
+def classify_forecast(days: List[Dict[str, Any]]) -> Classification:
+    """Classify every day of one forecast in a single pass"""
+    dates = [str(_field(d, DATE_KEYS) or f"day {i + 1}") for i, d in enumerate(days)]
+    highs = [_number(_field(d, HIGH_KEYS)) for d in days]
+    lows = [_number(_field(d, LOW_KEYS)) for d in days]
+    # Night-only periods carry just a low
+    highs = [h if h is not None else l for h, l in zip(highs, lows)]
+    skies = [
+        sky(str(_field(d, CONDITION_KEYS) or ""), _number(_field(d, PRECIP_KEYS)))
+        for d in days
+    ]
+    return [(date, label(high, bucket)) for date, high, bucket in zip(dates, highs, skies)]
+
+
+def is_batch(payload: Any) -> bool:
+    """A {city: forecast} mapping rather than a single forecast"""
+    return (
+        isinstance(payload, dict)
+        and bool(payload)
+        and all(isinstance(v, (list, dict, str)) for v in payload.values())
+        and not any(isinstance(payload.get(k), list) for k in ("forecast", "forecasts", "days", "daily", "periods"))
+        and _field(payload, DATE_KEYS + HIGH_KEYS + CONDITION_KEYS) is None
+    )
+
+
+def classify_weather_data(weather_data: Union[str, list, dict]) -> Union[Classification, Dict[str, Any]]:
+    """Classify one forecast, or a {city: forecast} batch.
+
+    A single forecast returns [(date, label), ...] and raises ForecastParseError
+    when it cannot be read. A batch returns {city: [(date, label), ...]} with
+    {"error": ...} in place of any city whose forecast could not be read.
+    """
+    payload = _load_json(weather_data)
+    if not is_batch(payload):
+        return classify_forecast(_days(payload))
+
+    results: Dict[str, Any] = {}
+    for city, forecast in payload.items():
+        try:
+            results[city] = classify_forecast(_days(_load_json(forecast)))
+        except ForecastParseError as e:
+            results[city] = {"error": str(e)}
+    return results
@@ -1,4 +1,5 @@
 from strands import Agent, tool
+from strands.models import BedrockModel
 from strands_tools import use_aws
 from typing import Dict, Any
 import json
@@ -14,7 +15,13 @@ from langchain_aws import ChatBedrockConverse
 from bedrock_agentcore.tools.code_interpreter_client import CodeInterpreter
 from bedrock_agentcore.memory import MemoryClient
 from rich.console import Console
-import re
+
+from agent_pool import AgentPool
+from forecast_parser import ForecastPageError, parse_forecast_html, printable_url, search_url
+from weather_cache import WeatherCache
+from weather_classifier import ForecastParseError, classify_weather_data, parse_forecast
+from analysis_code_cache import ANALYSIS_CODE_CACHE_ENABLED, CLASSIFICATION_RULES, AnalysisCodeCache, extract_code
+from deadline import DeadlineExceeded, bounded_timeout, check_deadline, run_until_deadline, stop_at_deadline
 
 console = Console()
 
@@ -24,6 +31,14 @@ CODE_INTERPRETER_ID = os.getenv('CODE_INTERPRETER_ID')
 MEMORY_ID = os.getenv('MEMORY_ID')
 RESULTS_BUCKET = os.getenv('RESULTS_BUCKET', 'weather-results-bucket')
 AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
+# "direct" parses the printable forecast page and only falls back to the LLM browser agent; "agent" always uses it
+WEATHER_EXTRACTION_MODE = os.getenv('WEATHER_EXTRACTION_MODE', 'direct').lower()
+# Agents are reused across requests; one per concurrent agent run is enough
+AGENT_POOL_SIZE = int(os.getenv('AGENT_POOL_SIZE', os.getenv('AGENT_MAX_WORKERS', '4')))
+# How long a one-shot completion waits for a free plain agent, cut short by the request deadline
+AGENT_POOL_LEASE_TIMEOUT_SECONDS = float(os.getenv('AGENT_POOL_LEASE_TIMEOUT_SECONDS', '60'))
+# Playwright operation timeout of browser sessions, cut short by the request deadline
+BROWSER_TIMEOUT_SECONDS = 150
 
 # Check which capabilities are enabled
 HAS_BROWSER = bool(BROWSER_ID)
@@ -35,6 +50,15 @@ console.print(f"  Browser: {'✅' if HAS_BROWSER else '❌'}")
 console.print(f"  Code Interpreter: {'✅' if HAS_CODE_INTERPRETER else '❌'}")
 console.print(f"  Memory: {'✅' if HAS_MEMORY else '❌'}")
 
+# Forecasts change a few times a day, so repeat lookups skip the browser run
+weather_cache = WeatherCache()
+
+# One Bedrock model client shared by every agent in the process
+model = BedrockModel()
+
+# Classifier code generated once per forecast schema and reused
+analysis_code_cache = AnalysisCodeCache()
+
 async def run_browser_task(browser_session, bedrock_chat, task: str) -> str:
     """Run a browser automation task"""
     try:
@@ -62,7 +86,7 @@ async def initialize_browser_session():
         ws_url, headers = client.generate_ws_headers()
         console.print(f"[cyan]🔗 Browser WebSocket URL: {ws_url[:50]}...[/cyan]")
         
-        browser_profile = BrowserProfile(headers=headers, timeout=150000)
+        browser_profile = BrowserProfile(headers=headers, timeout=int(1000 * bounded_timeout(BROWSER_TIMEOUT_SECONDS)))
         browser_session = BrowserSession(cdp_url=ws_url, browser_profile=browser_profile, keep_alive=True)
         
         console.print("[cyan]🔄 Initializing browser session...[/cyan]")
@@ -75,7 +99,12 @@ async def initialize_browser_session():
         
         console.print("[green]✅ Browser session ready[/green]")
         return browser_session, bedrock_chat, client
-        
+
+    except asyncio.CancelledError:
+        # Cancelled at the request deadline mid-start; the caller never gets the client to stop
+        with suppress(Exception):
+            client.stop()
+        raise
     except Exception as e:
         console.print(f"[red]❌ Failed to initialize browser: {e}[/red]")
         raise
@@ -86,12 +115,41 @@ async def get_weather_data(city: str) -> Dict[str, Any]:
     if not HAS_BROWSER:
         return {"status": "error", "content": [{"text": "Browser capability not enabled"}]}
     
+    # Cancelling the fetch at the deadline closes its browser session and stops the remote browser
+    try:
+        check_deadline(f"fetching weather for {city}")
+        return await run_until_deadline(
+            weather_cache.get_or_compute(city, lambda: fetch_weather_data(city)), f"weather fetch for {city}"
+        )
+    except DeadlineExceeded as e:
+        return {"status": "error", "content": [{"text": f"Error: {str(e)}"}]}
+
+async def extract_forecast_direct(browser_session, city: str) -> list:
+    """Navigate straight to the printable forecast over CDP and parse it, no LLM involved"""
+    page = await browser_session.get_current_page()
+    await page.goto(search_url(city), wait_until="domcontentloaded")
+    url = printable_url(page.url)
+    if url is None:
+        raise ForecastPageError(f"weather.gov search for {city!r} did not resolve to a forecast ({page.url})")
+    await page.goto(url, wait_until="domcontentloaded")
+    return parse_forecast_html(await page.content())
+
+async def fetch_weather_data(city: str) -> Dict[str, Any]:
+    """Drive a browser session through weather.gov to extract the forecast"""
     browser_session = None
+    browser_client = None
     
     try:
         console.print(f"[cyan]🌐 Getting weather data for {city}[/cyan]")
         
         browser_session, bedrock_chat, browser_client = await initialize_browser_session()
+
+        if WEATHER_EXTRACTION_MODE == "direct":
+            try:
+                days = await extract_forecast_direct(browser_session, city)
+                return {"status": "success", "content": [{"text": json.dumps(days)}]}
+            except Exception as e:
+                console.print(f"[yellow]⚠️ Direct forecast extraction failed ({e}), using browser agent[/yellow]")
         
         task = f"""Extract 8-Day Weather Forecast for {city} from weather.gov
         Steps:
@@ -103,9 +161,6 @@ async def get_weather_data(city: str) -> Dict[str, Any]:
         """
         
         result = await run_browser_task(browser_session, bedrock_chat, task)
-        
-        if browser_client:
-            browser_client.stop()
 
         return {"status": "success", "content": [{"text": result}]}
         
@@ -117,27 +172,44 @@ async def get_weather_data(city: str) -> Dict[str, Any]:
         if browser_session:
             with suppress(Exception):
                 await browser_session.close()
+        if browser_client:
+            with suppress(Exception):
+                browser_client.stop()
 
 @tool
 def generate_analysis_code(weather_data: str) -> Dict[str, Any]:
     """Generate Python code for weather classification"""
     try:
+        check_deadline("generating analysis code")
+        if ANALYSIS_CODE_CACHE_ENABLED:
+            try:
+                days = parse_forecast(weather_data)
+            except ForecastParseError:
+                days = None
+            if days:
+                python_code = analysis_code_cache.program_for(days, complete)
+                return {"status": "success", "content": [{"text": python_code}]}
+
         query = f"""Create Python code to classify weather days as GOOD/OK/POOR:
-        Rules: GOOD: 65-80°F clear, OK: 55-85°F partly cloudy, POOR: <55°F or >85°F
+        Rules: {CLASSIFICATION_RULES}
         Weather data: {weather_data}
         Return code that outputs list of tuples: [('2025-09-16', 'GOOD'), ...]"""
         
-        agent = Agent()
-        result = agent(query)
-        
-        pattern = r'```(?:json|python)\n(.*?)\n```'
-        match = re.search(pattern, result.message['content'][0]['text'], re.DOTALL)
-        python_code = match.group(1).strip() if match else result.message['content'][0]['text']
+        python_code = extract_code(complete(query))
         
         return {"status": "success", "content": [{"text": python_code}]}
     except Exception as e:
         return {"status": "error", "content": [{"text": f"Error: {str(e)}"}]}
 
+@tool
+def classify_weather(weather_data: str) -> Dict[str, Any]:
+    """Classify forecast days as GOOD/OK/POOR with the standard rules, locally.
+    Accepts the forecast JSON from get_weather_data, or a JSON object mapping cities to forecasts."""
+    try:
+        return {"status": "success", "content": [{"text": json.dumps(classify_weather_data(weather_data))}]}
+    except ForecastParseError as e:
+        return {"status": "error", "content": [{"text": f"Could not classify forecast ({e}); use generate_analysis_code and execute_code instead"}]}
+
 @tool
 def execute_code(python_code: str) -> Dict[str, Any]:
     """Execute Python code using AgentCore Code Interpreter"""
@@ -145,17 +217,21 @@ def execute_code(python_code: str) -> Dict[str, Any]:
         return {"status": "error", "content": [{"text": "Code Interpreter capability not enabled"}]}
     
     try:
+        check_deadline("starting the code interpreter")
         code_client = CodeInterpreter(AWS_REGION)
         code_client.start(identifier=CODE_INTERPRETER_ID)
 
-        response = code_client.invoke("executeCode", {
-            "code": python_code,
-            "language": "python",
-            "clearContext": True
-        })
+        # Stopping the session at the deadline ends the remote execution and its result stream
+        with stop_at_deadline(code_client.stop):
+            response = code_client.invoke("executeCode", {
+                "code": python_code,
+                "language": "python",
+                "clearContext": True
+            })
 
-        for event in response["stream"]:
-            code_execute_result = json.dumps(event["result"])
+            for event in response["stream"]:
+                code_execute_result = json.dumps(event["result"])
+        check_deadline("the code interpreter returned")
         
         analysis_results = json.loads(code_execute_result)
         console.print("Analysis results:", analysis_results)
@@ -225,6 +301,21 @@ def store_activity_plan(city: str, plan: str) -> Dict[str, Any]:
     except Exception as e:
         return {"status": "error", "content": [{"text": f"Error storing plan: {str(e)}"}]}
 
+def result_text(result) -> str:
+    """Concatenated text blocks of an agent result's final message"""
+    return "".join(block.get("text", "") for block in result.message['content'])
+
+def create_plain_agent() -> Agent:
+    """Tool-less agent for one-shot completions (code generation, fast-path reasoning)"""
+    return Agent(model=model)
+
+plain_agent_pool = AgentPool(create_plain_agent, AGENT_POOL_SIZE, AGENT_POOL_LEASE_TIMEOUT_SECONDS)
+
+def complete(prompt: str) -> str:
+    """One-shot completion on a pooled plain agent (blocking); raises AgentPoolTimeout if none frees up"""
+    with plain_agent_pool.lease(timeout=bounded_timeout(AGENT_POOL_LEASE_TIMEOUT_SECONDS)) as agent:
+        return result_text(agent(prompt))
+
 def create_weather_agent() -> Agent:
     """Create the weather agent with all tools"""
     system_prompt = f"""You are a Weather-Based Activity Planning Assistant with memory.
@@ -234,8 +325,8 @@ def create_weather_agent() -> Agent:
     2. Call get_activity_preferences() to check if user has stored preferences
     3. If user mentions preferences in their query (e.g., "I like hiking"), call store_user_preferences() to save them
     4. Call get_weather_data(city) to get weather forecast
-    5. Call generate_analysis_code(weather_data) to create classification code
-    6. Call execute_code(python_code) to classify weather days
+    5. Call classify_weather(weather_data) to classify weather days
+    6. Only if classify_weather fails or the user asks for custom rules, call generate_analysis_code(weather_data) and then execute_code(python_code) instead
     7. Generate personalized activity recommendations based on weather and preferences
     8. Call store_activity_plan(city, plan) to save the plan in memory for future reference
     9. Store results.md in S3 Bucket: {RESULTS_BUCKET} via use_aws tool
@@ -243,8 +334,9 @@ def create_weather_agent() -> Agent:
     Memory stores user preferences across sessions. Always check memory first and save new preferences/plans."""
     
     return Agent(
-        tools=[get_weather_data, generate_analysis_code, execute_code, store_user_preferences, get_activity_preferences, store_activity_plan, use_aws],
+        tools=[get_weather_data, classify_weather, generate_analysis_code, execute_code, store_user_preferences, get_activity_preferences, store_activity_plan, use_aws],
         system_prompt=system_prompt,
+        model=model,
         name="WeatherActivityPlanner"
     )
 
@@ -260,19 +352,15 @@ async def async_main(query=None):
     
     try:
         os.environ["BYPASS_TOOL_CONSENT"] = "True"
-        result = agent(query)
-        return {"status": "completed", "result": result.message['content'][0]['text']}
+        result = await agent.invoke_async(query)
+        return {"status": "completed", "result": result_text(result)}
         
     except Exception as e:
         console.print(f"[red]❌ Error: {e}[/red]")
         return {"status": "error", "error": str(e)}
 
 if __name__ == "__main__":
-    console.print("🚀 Strands Agent Running on EKS")
-    console.print("Waiting for requests...")
-    console.print("Press Ctrl+C to exit")
-    
-    # Keep container running
-    import time
-    while True:
-        time.sleep(3600)
+    # One-off query from the command line; the container serves api_server.py
+    import sys
+    outcome = asyncio.run(async_main(" ".join(sys.argv[1:]) or None))
+    console.print(outcome.get("result") or outcome.get("error"))
@@ -0,0 +1,131 @@
+"""
+Pool of reusable Strands agents
+
+Building an Agent generates tool specs and a model client, so agents are built
+once (up to ``size``) and checked out per request instead. When an agent comes
+back everything a request leaves on it is put back as it was when the agent was
+built: messages, agent state, the conversation manager's counters, the event
+loop metrics (strands appends a trace and an invocation per call) and the
+callback handler. Each checkout therefore starts fresh and pooled agents do not
+grow. Agents are not safe to run concurrently, which is why each one is leased
+to a single caller at a time.
+"""
+import copy
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from strands import Agent
+from strands.agent.state import AgentState
+from strands.telemetry.metrics import EventLoopMetrics
+
+
+class AgentPoolTimeout(Exception):
+    """No agent became available before the lease timeout"""
+
+
+class _Baseline:
+    """What an agent looked like when it was built"""
+
+    def __init__(self, agent: Agent):
+        self.callback_handler = agent.callback_handler
+        self.state = copy.deepcopy(agent.state.get())
+        self.conversation_state = agent.conversation_manager.get_state()
+
+    def restore(self, agent: Agent) -> None:
+        agent.messages.clear()
+        agent.state = AgentState(self.state)
+        agent.conversation_manager.restore_from_session(self.conversation_state)
+        agent.event_loop_metrics = EventLoopMetrics()
+        agent.callback_handler = self.callback_handler
+
+
+class AgentPool:
+    """Thread-safe pool of at most ``size`` agents built lazily by ``factory``"""
+
+    def __init__(self, factory: Callable[[], Agent], size: int, lease_timeout_seconds: Optional[float] = None):
+        self.factory = factory
+        self.size = max(size, 1)
+        self.lease_timeout_seconds = lease_timeout_seconds
+
+        self._idle: "queue.LifoQueue[Agent]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._built = 0
+        self._baselines: Dict[int, _Baseline] = {}
+
+        self.checkouts = 0
+        self.waits = 0
+        self.resets_failed = 0
+
+    def fill(self) -> None:
+        """Build every agent up front (blocking), e.g. at startup"""
+        while True:
+            agent = self._build()
+            if agent is None:
+                return
+            self._idle.put(agent)
+
+    def _build(self) -> Optional[Agent]:
+        with self._lock:
+            if self._built >= self.size:
+                return None
+            self._built += 1
+        try:
+            agent = self.factory()
+        except Exception:
+            with self._lock:
+                self._built -= 1
+            raise
+        self._baselines[id(agent)] = _Baseline(agent)
+        return agent
+
+    def acquire(self, timeout: Optional[float] = None) -> Agent:
+        try:
+            agent = self._idle.get_nowait()
+        except queue.Empty:
+            agent = self._build()
+            if agent is None:
+                with self._lock:
+                    self.waits += 1
+                try:
+                    agent = self._idle.get(timeout=timeout if timeout is not None else self.lease_timeout_seconds)
+                except queue.Empty:
+                    raise AgentPoolTimeout(f"No agent available out of {self.size}")
+        with self._lock:
+            self.checkouts += 1
+        return agent
+
+    def release(self, agent: Agent) -> None:
+        """Reset an agent to how it was built and return it to the pool"""
+        try:
+            self._baselines[id(agent)].restore(agent)
+        except Exception:
+            # A half-reset agent could leak state into the next request; rebuild instead
+            with self._lock:
+                self._built -= 1
+                self.resets_failed += 1
+            self._baselines.pop(id(agent), None)
+            return
+        self._idle.put(agent)
+
+    @contextmanager
+    def lease(self, callback_handler=None, timeout: Optional[float] = None) -> Iterator[Agent]:
+        agent = self.acquire(timeout)
+        if callback_handler is not None:
+            agent.callback_handler = callback_handler
+        try:
+            yield agent
+        finally:
+            self.release(agent)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "built": self._built,
+                "idle": self._idle.qsize(),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "resets_failed": self.resets_failed,
+            }
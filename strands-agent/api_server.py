@@ -0,0 +1,279 @@
+"""
+OpenAI-compatible HTTP API for the weather agent
+
+Serves /v1/chat/completions (streamed and non-streamed) on PORT. Agent runs
+are synchronous Strands calls, so they execute on a bounded worker pool and
+the event loop only shuttles requests and stream chunks. Requests that cannot
+get a worker or finish within the timeout fail fast instead of piling up; a
+worker slot is only freed once its run has actually finished. Runs check
+out pre-built agents from a pool instead of constructing one per request.
+Requests for FAST_MODEL_ID run the deterministic fast-path plan instead of
+the free-form agent. A caller's X-Request-Deadline shortens the timeout; the
+run is cancelled when it passes and its tools stop their remote work.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from agent import complete, console, create_weather_agent, plain_agent_pool, result_text
+from agent_pool import AgentPool
+from deadline import DEADLINE_HEADER, DeadlineExceeded, bind_deadline, parse_deadline, run_until_deadline, stop_at_deadline
+from fast_path import default_tools, plan_activities
+
+PORT = int(os.getenv('PORT', '8000'))
+AGENT_MAX_WORKERS = int(os.getenv('AGENT_MAX_WORKERS', '4'))
+AGENT_REQUEST_TIMEOUT_SECONDS = float(os.getenv('AGENT_REQUEST_TIMEOUT_SECONDS', '150'))
+MODEL_ID = "strands-weather-agent"
+FAST_MODEL_ID = "strands-weather-agent-fast"
+
+executor = ThreadPoolExecutor(max_workers=AGENT_MAX_WORKERS, thread_name_prefix="agent")
+agent_pool = AgentPool(create_weather_agent, AGENT_MAX_WORKERS)
+fast_path_tools = default_tools()
+slots: Optional[asyncio.Semaphore] = None
+ready = False
+in_flight = 0
+
+
+def extract_prompt(messages: List[Dict[str, Any]]) -> Optional[str]:
+    """Text of the last user message (string or OpenAI content parts)"""
+    for message in reversed(messages):
+        if message.get("role") != "user":
+            continue
+        content = message.get("content")
+        if isinstance(content, list):
+            content = "".join(part.get("text", "") for part in content if part.get("type") == "text")
+        return content
+    return None
+
+
+def completion_chunk(completion_id: str, model: str, delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+class StreamForwarder:
+    """Strands callback handler that forwards text and tool starts to an asyncio queue"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        self.loop = loop
+        self.queue = queue
+        self.seen_tools = set()
+
+    def __call__(self, **kwargs):
+        if kwargs.get("data"):
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, {"content": kwargs["data"]})
+
+        tool_use = kwargs.get("current_tool_use") or {}
+        tool_use_id = tool_use.get("toolUseId")
+        if tool_use_id and tool_use_id not in self.seen_tools:
+            self.seen_tools.add(tool_use_id)
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, {"tool_calls": [{
+                "index": len(self.seen_tools) - 1,
+                "id": tool_use_id,
+                "type": "function",
+                "function": {"name": tool_use.get("name", ""), "arguments": ""},
+            }]})
+
+
+def run_agent(prompt: str, callback_handler=None, fast: bool = False, deadline: Optional[float] = None) -> str:
+    """Run a pooled agent (or the fast path) to completion and return its text (runs on a worker thread).
+
+    The deadline is visible to the tools; at the deadline the agent is cancelled
+    at its next model or tool boundary.
+    """
+    with bind_deadline(deadline):
+        if fast:
+            return asyncio.run(run_until_deadline(
+                plan_activities(prompt, fast_path_tools, complete, callback_handler), "the fast-path plan"
+            ))
+        cancelled = threading.Event()
+        with agent_pool.lease(callback_handler) as agent, stop_at_deadline(cancelled.set):
+            result = agent(prompt, cancel_signal=cancelled)
+        if cancelled.is_set():
+            raise DeadlineExceeded("Deadline exceeded during the agent run")
+        return result_text(result)
+
+
+async def acquire_slot(timeout: float) -> bool:
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout=timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+def start_run(prompt: str, deadline: float, callback_handler=None, fast: bool = False) -> asyncio.Future:
+    """Submit an agent run for a request that holds a slot; the slot is released when the run ends"""
+    global in_flight
+
+    in_flight += 1
+    future = asyncio.get_running_loop().run_in_executor(executor, run_agent, prompt, callback_handler, fast, deadline)
+
+    def finished(_):
+        global in_flight
+        in_flight -= 1
+        slots.release()
+
+    future.add_done_callback(finished)
+    return future
+
+
+def error_response(status: int, message: str, error_type: str) -> JSONResponse:
+    return JSONResponse({"error": {"message": message, "type": error_type}}, status_code=status)
+
+
+async def chat_completions(request: Request):
+    body = await request.json()
+    prompt = extract_prompt(body.get("messages", []))
+    if not prompt:
+        return error_response(400, "No user message in request", "invalid_request_error")
+
+    deadline = time.monotonic() + AGENT_REQUEST_TIMEOUT_SECONDS
+    caller_deadline = parse_deadline(request.headers.get(DEADLINE_HEADER))
+    if caller_deadline is not None:
+        deadline = min(deadline, caller_deadline)
+        if deadline <= time.monotonic():
+            return error_response(504, "Request deadline already passed", "timeout")
+    if not await acquire_slot(deadline - time.monotonic()):
+        return error_response(503, "All agent workers are busy", "overloaded")
+
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    model = FAST_MODEL_ID if body.get("model") == FAST_MODEL_ID else MODEL_ID
+    fast = model == FAST_MODEL_ID
+    console.print(f"[bold blue]🔍 Query{' (fast path)' if fast else ''}:[/bold blue] {prompt[:200]}")
+
+    if body.get("stream"):
+        queue: asyncio.Queue = asyncio.Queue()
+        future = start_run(prompt, deadline, StreamForwarder(asyncio.get_running_loop(), queue), fast)
+        # Wake the relay loop when the run finishes
+        future.add_done_callback(lambda _: queue.put_nowait(None))
+        return StreamingResponse(
+            stream_completion(completion_id, model, future, queue, deadline),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    future = start_run(prompt, deadline, fast=fast)
+    try:
+        text = await asyncio.wait_for(asyncio.shield(future), timeout=deadline - time.monotonic())
+    except (asyncio.TimeoutError, DeadlineExceeded):
+        return error_response(504, "Agent run timed out", "timeout")
+    except Exception as e:
+        console.print(f"[red]❌ Error: {e}[/red]")
+        return error_response(500, str(e), "agent_error")
+
+    return JSONResponse({
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": "stop",
+        }],
+    })
+
+
+async def stream_completion(
+    completion_id: str,
+    model: str,
+    future: asyncio.Future,
+    queue: asyncio.Queue,
+    deadline: float,
+) -> AsyncGenerator[str, None]:
+    """Relay a running agent's output as OpenAI-style SSE chunks"""
+    yield completion_chunk(completion_id, model, {"role": "assistant"})
+    while True:
+        try:
+            delta = await asyncio.wait_for(queue.get(), timeout=deadline - time.monotonic())
+        except asyncio.TimeoutError:
+            yield completion_chunk(completion_id, model, {"content": "\n\n⏱️ Agent run timed out."}, "length")
+            break
+        if delta is None:
+            error = None if future.cancelled() else future.exception()
+            if isinstance(error, DeadlineExceeded):
+                yield completion_chunk(completion_id, model, {"content": "\n\n⏱️ Agent run timed out."}, "length")
+            elif error is not None:
+                console.print(f"[red]❌ Error: {error}[/red]")
+                yield completion_chunk(completion_id, model, {"content": f"\n\n❌ Error: {error}"}, "stop")
+            else:
+                yield completion_chunk(completion_id, model, {}, "stop")
+            break
+        yield completion_chunk(completion_id, model, delta)
+    yield "data: [DONE]\n\n"
+
+
+async def list_models(request: Request):
+    return JSONResponse({
+        "object": "list",
+        "data": [
+            {"id": MODEL_ID, "object": "model", "owned_by": "strands"},
+            {"id": FAST_MODEL_ID, "object": "model", "owned_by": "strands"},
+        ],
+    })
+
+
+async def health(request: Request):
+    return JSONResponse({"status": "healthy"})
+
+
+async def readiness(request: Request):
+    status = {
+        "ready": ready,
+        "workers": AGENT_MAX_WORKERS,
+        "in_flight": in_flight,
+        "agent_pool": agent_pool.stats(),
+        "plain_agent_pool": plain_agent_pool.stats(),
+    }
+    return JSONResponse(status, status_code=200 if ready else 503)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    global slots, ready
+    slots = asyncio.Semaphore(AGENT_MAX_WORKERS)
+    # Build the agents up front so configuration errors surface before traffic arrives
+    await asyncio.get_running_loop().run_in_executor(executor, agent_pool.fill)
+    ready = True
+    console.print(f"[green]✅ Agent API ready on port {PORT} ({AGENT_MAX_WORKERS} workers)[/green]")
+    try:
+        yield
+    finally:
+        ready = False
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = Starlette(
+    routes=[
+        Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+        Route("/v1/models", list_models, methods=["GET"]),
+        Route("/health", health, methods=["GET"]),
+        Route("/ready", readiness, methods=["GET"]),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    os.environ["BYPASS_TOOL_CONSENT"] = "True"
+    console.print("🚀 Strands Agent API Running on EKS")
+    uvicorn.run(app, host="0.0.0.0", port=PORT)
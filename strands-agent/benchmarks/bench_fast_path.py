@@ -0,0 +1,111 @@
+"""
+Benchmark the fast-path plan against the sequential prompt-driven flow with stubbed tools
+
+Every tool and model call is a sleep with a configurable latency. The
+"sequential" run models the free-form agent: each of its steps costs a model
+turn to decide on the tool call plus the tool itself, in prompt order, with a
+final turn to write the answer. The "fast path" run is fast_path.plan_activities
+driven by the same stubs; the stub forecast parses, so it classifies locally
+instead of generating and executing code. Nothing here needs AWS or the
+strands packages.
+
+Usage:
+    python benchmarks/bench_fast_path.py --runs 5 --scale 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "shared"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fast_path import plan_activities
+
+# Seconds per call at scale 1.0, roughly what the deployed tools take
+TOOL_LATENCY = {
+    "get_activity_preferences": 0.4,
+    "store_user_preferences": 0.3,
+    "get_weather_data": 25.0,
+    "generate_analysis_code": 6.0,
+    "execute_code": 2.0,
+    "store_activity_plan": 0.3,
+    "store_results": 0.3,
+}
+MODEL_TURN_SECONDS = 2.5
+RECOMMENDATION_SECONDS = 8.0
+
+QUERY = "What should I do this weekend in Richmond VA? I like hiking and museums."
+FORECAST = json.dumps([
+    {"date": "2025-09-20", "high": "78°F", "low": "61°F", "conditions": "Sunny", "precip": "5%"},
+    {"date": "2025-09-21", "high": "83°F", "low": "66°F", "conditions": "Partly Cloudy", "precip": "20%"},
+])
+# Tool order the system prompt asks the free-form agent to follow
+PROMPT_ORDER = [
+    "get_activity_preferences",
+    "store_user_preferences",
+    "get_weather_data",
+    "generate_analysis_code",
+    "execute_code",
+    "store_activity_plan",
+    "store_results",
+]
+
+
+def stub_tools(scale: float):
+    def make(name):
+        async def tool(**kwargs):
+            await asyncio.sleep(TOOL_LATENCY[name] * scale)
+            text = FORECAST if name == "get_weather_data" else f"{name} ok"
+            return {"status": "success", "content": [{"text": text}]}
+        return tool
+
+    return {name: make(name) for name in TOOL_LATENCY}
+
+
+def stub_complete(scale: float):
+    def complete(prompt: str) -> str:
+        time.sleep(RECOMMENDATION_SECONDS * scale)
+        return "## Plan\n- Saturday: hike"
+    return complete
+
+
+async def sequential(scale: float) -> None:
+    tools = stub_tools(scale)
+    for name in PROMPT_ORDER:
+        await asyncio.sleep(MODEL_TURN_SECONDS * scale)
+        await tools[name]()
+    await asyncio.sleep(RECOMMENDATION_SECONDS * scale)
+
+
+async def fast_path(scale: float) -> None:
+    await plan_activities(QUERY, stub_tools(scale), stub_complete(scale))
+
+
+def run(name: str, flow, runs: int, scale: float) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        asyncio.run(flow(scale))
+        timings.append(time.perf_counter() - started)
+    mean = statistics.mean(timings)
+    print(f"{name:<11} runs={runs}  mean={mean:7.3f}s  min={min(timings):7.3f}s  max={max(timings):7.3f}s")
+    return mean
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=0.1, help="Multiplier applied to every stub latency")
+    args = parser.parse_args()
+
+    baseline = run("sequential", sequential, args.runs, args.scale)
+    fast = run("fast path", fast_path, args.runs, args.scale)
+    print(f"speedup: {baseline / fast:.2f}x ({(baseline - fast) * 1000 / args.scale:.0f}ms saved per request at scale 1.0)")
+
+
+if __name__ == "__main__":
+    main()
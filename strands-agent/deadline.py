@@ -0,0 +1,46 @@
+"""
+Request deadlines for agent runs
+
+The API server binds the caller's ``X-Request-Deadline`` to an agent run; tools
+read it to bound browser and interpreter work and to give up, releasing their
+sessions, once it has passed instead of running for a caller that has already
+timed out. Header parsing and the helpers tools use are shared with the MCP
+servers in ``request_deadline``.
+"""
+import asyncio
+from contextlib import contextmanager
+from typing import Awaitable, Iterator, Optional, TypeVar
+
+from request_deadline import (  # noqa: F401 - re-exported for the agent and API server
+    DEADLINE_HEADER,
+    DeadlineExceeded,
+    bounded_timeout,
+    check_deadline,
+    parse_deadline,
+    remaining_seconds,
+    request_deadline,
+    stop_at_deadline,
+)
+
+T = TypeVar("T")
+
+
+@contextmanager
+def bind_deadline(deadline: Optional[float]) -> Iterator[None]:
+    """Make ``deadline`` the current request's deadline for the block"""
+    token = request_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        request_deadline.reset(token)
+
+
+async def run_until_deadline(awaitable: Awaitable[T], what: str) -> T:
+    """Await ``awaitable``, cancelling it when the current deadline passes"""
+    remaining = remaining_seconds()
+    if remaining is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=max(remaining, 0.0))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Deadline exceeded during {what}") from None
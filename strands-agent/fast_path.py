@@ -0,0 +1,159 @@
+"""
+Deterministic fast path for the weather activity workflow
+
+The free-form agent walks the system prompt's steps one model turn at a time.
+This orchestrator runs the same workflow as a fixed plan: independent tools run
+concurrently with asyncio.gather and the model is only called for the steps
+that need reasoning (city extraction when the regex misses and the final
+recommendations).
+
+    1. preferences + weather (+ storing preferences stated in the query)
+    2. local classification, or generate_analysis_code -> execute_code when
+       the forecast cannot be parsed
+    3. recommendations from the model
+    4. store_activity_plan + results.md upload
+
+Tools and the completion function are injected so the plan can be exercised
+with stubs; default_tools() binds the real ones from agent.py.
+"""
+import asyncio
+import inspect
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from weather_classifier import ForecastParseError, classify_weather_data
+
+Tools = Dict[str, Callable[..., Any]]
+
+CITY_PATTERN = re.compile(r"\b(?:in|for|at|around|near)\s+([A-Z][\w.'-]*(?:\s+[A-Z][\w.'-]*)*(?:,?\s+[A-Z]{2})?)")
+PREFERENCE_PATTERN = re.compile(r"\bI\s+(?:really\s+)?(?:like|love|enjoy|prefer)\b[^.?!]*", re.IGNORECASE)
+
+
+def tool_text(result: Any) -> str:
+    """Text of a tool result dict, or str() of anything else"""
+    if isinstance(result, dict) and result.get("content"):
+        return "".join(block.get("text", "") for block in result["content"])
+    return str(result)
+
+
+def is_error(result: Any) -> bool:
+    return isinstance(result, dict) and result.get("status") == "error"
+
+
+def extract_city(query: str) -> Optional[str]:
+    match = CITY_PATTERN.search(query)
+    return match.group(1).strip() if match else None
+
+
+def extract_preferences(query: str) -> Optional[str]:
+    match = PREFERENCE_PATTERN.search(query)
+    return match.group(0).strip() if match else None
+
+
+async def call_tool(tools: Tools, name: str, callback_handler=None, **kwargs) -> Any:
+    """Invoke a sync or async tool without blocking the loop"""
+    if callback_handler is not None:
+        callback_handler(current_tool_use={"toolUseId": f"fast-{name}", "name": name})
+    tool = tools[name]
+    if inspect.iscoroutinefunction(tool):
+        return await tool(**kwargs)
+    result = await asyncio.to_thread(tool, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def classify_remotely(tools: Tools, weather: str, callback_handler=None) -> str:
+    """Model-written classifier run in the code interpreter, for forecasts the local parser cannot read"""
+    code = await call_tool(tools, "generate_analysis_code", callback_handler, weather_data=weather)
+    if is_error(code):
+        return "unavailable"
+    executed = await call_tool(tools, "execute_code", callback_handler, python_code=tool_text(code))
+    return "unavailable" if is_error(executed) else tool_text(executed)
+
+
+def recommendation_prompt(query: str, city: str, weather: str, classification: str, preferences: str) -> str:
+    return f"""You are a Weather-Based Activity Planning Assistant.
+    User request: {query}
+    City: {city}
+    Weather forecast: {weather}
+    Day classification (GOOD/OK/POOR): {classification}
+    User preferences: {preferences}
+
+    Recommend activities for each day that fit the weather and the user's preferences.
+    Answer in markdown."""
+
+
+async def plan_activities(
+    query: str,
+    tools: Tools,
+    complete: Callable[[str], str],
+    callback_handler=None,
+) -> str:
+    """Run the weather planning workflow and return the plan as markdown"""
+    city = extract_city(query)
+    if not city:
+        city = (await asyncio.to_thread(
+            complete, f"Reply with only the city (and state) named in this request, nothing else: {query}"
+        )).strip()
+
+    steps: Dict[str, Awaitable[Any]] = {
+        "preferences": call_tool(tools, "get_activity_preferences", callback_handler),
+        "weather": call_tool(tools, "get_weather_data", callback_handler, city=city),
+    }
+    stated = extract_preferences(query)
+    if stated:
+        steps["stored_preferences"] = call_tool(tools, "store_user_preferences", callback_handler, preferences=stated)
+    results = dict(zip(steps, await asyncio.gather(*steps.values())))
+
+    weather = results["weather"]
+    if is_error(weather):
+        return f"Sorry, I couldn't get the weather forecast for {city}: {tool_text(weather)}"
+    preferences = tool_text(results["preferences"])
+    if stated:
+        preferences = f"{preferences}\n{stated}"
+
+    try:
+        classification = json.dumps(classify_weather_data(tool_text(weather)))
+    except ForecastParseError:
+        classification = await classify_remotely(tools, tool_text(weather), callback_handler)
+
+    plan = (await asyncio.to_thread(
+        complete, recommendation_prompt(query, city, tool_text(weather), classification, preferences)
+    )).strip()
+
+    await asyncio.gather(
+        call_tool(tools, "store_activity_plan", callback_handler, city=city, plan=plan),
+        call_tool(tools, "store_results", callback_handler, plan=plan),
+    )
+
+    if callback_handler is not None:
+        callback_handler(data=plan)
+    return plan
+
+
+def default_tools() -> Tools:
+    """The real tools from agent.py, plus a direct S3 upload for results.md"""
+    import boto3
+
+    import agent
+
+    s3 = boto3.client("s3", region_name=agent.AWS_REGION)
+
+    def store_results(plan: str) -> Dict[str, Any]:
+        try:
+            s3.put_object(Bucket=agent.RESULTS_BUCKET, Key="results.md", Body=plan.encode(), ContentType="text/markdown")
+            return {"status": "success", "content": [{"text": f"Stored results.md in {agent.RESULTS_BUCKET}"}]}
+        except Exception as e:
+            return {"status": "error", "content": [{"text": f"Error storing results: {str(e)}"}]}
+
+    return {
+        "get_activity_preferences": agent.get_activity_preferences,
+        "get_weather_data": agent.get_weather_data,
+        "store_user_preferences": agent.store_user_preferences,
+        "generate_analysis_code": agent.generate_analysis_code,
+        "execute_code": agent.execute_code,
+        "store_activity_plan": agent.store_activity_plan,
+        "store_results": store_results,
+    }
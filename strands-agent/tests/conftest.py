@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Agent modules are flat files in strands-agent/, plus the modules shared with mcp-server
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, "..", "..", "shared"))
+sys.path.insert(0, os.path.join(TESTS_DIR, ".."))
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+from strands import Agent
+from strands.agent.conversation_manager import SlidingWindowConversationManager
+from strands.models import Model
+
+from agent_pool import AgentPool, AgentPoolTimeout
+
+
+class ScriptedModel(Model):
+    """Model that answers every prompt with the same text"""
+
+    def __init__(self, reply: str = "ok"):
+        self.reply = reply
+
+    def update_config(self, **model_config):
+        pass
+
+    def get_config(self):
+        return {}
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError
+        yield
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockDelta": {"delta": {"text": self.reply}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+        yield {"metadata": {"usage": {"inputTokens": 1, "outputTokens": 1, "totalTokens": 2}, "metrics": {"latencyMs": 1}}}
+
+
+def create_agent() -> Agent:
+    return Agent(
+        model=ScriptedModel(),
+        callback_handler=None,
+        state={"role": "planner"},
+        conversation_manager=SlidingWindowConversationManager(window_size=4),
+    )
+
+
+def test_released_agent_is_reset_to_how_it_was_built():
+    pool = AgentPool(create_agent, size=1)
+    handler = lambda **kwargs: None  # noqa: E731
+
+    with pool.lease(callback_handler=handler) as agent:
+        for i in range(5):
+            agent(f"question {i}")
+        agent.state.set("city", "Seattle")
+        agent.conversation_manager.removed_message_count = 3
+        assert agent.event_loop_metrics.traces
+
+    with pool.lease() as again:
+        assert again is agent
+        assert again.messages == []
+        assert again.state.get() == {"role": "planner"}
+        assert again.conversation_manager.removed_message_count == 0
+        assert again.event_loop_metrics.traces == []
+        assert again.event_loop_metrics.agent_invocations == []
+        assert again.callback_handler is not handler
+        again("next question")
+        assert len(again.messages) == 2
+        assert len(again.event_loop_metrics.agent_invocations) == 1
+    assert pool.stats()["resets_failed"] == 0
+
+
+def test_lease_times_out_when_every_agent_is_leased():
+    pool = AgentPool(create_agent, size=1, lease_timeout_seconds=0.05)
+    with pool.lease():
+        with pytest.raises(AgentPoolTimeout):
+            pool.acquire()
+    assert pool.stats()["waits"] == 1
+
+
+def test_waiting_lease_gets_the_released_agent():
+    pool = AgentPool(create_agent, size=1, lease_timeout_seconds=5)
+    first = pool.acquire()
+    leased = []
+    waiter = threading.Thread(target=lambda: leased.append(pool.acquire()))
+    waiter.start()
+    pool.release(first)
+    waiter.join(5)
+    assert leased == [first]
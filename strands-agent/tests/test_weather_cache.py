@@ -0,0 +1,91 @@
+import asyncio
+
+from weather_cache import WeatherCache
+
+FORECAST = {"status": "success", "content": [{"text": "[]"}]}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_misses_compute_once():
+    async def scenario():
+        cache = WeatherCache()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return FORECAST
+
+        results = await asyncio.gather(*(cache.get_or_compute("Seattle", compute) for _ in range(3)))
+        cached = await cache.get_or_compute("seattle", compute)
+        return results, cached, calls
+
+    results, cached, calls = run(scenario())
+    assert results == [FORECAST] * 3
+    assert cached == FORECAST
+    assert calls == 1
+
+
+def test_cancelled_owner_hands_the_compute_to_a_waiter():
+    async def scenario():
+        cache = WeatherCache()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.2)
+            return FORECAST
+
+        owner = asyncio.ensure_future(asyncio.wait_for(cache.get_or_compute("Seattle", compute), timeout=0.05))
+        await asyncio.sleep(0.01)
+        waiter = cache.get_or_compute("Seattle", compute)
+        return await asyncio.gather(owner, waiter, return_exceptions=True), calls
+
+    (owner, waiter), calls = run(scenario())
+    assert isinstance(owner, asyncio.TimeoutError)
+    assert waiter == FORECAST
+    assert calls == 2
+
+
+def test_cancelled_waiter_does_not_affect_the_owner():
+    async def scenario():
+        cache = WeatherCache()
+
+        async def compute():
+            await asyncio.sleep(0.1)
+            return FORECAST
+
+        owner = asyncio.ensure_future(cache.get_or_compute("Seattle", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.wait_for(cache.get_or_compute("Seattle", compute), timeout=0.01)
+        return await asyncio.gather(owner, waiter, return_exceptions=True)
+
+    owner, waiter = run(scenario())
+    assert owner == FORECAST
+    assert isinstance(waiter, asyncio.TimeoutError)
+
+
+def test_errors_reach_waiters_and_are_not_cached():
+    async def scenario():
+        cache = WeatherCache()
+
+        async def failing():
+            await asyncio.sleep(0.02)
+            raise RuntimeError("browser crashed")
+
+        async def compute():
+            return FORECAST
+
+        results = await asyncio.gather(
+            cache.get_or_compute("Seattle", failing), cache.get_or_compute("Seattle", failing), return_exceptions=True
+        )
+        return results, await cache.get_or_compute("Seattle", compute)
+
+    results, retried = run(scenario())
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+    assert retried == FORECAST
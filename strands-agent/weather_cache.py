@@ -0,0 +1,122 @@
+"""
+In-process TTL cache for get_weather_data
+
+Strands runs each agent invocation on its own event loop, so in-flight
+deduplication uses concurrent.futures futures (awaitable from any loop via
+asyncio.wrap_future) under a thread lock rather than loop-bound asyncio futures.
+"""
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+WEATHER_CACHE_ENABLED = os.getenv('WEATHER_CACHE_ENABLED', 'true').lower() == 'true'
+WEATHER_CACHE_TTL_SECONDS = int(os.getenv('WEATHER_CACHE_TTL_SECONDS', '10800'))
+WEATHER_CACHE_MAX_ENTRIES = int(os.getenv('WEATHER_CACHE_MAX_ENTRIES', '256'))
+WEATHER_CACHE_WINDOW_HOURS = int(os.getenv('WEATHER_CACHE_WINDOW_HOURS', '6'))
+
+# Result of an in-flight lookup whose owner was cancelled; its waiters compute the forecast themselves
+ABANDONED = object()
+
+
+def normalize_city(city: str) -> str:
+    """Canonical cache form of a city name: 'Richmond, VA ' -> 'richmond va'"""
+    return " ".join(re.sub(r"[^\w\s]", " ", city.lower()).split())
+
+
+def weather_cache_key(city: str, now: Optional[datetime] = None) -> str:
+    """Cache key for a city's forecast within the current forecast window"""
+    now = now or datetime.now(timezone.utc)
+    window = now.hour // WEATHER_CACHE_WINDOW_HOURS
+    return f"weather:{normalize_city(city)}:{now:%Y-%m-%d}:{window}"
+
+
+class WeatherCache:
+    """Thread-safe TTL + LRU cache with single-flight misses"""
+
+    def __init__(
+        self,
+        ttl_seconds: int = WEATHER_CACHE_TTL_SECONDS,
+        max_entries: int = WEATHER_CACHE_MAX_ENTRIES,
+        enabled: bool = WEATHER_CACHE_ENABLED,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+
+    def _get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(
+        self,
+        city: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """Return the cached forecast for a city, computing it once on a miss.
+
+        Only results with status "success" are cached. Errors raised by the
+        compute reach every waiter; if the caller computing it is cancelled, a
+        waiter takes over instead.
+        """
+        if not self.enabled:
+            return await compute()
+
+        key = weather_cache_key(city)
+        while True:
+            with self._lock:
+                cached = self._get(key)
+                if cached is not None:
+                    return cached
+                future = self._in_flight.get(key)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self._in_flight[key] = future
+
+            if owner:
+                break
+            # Shielded so a waiter that is cancelled does not cancel the shared future
+            result = await asyncio.shield(asyncio.wrap_future(future))
+            if result is not ABANDONED:
+                return result
+
+        try:
+            result = await compute()
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            # Waiters of a cancelled owner (e.g. at its deadline) take over the compute instead of failing
+            if isinstance(e, Exception):
+                future.set_exception(e)
+            else:
+                future.set_result(ABANDONED)
+            raise
+
+        with self._lock:
+            if result.get("status") == "success":
+                self._set(key, result)
+            self._in_flight.pop(key, None)
+        future.set_result(result)
+        return result